@@ -1,17 +1,28 @@
-from flask import Flask
+from flask import Flask, url_for
 from config import Config
-from services.morph_service import MorphService
-from services.grade_database import GradeDatabase
+from services.container import container
 from routes.main_routes import main_bp
 from routes.api_routes import api_bp
+from services.levels import level_label
 
 app = Flask(__name__)
 app.config.from_object(Config)
+# 등급 코드(int)는 화면에 그릴 때만 '3급' 형태로 변환합니다.
+app.add_template_filter(level_label)
 
 # Initialize Services
-morph_service = MorphService()
-grade_database = GradeDatabase()
-grade_database.initialize(morph_service)
+# Kiwi·어휘 로드는 백그라운드에서 진행하고, 준비 여부는 /readyz 로 알립니다.
+container.start_warm_up()
+
+@app.before_request
+def record_first_request():
+    container.mark_request()
+
+@app.context_processor
+def inject_search_index_url():
+    # 어휘가 준비된 뒤에는 버전을 붙인 URL을 넘겨 브라우저가 색인을 오래 캐시하도록 합니다.
+    if not container.is_ready(): return {'search_index_url': url_for('api.get_search_index')}
+    return {'search_index_url': url_for('api.get_search_index', v=container.grade_database.lexicon_version)}
 
 # Register Blueprints
 app.register_blueprint(main_bp)
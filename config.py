@@ -7,8 +7,65 @@ load_dotenv()
 if 'GOOGLE_API_KEY' in os.environ and 'GEMINI_API_KEY' in os.environ:
     os.environ.pop('GEMINI_API_KEY', None)
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'hangyeol_secret_key')
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
     GEMINI_MODEL_NAME = "models/gemini-2.5-flash-lite"
+    # Kiwi 내부 스레드 수 (여러 문장을 한 번에 분석할 때 사용, 0이면 가용 코어 수)
+    KIWI_NUM_WORKERS = int(os.getenv('KIWI_NUM_WORKERS', '0'))
+    # 컴파일된 어휘 스냅샷 경로 (빈 문자열이면 스냅샷 미사용)
+    LEXICON_SNAPSHOT_PATH = os.getenv('LEXICON_SNAPSHOT_PATH', os.path.join(BASE_DIR, 'cache', 'lexicon.pkl'))
+    # 컴파일된 어휘 항목·지도·검색 색인의 mmap 파일 경로 (워커 간 공유, 빈 문자열이면 프로세스마다 메모리에 보관)
+    LEXICON_MMAP_PATH = os.getenv('LEXICON_MMAP_PATH', os.path.join(BASE_DIR, 'cache', 'lexicon.map'))
+    # '검색 실패' 토큰에 대해 오타 허용 색인으로 유사 항목을 제안할지 여부
+    SUGGEST_UNKNOWN_TOKENS = os.getenv('SUGGEST_UNKNOWN_TOKENS', '').lower() in ('1', 'true', 'yes')
+    # 형태소 창 판정 결과 LRU 캐시 크기 (0이면 비활성화)
+    RESOLUTION_CACHE_SIZE = int(os.getenv('RESOLUTION_CACHE_SIZE', '50000'))
+    # 긴 문서 분석 시 한 번에 형태소 분석/프로파일링할 문장 묶음의 최대 글자 수
+    ANALYSIS_CHUNK_CHARS = int(os.getenv('ANALYSIS_CHUNK_CHARS', '3000'))
+    # 다중 파일 업로드 분석용 프로세스 풀 크기 (1 이하이면 순차 처리)
+    GRADE_POOL_SIZE = int(os.getenv('GRADE_POOL_SIZE', str(min(4, os.cpu_count() or 1))))
+    # 프로세스 시작 방식 ('fork', 'spawn', 'forkserver'; 비워 두면 플랫폼 기본값)
+    GRADE_POOL_START_METHOD = os.getenv('GRADE_POOL_START_METHOD', '')
+    # 분석 결과 캐시: 메모리 LRU 항목 수, 디스크 계층 경로 (빈 문자열이면 디스크 계층 미사용)
+    ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', '2048'))
+    ANALYSIS_CACHE_DIR = os.getenv('ANALYSIS_CACHE_DIR', '')
+    # AI 동음이의어 판별 결과 영속 캐시 (SQLite, 빈 문자열이면 비활성화)
+    AI_DECISION_CACHE_PATH = os.getenv('AI_DECISION_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'ai_decisions.sqlite3'))
+    AI_DECISION_CACHE_TTL = int(os.getenv('AI_DECISION_CACHE_TTL', str(30 * 24 * 3600)))
+    AI_DECISION_CACHE_MAX_ENTRIES = int(os.getenv('AI_DECISION_CACHE_MAX_ENTRIES', '100000'))
+    # AI 동음이의어 판별 배치 (문장 창 단위로 묶어 동시에 질의)
+    AI_BATCH_MAX_ITEMS = int(os.getenv('AI_BATCH_MAX_ITEMS', '15'))
+    AI_BATCH_MAX_CHARS = int(os.getenv('AI_BATCH_MAX_CHARS', '1200'))
+    AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '4'))
+    AI_BATCH_RETRIES = int(os.getenv('AI_BATCH_RETRIES', '1'))
+    # 동음이의어 판별 방식: hybrid(로컬 판별 후 확신이 낮은 항목만 AI), local(로컬만), ai(모두 AI)
+    DISAMBIGUATION_MODE = os.getenv('DISAMBIGUATION_MODE', 'hybrid')
+    # 로컬 판별 1위-2위 점수 차이가 이 값 미만이면 AI에 넘깁니다.
+    LOCAL_DISAMBIGUATION_MARGIN = float(os.getenv('LOCAL_DISAMBIGUATION_MARGIN', '0.3'))
+    # AI 판별 범위: level(후보 간 등급이 갈리는 항목만), sense(등급이 같아도 의미까지 판별)
+    DISAMBIGUATION_SCOPE = os.getenv('DISAMBIGUATION_SCOPE', 'level')
+    # word.csv / grammar.csv 변경 감시 주기(초, 0이면 감시 안 함)와 다시 불러오기 API 토큰 (비우면 API 사용 안 함)
+    LEXICON_WATCH_INTERVAL = float(os.getenv('LEXICON_WATCH_INTERVAL', '0'))
+    LEXICON_RELOAD_TOKEN = os.getenv('LEXICON_RELOAD_TOKEN', '')
+    # 대량 채점 작업 큐: 작업 스레드 수, 결과 저장 위치, 완료 후 결과 보관 시간(초)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '1'))
+    JOB_RESULT_DIR = os.getenv('JOB_RESULT_DIR', os.path.join(BASE_DIR, 'cache', 'jobs'))
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', str(24 * 3600)))
+    # 파일 1개짜리(대화형) 작업만 처리하는 전용 스레드 수 (대량 작업이 도는 동안에도 바로 처리)
+    JOB_INTERACTIVE_WORKERS = int(os.getenv('JOB_INTERACTIVE_WORKERS', '1'))
+    # 업로드 제한: 요청 본문(Flask가 넘으면 413 응답), 파일 하나(.zip 안의 항목 포함), 요청 하나에서 풀어 읽는 총량, .zip 항목 수
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', str(64 * 1024 * 1024)))
+    UPLOAD_MAX_FILE_BYTES = int(os.getenv('UPLOAD_MAX_FILE_BYTES', str(20 * 1024 * 1024)))
+    UPLOAD_MAX_TOTAL_BYTES = int(os.getenv('UPLOAD_MAX_TOTAL_BYTES', str(100 * 1024 * 1024)))
+    UPLOAD_MAX_ARCHIVE_MEMBERS = int(os.getenv('UPLOAD_MAX_ARCHIVE_MEMBERS', '500'))
+    # 업로드 파일을 읽고 디코딩하는 블록 크기 (첫 블록으로 인코딩을 판별)
+    UPLOAD_READ_BLOCK = int(os.getenv('UPLOAD_READ_BLOCK', str(64 * 1024)))
+    # 결과 화면 하이라이트 원문용 분석 결과 보관: 저장 위치, 보관 시간(초), 메모리에 둘 결과 수, 페이지당 run 수
+    RESULT_STORE_DIR = os.getenv('RESULT_STORE_DIR', os.path.join(BASE_DIR, 'cache', 'results'))
+    RESULT_TTL = int(os.getenv('RESULT_TTL', str(24 * 3600)))
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '16'))
+    SEGMENT_PAGE_SIZE = int(os.getenv('SEGMENT_PAGE_SIZE', '2000'))
     # Add other configuration variables here if needed
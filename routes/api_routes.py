@@ -1,25 +1,165 @@
-from flask import Blueprint, request, jsonify
-from services.grade_database import GradeDatabase
-from services.analysis_service import AnalysisService
-from services.quiz_service import QuizService
+import hashlib
+import hmac
+import json
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
+from services.container import container
+from services.metrics import metrics
+from config import Config
 
 api_bp = Blueprint('api', __name__)
 
-grade_database = GradeDatabase()
-analysis_service = AnalysisService()
-quiz_service = QuizService()
+@api_bp.route("/healthz")
+def healthz():
+    # 프로세스가 살아 있으면 항상 200 (준비 여부는 /readyz)
+    return jsonify({'status': 'ok'})
+
+@api_bp.route("/readyz")
+def readyz():
+    # Kiwi·어휘 준비가 끝난 워커만 200 - 로드 밸런서는 이 응답으로 트래픽을 보냅니다.
+    status = container.status()
+    return jsonify(status), (200 if status['ready'] else 503)
 
 @api_bp.route("/api/search")
 def search_keyword():
     query = request.args.get("q", "").strip()
     search_type = request.args.get("type", "word")
-    return jsonify(grade_database.search_keyword(query, search_type))
+    mode = request.args.get("mode", "contains")
+    # 같은 어휘 버전·질의면 결과가 같으므로, 검색하기 전에 ETag만 비교해 304로 답할 수 있습니다.
+    etag = container.grade_database.lexicon_version + "-" + hashlib.sha1(f"{search_type}\0{mode}\0{query}".encode()).hexdigest()[:16]
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'})
+    response = jsonify(container.grade_database.search_keyword(query, search_type, mode))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api_bp.route("/api/search-index")
+def get_search_index():
+    # 브라우저 검색 색인 (static/lexicon_search.js). ?v=현재 어휘 버전 으로 요청하면 1년간 캐시하고,
+    # 버전 없이 요청하면 매번 ETag로 재검증합니다. gzip 본문은 미리 압축해 두므로 표현마다 ETag가 다릅니다.
+    if not container.grade_database.is_ready:
+        return jsonify({'error': '어휘 데이터를 준비 중입니다.'}), 503
+    version, body, gzipped = container.grade_database.search_index_blob()
+    use_gzip = 'gzip' in request.accept_encodings
+    etag = f"{version}-gzip" if use_gzip else version
+    cache_control = 'public, max-age=31536000, immutable' if request.args.get('v') == version else 'no-cache'
+    headers = {'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=dict(headers, ETag=f'"{etag}"'))
+    response = Response(gzipped if use_gzip else body, mimetype='application/json', headers=headers)
+    if use_gzip: response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    return response
+
+@api_bp.route("/api/grade", methods=['POST'])
+def grade_stream():
+    # 입력: JSON {"text": ...} / {"texts": [...]} 또는 폼(sentence, file 여러 개)
+    # 출력: NDJSON - 문장 묶음·파일 하나가 분석될 때마다 한 줄씩, 마지막 줄은 전체 집계(summary)
+    # chunk_chars: 문장 묶음 크기 (1이면 문장마다 한 줄, 기본값·최댓값 ANALYSIS_CHUNK_CHARS)
+    payload = request.get_json(silent=True) or {}
+    texts = _read_grade_texts(payload)
+    # 업로드 파일은 응답을 흘려보내면서 블록 단위로 읽어 바로 분석합니다. (stream_with_context 가 요청을 열어 둠)
+    uploads = [file for file in request.files.getlist('file') if file and file.filename]
+    if not texts and not uploads:
+        return jsonify({"error": "파일이 없거나 텍스트 내용이 없습니다."}), 400
+    # 잘못된 값은 스트림 중간에 실패하지 않도록 응답을 시작하기 전에 거절합니다.
+    try:
+        chunk_size = _read_chunk_size(payload)
+    except (TypeError, ValueError):
+        return jsonify({"error": "chunk_chars는 1 이상의 정수여야 합니다."}), 400
+
+    def generate():
+        for record in container.grade_stream.iter_records(texts, chunk_size=chunk_size, uploads=uploads):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@api_bp.route("/api/jobs", methods=['POST'])
+def submit_job():
+    # /api/grade 와 같은 입력을 받아 작업 큐에 넣고 바로 202 + 작업 ID를 돌려줍니다. (직접 입력 텍스트도 파일 하나로 취급)
+    texts, documents, errors = _read_grade_inputs(request.get_json(silent=True) or {})
+    documents = [('직접 입력', text) for text in texts] + documents
+    if not documents and not errors:
+        return jsonify({"error": "파일이 없거나 텍스트 내용이 없습니다."}), 400
+    job = container.jobs.submit(documents, errors)
+    return jsonify(_job_response(job)), 202
+
+@api_bp.route("/api/jobs/<job_id>")
+def get_job(job_id):
+    job = container.jobs.get(job_id)
+    if not job: return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    return jsonify(_job_response(job))
+
+@api_bp.route("/api/jobs/<job_id>/result")
+def get_job_result(job_id):
+    job = container.jobs.get(job_id)
+    if not job: return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    path = container.jobs.result_path(job_id)
+    if not path: return jsonify(_job_response(job)), 409
+    return send_file(path, mimetype='application/x-ndjson')
+
+def _job_response(job):
+    job = dict(job)
+    job.pop('pid', None)
+    job['status_url'] = f"/api/jobs/{job['id']}"
+    if job['status'] == 'done': job['result_url'] = f"/api/jobs/{job['id']}/result"
+    return job
+
+def _read_chunk_size(payload):
+    """쿼리 또는 JSON 의 chunk_chars -> 1 ~ ANALYSIS_CHUNK_CHARS 정수 (없으면 None, 정수가 아니거나 1 미만이면 ValueError)"""
+    value = request.args.get('chunk_chars')
+    if value is None: value = payload.get('chunk_chars')
+    if value is None or value == '': return None
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()): raise ValueError(value)
+    chunk_size = int(value)
+    if chunk_size < 1: raise ValueError(value)
+    return min(chunk_size, Config.ANALYSIS_CHUNK_CHARS)
+
+def _read_grade_texts(payload):
+    """JSON {"text"} / {"texts"} 또는 폼 sentence -> 비어 있지 않은 텍스트 리스트"""
+    texts = payload.get('texts') or [payload.get('text') or request.form.get('sentence', '')]
+    return [text for text in texts if isinstance(text, str) and text.strip()]
+
+def _read_grade_inputs(payload):
+    """JSON {"text"} / {"texts"} 또는 폼(sentence, file 여러 개) -> (texts, [(파일명, 텍스트)], [(파일명, 오류)])"""
+    # 작업 큐는 요청이 끝난 뒤에 처리하므로 업로드를 미리 모두 읽어 둡니다. (.zip 은 안의 .txt 하나가 문서 하나)
+    documents, errors = container.file_processing.read_uploads(request.files.getlist('file'))
+    return _read_grade_texts(payload), documents, errors
+
+@api_bp.route("/api/results/<result_id>/segments")
+def get_result_segments(result_id):
+    # 결과 화면 하이라이트 원문: file 번호의 run을 page(+per_page) 또는 start/end(run 번호 구간)로 잘라 돌려줍니다.
+    page = container.results.segments_page(
+        result_id, request.args.get('file', 0, type=int),
+        start=request.args.get('start', type=int), end=request.args.get('end', type=int),
+        page=request.args.get('page', 0, type=int), per_page=request.args.get('per_page', type=int))
+    if page is None: return jsonify({"error": "분석 결과를 찾을 수 없습니다. 다시 분석해 주세요."}), 404
+    return jsonify(page)
+
+@api_bp.route("/api/metrics")
+def get_metrics():
+    return jsonify(metrics.snapshot())
+
+@api_bp.route("/api/lexicon")
+def get_lexicon_status():
+    return jsonify({'version': container.grade_database.lexicon_version, 'source': container.grade_database.lexicon_source,
+                    'reload': container.grade_database.reload_status})
+
+@api_bp.route("/api/lexicon/reload", methods=['POST'])
+def reload_lexicon():
+    # 전체 어휘를 다시 만드는 비싼 작업이므로, 토큰이 설정되지 않았으면 요청을 받지 않습니다. (파일 감시는 별도)
+    token = request.headers.get('X-Reload-Token', '')
+    if not Config.LEXICON_RELOAD_TOKEN or not hmac.compare_digest(token.encode('utf-8'), Config.LEXICON_RELOAD_TOKEN.encode('utf-8')):
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    started = container.grade_database.reload()
+    return jsonify({'started': started, 'version': container.grade_database.lexicon_version,
+                    'reload': container.grade_database.reload_status}), 202
 
 @api_bp.route('/analyze_sentence_for_quiz', methods=['POST'])
 def analyze_sentence_for_quiz():
     data = request.json
     try:
-        morphs = analysis_service.analyze_morphs(data.get('sentence', ''))
+        morphs = container.analysis.analyze_morphs(data.get('sentence', ''))
         return jsonify({'morphs': morphs})
     except Exception as e:
         return jsonify({'error': str(e)})
@@ -33,10 +173,10 @@ def generate_quiz_action():
     context = data.get('context', '')
     user_prompt = data.get('user_prompt', '') 
 
-    return jsonify(quiz_service.generate_quiz_item(target, max_grade, quiz_type, context, user_prompt))
+    return jsonify(container.quiz.generate_quiz_item(target, max_grade, quiz_type, context, user_prompt))
 
 @api_bp.route('/api/generate-matching', methods=['POST'])
 def generate_matching_quiz():
     data = request.json
     input_words = data.get('words', [])
-    return jsonify(quiz_service.generate_matching_quiz(input_words))
+    return jsonify(container.quiz.generate_matching_quiz(input_words))
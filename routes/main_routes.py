@@ -1,17 +1,9 @@
 from flask import Blueprint, render_template, request, send_file, jsonify
-from services.analysis_service import AnalysisService
-from services.generation_service import GenerationService
-from services.visualization_service import VisualizationService
-
-from services.file_processing_service import FileProcessingService
+from services.container import container
+from services.token_table import TokenTable
 
 main_bp = Blueprint('main', __name__)
 
-analysis_service = AnalysisService()
-generation_service = GenerationService()
-visualization_service = VisualizationService()
-file_service = FileProcessingService()
-
 @main_bp.route("/")
 def index():
     return render_template("index.html")
@@ -25,18 +17,18 @@ def grade():
     visualization_data = {}
     text_segments = []
     file_text_contents = [] # [FIX] Initialize for GET requests
+    result_id = ""
 
     if request.method == "POST":
         last_sentence = request.form.get("sentence", "")
-        grade_stats, analysis_result, debug_log = analysis_service.get_sentence_grade(last_sentence)
+        grade_stats, analysis_result, debug_log = container.analysis.get_sentence_grade(last_sentence)
         
         # [MODIFIED] 직접 입력 시에도 파일명 '직접 입력'으로 통일
         file_stats_list = [{'filename': '직접 입력', 'stats': grade_stats}]
-        for item in analysis_result:
-            item['filename'] = '직접 입력'
+        analysis_result.set_filename('직접 입력')
             
-        visualization_data, text_segments = visualization_service.get_visualization_data(analysis_result, last_sentence)
-        file_text_contents = [{'filename': '직접 입력', 'segments': text_segments}]
+        visualization_data, text_segments = container.visualization.get_visualization_data(analysis_result, last_sentence)
+        result_id, file_text_contents = _save_result([('직접 입력', analysis_result, text_segments)])
 
     return render_template("grade.html", 
                            file_stats_list=file_stats_list, 
@@ -44,7 +36,8 @@ def grade():
                            last_sentence=last_sentence,
                            debug_log=debug_log,
                            visualization_data=visualization_data,
-                           file_text_contents=file_text_contents)
+                           file_text_contents=file_text_contents,
+                           result_id=result_id)
 
 @main_bp.route("/grade/upload", methods=["POST"])
 def grade_upload():
@@ -58,32 +51,29 @@ def grade_upload():
         return jsonify({"error": "파일이 없거나 텍스트 내용이 없습니다."}), 400
     
     file_stats_list = []
-    combined_analysis_result = []
+    combined_analysis_result = TokenTable()
     combined_text = []
     full_debug_log = ""
 
     try:
         # [NEW] 파일별 텍스트 세그먼트 및 종합 데이터 집계
-        file_text_contents = []
+        file_segments = []
         overall_grade_counts = {f"{i}급": 0 for i in range(1, 7)}
         overall_grade_counts["등급 없음"] = 0 # [NEW] 등급 없음 추가
 
-        for file in files:
-            if not file: continue
-            filename = file.filename
-            
-            # 파일에서 텍스트 추출
-            extracted_text = file_service.extract_text_from_file(file)
-            
-            # 분석 실행
-            grade_stats, analysis_result, debug_log = analysis_service.get_sentence_grade(extracted_text)
-            
+        # 파일에서 텍스트 추출 (요청 스트림은 현재 프로세스에서만 읽을 수 있음, .zip 은 안의 .txt 하나가 문서 하나)
+        documents, errors = container.file_processing.read_uploads(files)
+        if errors: raise Exception(f"{errors[0][0]}: {errors[0][1]}")
+
+        # 분석 실행: 파일들을 프로세스 풀에 나누어 동시에 분석하고, 결과는 업로드 순서대로 받습니다.
+        results = container.parallel_grading.grade_documents([text for _, text in documents], container.analysis)
+
+        for (filename, extracted_text), (grade_stats, analysis_result, debug_log) in zip(documents, results):
             # [NEW] 파일별 통계 저장
             file_stats_list.append({'filename': filename, 'stats': grade_stats})
             
-            # [NEW] 분석 결과에 파일명 추가
-            for item in analysis_result:
-                item['filename'] = filename
+            # [NEW] 분석 결과에 파일명 추가 (토큰마다가 아니라 파일 구간 단위로 기록)
+            analysis_result.set_filename(filename)
                 
             combined_analysis_result.extend(analysis_result)
             combined_text.append(f"[{filename}]\n{extracted_text}")
@@ -91,11 +81,8 @@ def grade_upload():
 
             # [NEW] 개별 파일 시각화 데이터 생성 (텍스트 세그먼트용)
             # Pie Chart용 카운트 누적
-            _, temp_segments = visualization_service.get_visualization_data(analysis_result, extracted_text)
-            file_text_contents.append({
-                'filename': filename,
-                'segments': temp_segments
-            })
+            _, temp_segments = container.visualization.get_visualization_data(analysis_result, extracted_text)
+            file_segments.append((filename, analysis_result, temp_segments))
             
             # 종합 원그래프용 데이터 누적
             for k, v in grade_stats.items():
@@ -103,9 +90,10 @@ def grade_upload():
                     overall_grade_counts[k] += v
 
         full_extracted_text = "\n\n".join(combined_text)
+        result_id, file_text_contents = _save_result(file_segments)
         
         # 종합 Pie Chart 데이터 재구성
-        visualization_data = visualization_service.create_chart_data_from_stats(overall_grade_counts)
+        visualization_data = container.visualization.create_chart_data_from_stats(overall_grade_counts)
         
         # grade.html 렌더링
         return render_template("grade.html", 
@@ -114,7 +102,8 @@ def grade_upload():
                        last_sentence=full_extracted_text,
                        debug_log=full_debug_log,
                        visualization_data=visualization_data,
-                       file_text_contents=file_text_contents)  # [NEW] 전달
+                       file_text_contents=file_text_contents,  # [NEW] 전달
+                       result_id=result_id)
 
     except Exception as e:
         return jsonify({"error": f"파일 처리 중 오류 발생: {e}"}), 500
@@ -127,28 +116,26 @@ def generate():
     rejected_history = [] 
     visualization_data = None
     text_segments = None
+    result_id = ""
     
     if request.method == "POST":
         grades = request.form.getlist("grades")
         keyword = request.form.get("keyword", "").strip()
         hint = request.form.get("hint", "").strip()
         
-        final_sentence, final_analysis, final_grade, rejected_history = generation_service.generate_with_validation(
-            grades, keyword, hint, analysis_service
+        final_sentence, final_analysis, final_grade, rejected_history = container.generation.generate_with_validation(
+            grades, keyword, hint, container.analysis
         )
 
     if final_sentence:
-        visualization_data, text_segments = visualization_service.get_visualization_data(final_analysis, final_sentence)
+        visualization_data, text_segments = container.visualization.get_visualization_data(final_analysis, final_sentence)
         # [NEW] Wrap in file_text_contents for visualization.html compatibility
-        file_text_contents = [{
-            'filename': '생성 결과',
-            'segments': text_segments
-        }]
+        result_id, file_text_contents = _save_result([('생성 결과', final_analysis, text_segments)])
         
         # [NEW] Calculate stats for Frequency Table
         # We can re-use get_sentence_grade or calculate manually from final_analysis.
         # Since get_sentence_grade is robust, let's use that (it's fast for one sentence).
-        stats, _, _ = analysis_service.get_sentence_grade(final_sentence)
+        stats, _, _ = container.analysis.get_sentence_grade(final_sentence)
         file_stats_list = [{
             'filename': '생성 결과',
             'stats': stats
@@ -165,9 +152,20 @@ def generate():
         rejected_history=rejected_history,
         visualization_data=visualization_data,
         file_text_contents=file_text_contents,
-        file_stats_list=file_stats_list # [NEW] Pass calculated stats
+        file_stats_list=file_stats_list, # [NEW] Pass calculated stats
+        result_id=result_id
     )
 
+def _save_result(files):
+    """
+    [(파일명, TokenTable, 세그먼트)] -> (결과 ID, 템플릿용 file_text_contents)
+    하이라이트 원문은 페이지에 싣지 않고 결과 저장소에 두며, 브라우저가 /api/results/<id>/segments 로 받아 그립니다.
+    """
+    stored = [{'filename': filename, 'table': table, 'runs': container.visualization.encode_segments(segments)}
+              for filename, table, segments in files]
+    result_id = container.results.save(stored)
+    return result_id, [{'filename': item['filename'], 'run_count': len(item['runs'])} for item in stored]
+
 @main_bp.route("/quiz")
 def quiz():
     return render_template("quiz.html")
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+class AIDecisionCache:
+    """
+    AI 동음이의어 판별 결과를 SQLite에 저장하는 영속 캐시.
+
+    키는 (단어, 정렬된 후보 uid 집합, 정규화된 주변 문맥)의 해시이며,
+    값은 AI가 고른 uid 입니다. TTL이 지난 항목과 최대 개수를 넘는 오래된 항목은
+    일정 횟수의 저장마다 함께 정리합니다. 여러 워커 프로세스가 같은 파일을 공유할 수 있습니다.
+    """
+
+    _PRUNE_EVERY = 200
+
+    def __init__(self, path, ttl_seconds=30 * 24 * 3600, max_entries=100000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = bool(path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._puts = 0
+
+    def _connect(self):
+        # fork된 워커는 부모의 연결을 쓰지 않고 새로 연결합니다.
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS decisions ("
+                " key TEXT PRIMARY KEY, uid TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_decisions_last_used ON decisions(last_used)")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def make_key(word, candidates, context):
+        uids = sorted(f"{c.source}{c.uid}" for c in candidates)
+        norm_context = re.sub(r'\s+', ' ', context or '').strip()
+        raw = "\0".join([str(word), ",".join(uids), norm_context])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        if not self.enabled: return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT uid, created FROM decisions WHERE key = ?", (key,)).fetchone()
+                if row is None: return None
+                uid, created = row
+                if self.ttl_seconds and now - created > self.ttl_seconds:
+                    conn.execute("DELETE FROM decisions WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE decisions SET last_used = ? WHERE key = ?", (now, key))
+                conn.commit()
+                return uid
+        except sqlite3.Error as e:
+            print(f"⚠️ AI 판별 캐시 조회 실패: {e}")
+            return None
+
+    def put_many(self, entries):
+        """:param entries: [(key, uid), ...]"""
+        if not self.enabled or not entries: return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO decisions (key, uid, created, last_used) VALUES (?, ?, ?, ?)",
+                    [(key, str(uid), now, now) for key, uid in entries]
+                )
+                conn.commit()
+                self._puts += len(entries)
+                if self._puts >= self._PRUNE_EVERY:
+                    self._puts = 0
+                    self._prune(conn, now)
+        except sqlite3.Error as e:
+            print(f"⚠️ AI 판별 캐시 저장 실패: {e}")
+
+    def _prune(self, conn, now):
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM decisions WHERE created < ?", (now - self.ttl_seconds,))
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM decisions WHERE key IN ("
+                " SELECT key FROM decisions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        conn.commit()
+
+    def stats(self):
+        if not self.enabled: return {'enabled': False}
+        try:
+            with self._lock:
+                count = self._connect().execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+            return {'enabled': True, 'entries': count, 'path': self.path}
+        except sqlite3.Error as e:
+            return {'enabled': True, 'error': str(e)}
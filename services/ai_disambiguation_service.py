@@ -1,18 +1,130 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from services.ai_decision_cache import AIDecisionCache
+from services.metrics import metrics
+
+# 프로세스 내에서 공유하는 AI 판별 결과 영속 캐시
+_decision_cache = AIDecisionCache(
+    Config.AI_DECISION_CACHE_PATH,
+    ttl_seconds=Config.AI_DECISION_CACHE_TTL,
+    max_entries=Config.AI_DECISION_CACHE_MAX_ENTRIES
+)
+metrics.register_gauge('ai_decision_cache', _decision_cache.stats)
 
 class AIDisambiguationService:
+    def __init__(self, decision_cache=None, max_workers=None, batch_max_items=None, batch_max_chars=None):
+        self.decision_cache = decision_cache or _decision_cache
+        self.max_workers = max_workers or Config.AI_MAX_CONCURRENCY
+        self.batch_max_items = batch_max_items or Config.AI_BATCH_MAX_ITEMS
+        self.batch_max_chars = batch_max_chars or Config.AI_BATCH_MAX_CHARS
+        self.batch_retries = Config.AI_BATCH_RETRIES
+
     def disambiguate(self, client, model_name, sentence, ambiguous_items):
         """
         AI를 사용하여 모호한 단어들의 의미를 결정합니다.
+        (단어, 후보 uid 집합, 주변 문맥)이 같은 항목은 하나의 질문으로 합치고, 캐시된 판별 결과가 있으면 사용합니다.
+        캐시에 없는 질문은 문장 창 단위 배치로 나누어 동시에 질의하며, 배치가 실패하면 그 배치 항목만 응답에서 빠집니다.
+        캐시에서 답한 항목에는 'from_cache'가 표시됩니다.
         
         :param client: AI API Client
         :param model_name: AI 모델명
         :param sentence: 문맥 문장
-        :param ambiguous_items: 모호한 항목 리스트
+        :param ambiguous_items: 모호한 항목 리스트 (항목별 'context'가 있으면 캐시 키로 사용)
         :return: (결과 dict, raw_response)
         """
         if not client or not ambiguous_items: return {}, "AI 미사용"
-        
+
+        decisions = {}
+        # 캐시 키가 같은 (단어, 후보 집합, 문맥) 항목은 하나의 질문으로 합칩니다.
+        questions = {}
+        for i, item in enumerate(ambiguous_items):
+            context = item.get('context', sentence)
+            key = self.decision_cache.make_key(item['word'], item['candidates'], context)
+            if key in questions:
+                questions[key]['indices'].append(i)
+                continue
+            cached_uid = self.decision_cache.get(key)
+            if cached_uid is not None and any(str(c.uid) == cached_uid for c in item['candidates']):
+                decisions[str(i + 1)] = cached_uid
+                item['from_cache'] = True
+                metrics.incr('ai_decision_cache_hits')
+                questions[key] = {'indices': [i], 'cached': cached_uid}
+            else:
+                metrics.incr('ai_decision_cache_misses')
+                questions[key] = {'indices': [i], 'item': item, 'context': context, 'key': key}
+
+        # 캐시에서 답한 질문과 같은 항목들에도 같은 결과를 적용
+        for q in questions.values():
+            if 'cached' in q:
+                for i in q['indices'][1:]:
+                    decisions[str(i + 1)] = q['cached']
+                    ambiguous_items[i]['from_cache'] = True
+
+        pending = [q for q in questions.values() if 'cached' not in q]
+        cache_note = f"캐시 적중 {len(questions) - len(pending)}건"
+        if not pending: return decisions, f"{cache_note} (AI 호출 생략)"
+
+        batches = self._make_batches(pending)
+        if len(batches) == 1:
+            results = [self._request_batch(client, model_name, batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+                results = list(executor.map(lambda batch: self._request_batch(client, model_name, batch), batches))
+
+        new_entries = []
+        raw_logs = []
+        for batch_no, (batch, (ai_data, raw_response)) in enumerate(zip(batches, results), 1):
+            raw_logs.append(f"[배치 {batch_no}/{len(batches)}, {len(batch)}건] {raw_response}")
+            for local_idx, q in enumerate(batch):
+                # 프롬프트의 [번호](1-based)로만 응답을 찾습니다. 다른 키로 추측하면 앞 질문이나 같은 단어의
+                # 다른 항목 답을 가져올 수 있고, 그 결과가 판별 캐시에 저장되어 오래 남습니다.
+                response_key = str(local_idx + 1)
+                if response_key not in ai_data: continue
+                selected_uid = str(ai_data[response_key])
+                for i in q['indices']:
+                    decisions[str(i + 1)] = selected_uid
+                if any(str(c.uid) == selected_uid for c in q['item']['candidates']):
+                    new_entries.append((q['key'], selected_uid))
+        self.decision_cache.put_many(new_entries)
+        return decisions, f"{cache_note} | " + "\n".join(raw_logs)
+
+    def _make_batches(self, pending):
+        """
+        같은 문맥(문장 창)의 질문끼리 묶은 뒤, 항목 수와 문맥 길이 한도 안에서 배치로 나눕니다.
+        한 문장 창이 한도를 넘으면 그 창만 여러 배치로 나뉩니다.
+        """
+        by_context = {}
+        for q in pending:
+            by_context.setdefault(q['context'], []).append(q)
+
+        batches, current, current_chars = [], [], 0
+        for context, group in by_context.items():
+            for start in range(0, len(group), self.batch_max_items):
+                part = group[start:start + self.batch_max_items]
+                contexts = {q['context'] for q in current}
+                extra_chars = 0 if context in contexts else len(context)
+                if current and (len(current) + len(part) > self.batch_max_items
+                                or current_chars + extra_chars > self.batch_max_chars):
+                    batches.append(current)
+                    current, current_chars, extra_chars = [], 0, len(context)
+                current.extend(part)
+                current_chars += extra_chars
+        if current: batches.append(current)
+        return batches
+
+    def _request_batch(self, client, model_name, batch):
+        """배치 하나를 질의합니다. 실패하면 재시도하고, 그래도 실패하면 이 배치만 빈 결과로 돌려줍니다."""
+        contexts = list(dict.fromkeys(q['context'] for q in batch))
+        context_text = contexts[0] if len(contexts) == 1 else " / ".join(contexts)
+        items = [q['item'] for q in batch]
+        ai_data, raw_response = {}, ""
+        for _ in range(1 + self.batch_retries):
+            ai_data, raw_response = self._request(client, model_name, context_text, items)
+            if ai_data: break
+        return ai_data, raw_response
+
+    def _request(self, client, model_name, sentence, ambiguous_items):
         prompt = f"""
         당신은 한국어 어휘 분석 전문가입니다. 주어진 문맥을 바탕으로 동음이의어의 가장 적절한 의미를 판단하세요.
         문맥: "{sentence}"
@@ -24,8 +136,8 @@ class AIDisambiguationService:
             idx = i + 1
             options = []
             for cand in item['candidates']:
-                desc = cand.get('desc') or cand.get('meaning') or "의미 정보 없음"
-                options.append(f"(ID:{cand['uid']}) {desc}")
+                desc = cand.desc or cand.meaning or "의미 정보 없음"
+                options.append(f"(ID:{cand.uid}) {desc}")
             
             options_str = ", ".join(options)
             prompt += f"[{idx}] 단어: '{item['word']}' -> 후보: [{options_str}]\n"
@@ -39,6 +151,7 @@ class AIDisambiguationService:
         """
         
         raw_response = ""
+        metrics.incr('ai_disambiguation_requests')
         try:
             response = client.models.generate_content(
                 model=model_name,
@@ -55,5 +168,6 @@ class AIDisambiguationService:
             return ai_data, raw_response
 
         except Exception as e:
+            metrics.incr('ai_disambiguation_errors')
             error_msg = f"Error: {e} | Raw: {raw_response}"
             return {}, error_msg
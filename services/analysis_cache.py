@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+from services.cache_utils import LRUCache
+
+
+class AnalysisResultCache:
+    """
+    분석 결과 캐시 (내용 주소 기반).
+
+    키는 (문장 원문, 어휘 스냅샷 버전, AI 모드)의 SHA-256 해시이며,
+    값은 (grade_stats, analysis_data, debug_log)를 pickle한 바이트입니다.
+    꺼낼 때마다 새로 역직렬화하므로 호출자가 결과 dict를 수정해도 캐시는 오염되지 않습니다.
+
+    메모리 LRU 계층 + (선택) 디스크 계층으로 구성되며, 디스크 계층은 어휘 버전별 하위 폴더를 사용해
+    어휘가 바뀌면 이전 버전 폴더를 통째로 지웁니다.
+    """
+
+    def __init__(self, memory_size=2048, disk_dir=""):
+        self.memory = LRUCache(memory_size)
+        self.disk_dir = disk_dir
+        self.version = None
+        self.disk_hits = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(sentence, lexicon_version, mode):
+        hasher = hashlib.sha256()
+        for part in (lexicon_version or '', mode or '', sentence or ''):
+            hasher.update(part.encode('utf-8'))
+            hasher.update(b'\0')
+        return hasher.hexdigest()
+
+    def set_version(self, lexicon_version):
+        """어휘 버전이 바뀌면 메모리 계층을 비우고 이전 버전의 디스크 캐시를 정리합니다."""
+        if lexicon_version == self.version: return
+        with self._lock:
+            if lexicon_version == self.version: return
+            self.memory.clear()
+            self.version = lexicon_version
+            if self.disk_dir and os.path.isdir(self.disk_dir):
+                current = self._version_dir_name()
+                for name in os.listdir(self.disk_dir):
+                    path = os.path.join(self.disk_dir, name)
+                    if name != current and os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+
+    def _version_dir_name(self):
+        return (self.version or 'none')[:16]
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, self._version_dir_name(), key[:2], f"{key}.pkl")
+
+    def get(self, key):
+        blob = self.memory.get(key)
+        if blob is None and self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    blob = f.read()
+                self.disk_hits += 1
+                self.memory.put(key, blob)
+            except FileNotFoundError:
+                blob = None
+            except Exception as e:
+                print(f"⚠️ 분석 캐시 읽기 실패: {e}")
+                blob = None
+        if blob is None: return None
+        return pickle.loads(blob)
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.memory.put(key, blob)
+        if self.disk_dir:
+            try:
+                path = self._disk_path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(blob)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"⚠️ 분석 캐시 저장 실패: {e}")
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats['disk_hits'] = self.disk_hits
+        stats['disk_enabled'] = bool(self.disk_dir)
+        return stats
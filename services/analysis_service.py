@@ -1,80 +1,204 @@
-import re
 import json
-from google import genai
+import numpy as np
 from config import Config
 from services.morph_service import MorphService
 from services.grade_database import GradeDatabase
 from services.grade_profiler import GradeProfiler
+from services.analysis_cache import AnalysisResultCache
+from services.metrics import metrics
+from services.levels import LEVEL_NONE, LEVEL_CODES, level_counts, level_label
+from services.token_table import TokenTable
+
+# 프로세스 내 모든 AnalysisService 인스턴스가 공유하는 분석 결과 캐시
+_result_cache = AnalysisResultCache(Config.ANALYSIS_CACHE_SIZE, Config.ANALYSIS_CACHE_DIR)
+metrics.register_gauge('analysis_result_cache', _result_cache.stats)
 
 class AnalysisService:
+    # 프로세스당 하나만 만듭니다. (라우트 모듈마다 프로파일러·AI 클라이언트를 따로 두지 않도록)
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AnalysisService, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
     def __init__(self):
+        if self._initialized: return
         self.morph = MorphService()
         self.data = GradeDatabase()
         self.profiler = GradeProfiler(self.data)
         self.client = None
         self.model_name = Config.GEMINI_MODEL_NAME
         self._init_ai()
+        self._initialized = True
     
     def _init_ai(self):
-        api_key = Config.GOOGLE_API_KEY
-        if api_key:
-            try:
-                self.client = genai.Client(api_key=api_key)
-            except Exception as e:
-                print(f"⚠️ AnalysisService AI Init Failed: {e}")
-
-    def get_sentence_grade(self, sentence: str):
-        if not self.data.is_ready: return "분석 불가", [], "데이터 로드 실패"
-        if self.morph.use_mock or not self.morph.analyzer: return "분석 불가", [], "Kiwi 로드 실패"
-        
+        # 프로세스 공용 클라이언트 (google.genai 는 키가 있을 때만 import)
+        from services.container import container
+        self.client = container.genai_client
+
+    def _analysis_mode(self, sense_level=None):
+        # 같은 문장이라도 AI 사용 여부/모델, 판별 방식·범위, 유사 항목 제안 여부에 따라 결과가 달라집니다.
+        ai_mode = f"ai:{self.model_name}" if self.client else "rule"
+        if sense_level is None: sense_level = self.profiler.disambiguation_scope == 'sense'
+        local_mode = f"{self.profiler.disambiguation_mode}:{self.profiler.local_margin}"
+        return f"{ai_mode};disambig={local_mode};sense={int(bool(sense_level))};suggest={int(bool(self.profiler.suggest_unknown))}"
+
+    def cache_stats(self):
+        return _result_cache.stats()
+
+    def get_sentence_grade(self, sentence: str, sense_level=None, lexicon=None):
+        """:param lexicon: 사용할 LexiconState (없으면 현재 상태). 여러 조각을 같은 버전으로 분석할 때 넘깁니다."""
+        if not self.data.is_ready: return "분석 불가", TokenTable(), "데이터 로드 실패"
+        if self.morph.use_mock or not self.morph.analyzer: return "분석 불가", TokenTable(), "Kiwi 로드 실패"
+        lexicon = lexicon or self.data.state
+
+        # 같은 문장·어휘 버전·AI 모드의 결과는 캐시에서 꺼냅니다. (반환값은 매번 새 객체)
+        _result_cache.set_version(self.data.lexicon_version)
+        cache_key = _result_cache.make_key(sentence, lexicon.version, self._analysis_mode(sense_level))
+        cached = _result_cache.get(cache_key)
+        if cached is not None: return cached
+
+        result, complete = self._analyze_sentence(sentence, sense_level, lexicon)
+        # AI 응답이 빠진 결과, 어휘 교체 전에 시작한 요청의 결과(이전 버전)는 캐시에 넣지 않습니다.
+        if isinstance(result[0], dict) and complete and lexicon is self.data.state:
+            _result_cache.put(cache_key, result)
+        return result
+
+    def _analyze_sentence(self, sentence, sense_level=None, lexicon=None):
+        """:return: ((grade_stats, analysis_data, debug_log), 캐시해도 되는 완전한 결과인지)"""
         try:
             res = self.morph.analyze(sentence)
             tokens = res[0][0]
-        except Exception as e: return "분석 에러", [], f"Kiwi 분석 오류: {str(e)}"
+        except Exception as e: return ("분석 에러", TokenTable(), f"Kiwi 분석 오류: {str(e)}"), False
 
         # Delegate to GradeProfiler
-        analysis_data, max_level, debug_log = self.profiler.profile(
+        analysis_data, max_level, debug_log, complete = self.profiler.profile(
             tokens, 
             sentence, 
             client=self.client,
-            model_name=self.model_name
+            model_name=self.model_name,
+            sense_level=sense_level,
+            lexicon=lexicon
         )
 
-        # [MODIFIED] 단순 등급 산정 대신 빈도수 집계
-        grade_stats = {f"{i}급": 0 for i in range(1, 7)}
-        grade_stats["등급 없음"] = 0
-        grade_stats["기타"] = 0
-        grade_stats["전체"] = 0 # [NEW] 합계 (문장부호 제외, 숫자 포함)
-        
-        for item in analysis_data:
-            lvl = item.get('level', '')
-            tag = item.get('tag_code', '')
-            
-            # [NEW] 문장 부호(S로 시작) 처리
-            if tag and tag.startswith('S'):
-                grade_stats["기타"] += 1
-                
-                # [NEW] 숫자(SN)는 합계에 포함, 나머지는 제외
-                if tag == 'SN':
-                    grade_stats["전체"] += 1
-                
+        grade_stats = self._compute_grade_stats(analysis_data)
+
+        # Use grade_stats as the first return value instead of single grade string
+        return (grade_stats, analysis_data, debug_log), complete
+
+    def _compute_grade_stats(self, analysis_data):
+        # [MODIFIED] 단순 등급 산정 대신 빈도수 집계 (등급 코드 열을 한 번에 센 뒤 표시용 키로 변환)
+        # [NEW] 문장 부호(S로 시작)는 '기타'로 집계, 숫자(SN)만 합계에 포함
+        is_symbol = np.fromiter((tag.startswith('S') for tag in analysis_data.tag_codes), dtype=bool, count=len(analysis_data))
+        levels = np.asarray(analysis_data.levels, dtype=np.int64)[~is_symbol]
+        counts = level_counts(levels)
+
+        grade_stats = {level_label(code): int(counts[code]) for code in LEVEL_CODES}
+        grade_stats["등급 없음"] = int(counts[LEVEL_NONE])
+        grade_stats["기타"] = int(is_symbol.sum())
+        grade_stats["전체"] = len(levels) + analysis_data.tag_codes.count('SN') # [NEW] 합계 (문장부호 제외, 숫자 포함)
+        return grade_stats
+
+    def iter_sentence_grades(self, text, chunk_size=None):
+        """
+        긴 문서를 Kiwi 문장 분리기로 나눈 뒤, chunk_size 글자 이내의 문장 묶음 단위로
+        형태소 분석과 등급 프로파일링을 차례로 수행하는 제너레이터입니다.
+        각 결과의 offset_start는 원문 기준으로 보정되어 있어 시각화에 그대로 쓸 수 있습니다.
+
+        :param text: 문자열 또는 텍스트 조각 iterable (예: 업로드 파일을 블록 단위로 디코딩한 조각)
+        :yield: dict(start, end, text, lead, grade_stats, analysis_data, debug_log)
+                lead 는 앞 묶음(없으면 원문 처음)과 이 묶음 사이의 원문입니다.
+        """
+        if not self.data.is_ready or self.morph.use_mock or not self.morph.analyzer: return
+        chunk_size = chunk_size or Config.ANALYSIS_CHUNK_CHARS
+        # 문서 전체를 시작 시점의 어휘 버전 하나로 분석합니다.
+        lexicon = self.data.state
+
+        for chunk_start, chunk_end, lead, chunk_text in self._iter_text_chunks(text, chunk_size):
+            grade_stats, analysis_data, debug_log = self.get_sentence_grade(chunk_text, lexicon=lexicon)
+            if not isinstance(grade_stats, dict):
+                # 분석 실패 (grade_stats 자리에 오류 문구가 옴)
+                yield {'start': chunk_start, 'end': chunk_end, 'text': chunk_text, 'lead': lead,
+                       'grade_stats': self._compute_grade_stats(TokenTable()),
+                       'analysis_data': TokenTable(), 'debug_log': f"{grade_stats}: {debug_log}"}
                 continue
-            
-            # S로 시작하지 않는 단어들은 모두 합계에 포함
-            grade_stats["전체"] += 1
-
-            if lvl and '급' in lvl:
-                # "1급", "1~2급" 등 처리 (심플하게 첫 숫자 기준)
-                found = re.search(r'([1-6])급', lvl)
-                if found:
-                    grade_stats[f"{found.group(1)}급"] += 1
-                else:
-                    grade_stats["등급 없음"] += 1
+            analysis_data.shift_offsets(chunk_start)
+            yield {'start': chunk_start, 'end': chunk_end, 'text': chunk_text, 'lead': lead, 'grade_stats': grade_stats,
+                   'analysis_data': analysis_data, 'debug_log': debug_log}
+
+    def _iter_text_chunks(self, text, chunk_size):
+        # -> (시작, 끝, 앞 묶음과의 사이 원문, 묶음 원문)
+        if isinstance(text, str):
+            prev_end = 0
+            for chunk_start, chunk_end in self._iter_chunk_spans(self.morph.split_sentences(text), chunk_size):
+                yield chunk_start, chunk_end, text[prev_end:chunk_start], text[chunk_start:chunk_end]
+                prev_end = chunk_end
+            return
+
+        # 텍스트 조각: 문장 분리는 줄 단위이므로 완성된 줄까지만 나누면 전체 문자열을 한 번에 나눈 결과와 같습니다.
+        # buffer 에는 아직 내보내지 않은 묶음부터 끝나지 않은 줄까지만 남깁니다. (buffer == 원문[base:])
+        buffer, base = "", 0
+
+        def iter_sentence_spans():
+            nonlocal buffer
+            scanned = 0   # 문장 분리를 마친 원문 위치 (줄 경계)
+            for piece in text:
+                buffer += piece
+                cut = base + buffer.rfind('\n', max(scanned - base, 0)) + 1
+                if cut <= scanned: continue
+                for start, end in self.morph.split_sentences(buffer[scanned - base:cut - base]):
+                    yield scanned + start, scanned + end
+                scanned = cut
+            for start, end in self.morph.split_sentences(buffer[scanned - base:]):
+                yield scanned + start, scanned + end
+
+        prev_end = 0
+        for chunk_start, chunk_end in self._iter_chunk_spans(iter_sentence_spans(), chunk_size):
+            yield chunk_start, chunk_end, buffer[prev_end - base:chunk_start - base], buffer[chunk_start - base:chunk_end - base]
+            buffer, base = buffer[chunk_end - base:], chunk_end
+            prev_end = chunk_end
+
+    def _iter_chunk_spans(self, sentence_spans, chunk_size):
+        # 문장 경계를 유지하면서 chunk_size 글자를 넘지 않도록 문장들을 묶습니다. (한 문장이 더 길면 단독 묶음)
+        chunk_start = chunk_end = None
+        for sent_start, sent_end in sentence_spans:
+            if chunk_start is None:
+                chunk_start, chunk_end = sent_start, sent_end
+            elif sent_end - chunk_start > chunk_size:
+                yield chunk_start, chunk_end
+                chunk_start, chunk_end = sent_start, sent_end
             else:
-                 grade_stats["등급 없음"] += 1
+                chunk_end = sent_end
+        if chunk_start is not None:
+            yield chunk_start, chunk_end
 
-        # Use grade_stats as the first return value instead of single grade string
-        return grade_stats, analysis_data, debug_log
+    def unavailable_reason(self):
+        """문서 분석을 할 수 없으면 그 사유, 할 수 있으면 None"""
+        if not self.data.is_ready: return "데이터 로드 실패"
+        if self.morph.use_mock or not self.morph.analyzer: return "Kiwi 로드 실패"
+        return None
+
+    def get_document_grade(self, text, chunk_size=None, on_chunk=None):
+        """
+        iter_sentence_grades 결과를 합쳐 get_sentence_grade와 같은 형태로 반환합니다.
+        (업로드 파일 등 긴 문서용, text 는 문자열 또는 텍스트 조각 iterable)
+        on_chunk: 묶음 결과마다 합치기 전에 호출 (예: 원문을 들고 있지 않고 시각화 run 을 이어 붙일 때)
+        """
+        unavailable = self.unavailable_reason()
+        if unavailable: return "분석 불가", TokenTable(), unavailable
+
+        grade_stats = self._compute_grade_stats(TokenTable())
+        analysis_data = TokenTable()
+        debug_logs = []
+        for chunk in self.iter_sentence_grades(text, chunk_size):
+            if on_chunk: on_chunk(chunk)
+            for k, v in chunk['grade_stats'].items():
+                grade_stats[k] = grade_stats.get(k, 0) + v
+            analysis_data.extend(chunk['analysis_data'])
+            debug_logs.append(chunk['debug_log'])
+        return grade_stats, analysis_data, "\n".join(debug_logs)
 
     def analyze_morphs(self, sentence):
         if not self.morph.analyzer: return []
@@ -0,0 +1,173 @@
+import threading
+import time
+from config import Config
+from services.metrics import metrics
+
+
+class ServiceContainer:
+    """
+    프로세스 안의 서비스 객체를 처음 필요할 때 한 번씩만 만들어 나눠 씁니다.
+
+    Kiwi·어휘 로드처럼 무거운 초기화는 start_warm_up()이 백그라운드 스레드에서 미리 수행하며,
+    준비가 끝나기 전에 들어온 요청은 해당 서비스가 만들어질 때까지 기다립니다.
+    google.genai, kiwipiepy, pandas 는 이 경로에서 처음 import 되므로 앱 import 자체는 가볍습니다.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ServiceContainer, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized: return
+        self.created_at = time.time()
+        self._services = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._warm_up_thread = None
+        self.warm_up_error = ""
+        self.ready_at = None
+        self.first_request_at = None
+        self._initialized = True
+
+    def _get(self, name, factory):
+        """name 서비스가 없으면 factory()로 한 번만 만듭니다. (서비스별 잠금, 의존 서비스는 재귀적으로 생성)"""
+        if name in self._services: return self._services[name]
+        with self._locks_guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._services:
+                self._services[name] = factory()
+        return self._services[name]
+
+    @property
+    def genai_client(self):
+        """프로세스 공용 Gemini 클라이언트 (API 키가 없거나 초기화 실패 시 None)"""
+        def create():
+            if not Config.GOOGLE_API_KEY: return None
+            try:
+                from google import genai
+                return genai.Client(api_key=Config.GOOGLE_API_KEY)
+            except Exception as e:
+                print(f"⚠️ AI Client Init Failed: {e}")
+                return None
+        return self._get('genai_client', create)
+
+    @property
+    def morph(self):
+        from services.morph_service import MorphService
+        return self._get('morph', MorphService)
+
+    @property
+    def grade_database(self):
+        def create():
+            from services.grade_database import GradeDatabase
+            grade_database = GradeDatabase()
+            if not grade_database.is_ready:
+                grade_database.initialize(self.morph)
+            # CSV가 바뀌면 재시작 없이 어휘를 다시 불러옵니다. (LEXICON_WATCH_INTERVAL > 0 일 때)
+            grade_database.start_watcher(Config.LEXICON_WATCH_INTERVAL)
+            return grade_database
+        return self._get('grade_database', create)
+
+    @property
+    def analysis(self):
+        def create():
+            from services.analysis_service import AnalysisService
+            self.grade_database  # 어휘를 먼저 올려 둡니다.
+            return AnalysisService()
+        return self._get('analysis', create)
+
+    @property
+    def generation(self):
+        from services.generation_service import GenerationService
+        return self._get('generation', GenerationService)
+
+    @property
+    def quiz(self):
+        from services.quiz_service import QuizService
+        return self._get('quiz', QuizService)
+
+    @property
+    def visualization(self):
+        from services.visualization_service import VisualizationService
+        return self._get('visualization', VisualizationService)
+
+    @property
+    def file_processing(self):
+        from services.file_processing_service import FileProcessingService
+        return self._get('file_processing', FileProcessingService)
+
+    @property
+    def parallel_grading(self):
+        from services.parallel_grading_service import ParallelGradingService
+        return self._get('parallel_grading', ParallelGradingService)
+
+    @property
+    def grade_stream(self):
+        def create():
+            from services.grade_stream_service import GradeStreamService
+            return GradeStreamService(self.analysis, self.visualization, self.parallel_grading, self.file_processing)
+        return self._get('grade_stream', create)
+
+    @property
+    def results(self):
+        from services.result_store import ResultStore
+        return self._get('results', ResultStore)
+
+    @property
+    def jobs(self):
+        def create():
+            from services.job_queue import JobQueue
+            job_queue = JobQueue()
+            metrics.register_gauge('jobs', job_queue.stats)
+            return job_queue
+        return self._get('jobs', create)
+
+    def start_warm_up(self):
+        """Kiwi 모델·어휘 로드와 첫 분석을 백그라운드에서 미리 수행합니다. (여러 번 불러도 한 번만 실행)"""
+        with self._locks_guard:
+            if self._warm_up_thread is not None: return
+            self._warm_up_thread = threading.Thread(target=self._warm_up, name="service-warm-up", daemon=True)
+        self._warm_up_thread.start()
+
+    def _warm_up(self):
+        started = time.time()
+        try:
+            analysis = self.analysis
+            # Kiwi는 첫 analyze 호출 때 모델을 올리므로, 첫 요청이 그 비용을 치르지 않도록 한 번 분석해 둡니다.
+            if analysis.morph.analyzer: analysis.morph.analyze("준비")
+            self.genai_client  # google.genai import 와 클라이언트 생성도 미리
+            self.ready_at = time.time()
+            print(f"✅ 서비스 준비 완료 ({self.ready_at - started:.2f}s)")
+        except Exception as e:
+            self.warm_up_error = str(e)
+            print(f"⚠️ 서비스 준비 실패: {e}")
+
+    def is_ready(self):
+        if self.ready_at is None: return False
+        grade_database = self._services.get('grade_database')
+        return bool(grade_database and grade_database.is_ready)
+
+    def mark_request(self):
+        """첫 요청 도착 시각을 기록합니다. (프로세스 시작 -> 첫 요청 시간 측정용)"""
+        if self.first_request_at is None: self.first_request_at = time.time()
+
+    def status(self):
+        morph = self._services.get('morph')
+        grade_database = self._services.get('grade_database')
+        return {
+            'ready': self.is_ready(),
+            'warm_up_seconds': round(self.ready_at - self.created_at, 3) if self.ready_at else None,
+            'time_to_first_request': round(self.first_request_at - self.created_at, 3) if self.first_request_at else None,
+            'kiwi_loaded': bool(morph and morph.analyzer),
+            'lexicon_ready': bool(grade_database and grade_database.is_ready),
+            'lexicon_version': grade_database.lexicon_version if grade_database else "",
+            'error': self.warm_up_error or (grade_database.error_msg if grade_database else ""),
+        }
+
+
+container = ServiceContainer()
+metrics.register_gauge('startup', container.status)
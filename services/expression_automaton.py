@@ -0,0 +1,65 @@
+from collections import deque
+
+
+class ExpressionAutomaton:
+    """
+    표현 지도(expression_map)를 형태소 시퀀스에 대한 Aho-Corasick 오토마톤으로 컴파일합니다.
+
+    알파벳은 clean_key로 정규화된 형태소 문자열이며, 패턴은 (시작 키, *sequence) 입니다.
+    문서 전체를 한 번 선형으로 훑어 각 시작 위치에서 일치하는 가장 긴 표현을 구합니다.
+    같은 형태소열에 여러 표현이 등록된 경우 expression_map의 후보 순서상 먼저 오는 항목이 이깁니다.
+    """
+
+    def __init__(self, expression_map):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]     # 노드에서 끝나는 패턴: (길이, 후보 dict)
+        self.dict_link = [0]     # 실패 링크를 따라 처음 만나는 출력 노드 (없으면 0)
+
+        for start_key, candidates in expression_map.items():
+            for cand in candidates:
+                node = 0
+                for symbol in [start_key] + list(cand['sequence']):
+                    nxt = self.goto[node].get(symbol)
+                    if nxt is None:
+                        nxt = len(self.goto)
+                        self.goto[node][symbol] = nxt
+                        self.goto.append({}); self.fail.append(0); self.output.append(None); self.dict_link.append(0)
+                    node = nxt
+                if self.output[node] is None:
+                    self.output[node] = (1 + len(cand['sequence']), cand)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and symbol not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(symbol, 0)
+                self.fail[child] = target if target != child else 0
+                fc = self.fail[child]
+                self.dict_link[child] = fc if self.output[fc] is not None else self.dict_link[fc]
+
+    def longest_matches(self, forms):
+        """
+        :param forms: clean_key 처리된 형태소 문자열 리스트
+        :return: 위치별 (길이, 후보 dict) 또는 None
+        """
+        best = [None] * len(forms)
+        node = 0
+        for end, symbol in enumerate(forms):
+            while node and symbol not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(symbol, 0)
+
+            out = node if self.output[node] is not None else self.dict_link[node]
+            while out:
+                length, cand = self.output[out]
+                start = end - length + 1
+                current = best[start]
+                if current is None or length > current[0]:
+                    best[start] = (length, cand)
+                out = self.dict_link[out]
+        return best
@@ -1,35 +1,193 @@
-import pandas as pd # Removed if unused, but check if needed. logic.py used it. Here it was used for excel.
-# Actually, I should remove `import pandas` if I don't use it.
-# Wait, I am replacing the method. I should also check imports.
+import codecs
+import os
+import zipfile
+from config import Config
+
+TEXT_EXTENSIONS = ('.txt',)
+ARCHIVE_EXTENSIONS = ('.zip',)
+
+
+class _LimitedReader:
+    """읽은 바이트 수를 세다가 limit을 넘으면 오류를 내는 스트림 래퍼 (압축 폭탄·대용량 파일 방지)"""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.bytes_read = 0
+
+    def read(self, size):
+        block = self.stream.read(size)
+        self.bytes_read += len(block)
+        if self.bytes_read > self.limit:
+            raise Exception(f"파일이 너무 큽니다. (최대 {self.limit:,} bytes)")
+        return block
+
+
+class UploadDocument:
+    """
+    iter_uploads 가 돌려주는 문서 하나: 이름 + 텍스트 조각 스트림 (한 번만 읽을 수 있음).
+    앞쪽 공백은 건너뛰고, 읽다가 난 오류(크기 초과 등)는 error 에 남긴 채 조각을 끝냅니다.
+    """
+
+    def __init__(self, name, pieces):
+        self.name = name
+        self.error = None
+        self._pieces = pieces
+
+    def __iter__(self):
+        started = False
+        try:
+            for piece in self._pieces:
+                if not started:
+                    piece = piece.lstrip()
+                    started = bool(piece)
+                if piece: yield piece
+        except Exception as e:
+            self.error = e
+
 
 class FileProcessingService:
+    """
+    업로드 파일(.txt, .txt 묶음 .zip)을 블록 단위로 읽어 텍스트로 바꿉니다.
+
+    인코딩은 첫 블록으로 판별하고(BOM -> UTF-8 -> CP949) 이후 블록은 증분 디코더로 이어서 풀므로,
+    원본 바이트 전체를 메모리에 올리거나 여러 번 디코딩하지 않습니다. (앞부분이 ASCII 뿐이던 파일은 뒤에서 다시 판별)
+    .zip 은 항목을 하나씩 풀면서 읽고, 각 .txt 항목을 별도 문서로 돌려줍니다.
+    """
     def __init__(self):
         pass
 
+    def read_uploads(self, files):
+        """
+        요청 하나의 업로드 파일들 -> ([(문서 이름, 텍스트), ...], [(파일 이름, 오류 문구), ...])
+        파일 하나(압축 항목 포함)는 UPLOAD_MAX_FILE_BYTES, 요청 전체는 풀어 읽은 양 기준 UPLOAD_MAX_TOTAL_BYTES 까지 읽습니다.
+        """
+        documents, errors = [], []
+        for document in self.iter_uploads(files, errors):
+            text = "".join(document).rstrip()
+            if document.error is None: documents.append((document.name, text))
+        return documents, errors
+
+    def iter_uploads(self, files, errors):
+        """
+        read_uploads 의 스트리밍 버전: 문서를 UploadDocument 로 하나씩 돌려주며, 텍스트는 읽히는 블록 그대로 흘려보냅니다.
+        각 문서는 다음 문서로 넘어가기 전에 다 읽어야 합니다. 실패한 파일은 errors 에 (파일 이름, 오류 문구)로 추가되고,
+        .zip 은 항목 하나가 실패하면 나머지 항목을 건너뜁니다.
+        """
+        remaining = Config.UPLOAD_MAX_TOTAL_BYTES
+        for file in files:
+            if not file or not file.filename: continue
+            try:
+                for name, reader in self.iter_document_streams(file, remaining):
+                    document = UploadDocument(name, self.iter_text(reader, name))
+                    yield document
+                    if document.error is not None: raise document.error
+                    remaining -= reader.bytes_read
+            except Exception as e:
+                errors.append((file.filename, f"파일 텍스트 추출 중 오류: {e}"))
+
     def extract_text_from_file(self, file) -> str:
         """
-        업로드된 파일(.txt)에서 텍스트를 추출하여 하나의 문자열로 반환합니다.
-        지원 형식: .txt
+        업로드된 파일 하나에서 텍스트를 추출하여 하나의 문자열로 반환합니다. (.zip 이면 항목들을 빈 줄로 이어 붙임)
+        """
+        documents, errors = self.read_uploads([file])
+        if errors: raise Exception(errors[0][1])
+        return "\n\n".join(text for _, text in documents)
+
+    def iter_document_streams(self, file, remaining=None):
+        """
+        업로드 파일 -> (문서 이름, _LimitedReader) 제너레이터.
+        각 reader는 다음 항목으로 넘어가기 전에 다 읽어야 합니다.
         """
+        remaining = Config.UPLOAD_MAX_TOTAL_BYTES if remaining is None else remaining
+        filename = file.filename.lower()
+        if filename.endswith(TEXT_EXTENSIONS):
+            yield file.filename, _LimitedReader(file.stream, min(Config.UPLOAD_MAX_FILE_BYTES, remaining))
+        elif filename.endswith(ARCHIVE_EXTENSIONS):
+            yield from self._iter_archive(file, remaining)
+        else:
+            raise Exception("지원되지 않는 파일 형식입니다. .txt 또는 .zip 파일만 가능합니다.")
+
+    def _iter_archive(self, file, remaining):
         try:
-            full_text = ""
-
-            # 텍스트 파일 (.txt) 
-            if file.filename.lower().endswith('.txt'):
-                content = file.read()
-                try:
-                    full_text = content.decode('utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        # 한국어 윈도우 기본 인코딩(CP949/EUC-KR) 시도
-                        full_text = content.decode('cp949')
-                    except UnicodeDecodeError:
-                        # 그래도 안되면 ignore (깨진 채로라도 반환) 혹은 latin1
-                        full_text = content.decode('utf-8', errors='ignore')
-            else:
-                raise Exception("지원되지 않는 파일 형식입니다. .txt 파일만 가능합니다.")
-            
-            return full_text.strip()
+            archive = zipfile.ZipFile(file.stream)
+        except zipfile.BadZipFile:
+            raise Exception("올바른 .zip 파일이 아닙니다.")
+        with archive:
+            members = [info for info in archive.infolist()
+                       if not info.is_dir() and info.filename.lower().endswith(TEXT_EXTENSIONS)
+                       and not os.path.basename(info.filename).startswith('.') and not info.filename.startswith('__MACOSX/')]
+            if not members:
+                raise Exception("압축 파일 안에 .txt 파일이 없습니다.")
+            if len(members) > Config.UPLOAD_MAX_ARCHIVE_MEMBERS:
+                raise Exception(f"압축 파일 안의 .txt 파일이 너무 많습니다. (최대 {Config.UPLOAD_MAX_ARCHIVE_MEMBERS}개)")
+            for info in members:
+                limit = min(Config.UPLOAD_MAX_FILE_BYTES, remaining)
+                # 헤더의 크기로 먼저 거르고, 실제로 풀리는 양은 _LimitedReader가 다시 확인합니다.
+                if info.file_size > limit:
+                    raise Exception(f"{self._member_name(info)}: 파일이 너무 큽니다. (최대 {limit:,} bytes)")
+                with archive.open(info) as member:
+                    reader = _LimitedReader(member, limit)
+                    yield f"{file.filename}/{self._member_name(info)}", reader
+                remaining -= reader.bytes_read
 
-        except Exception as e:
-            raise Exception(f"파일 텍스트 추출 중 오류: {str(e)}")
+    @staticmethod
+    def _member_name(info):
+        # UTF-8 플래그가 없는 항목 이름은 zipfile이 CP437로 풀므로, 한국어 윈도우에서 만든 압축 파일은 CP949로 다시 읽습니다.
+        if info.flag_bits & 0x800: return info.filename
+        try:
+            return info.filename.encode('cp437').decode('cp949')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            return info.filename
+
+    def detect_encoding(self, sample):
+        """
+        첫 블록으로 인코딩을 판별합니다. -> (인코딩, 오류 처리 방식)
+        BOM -> UTF-8 -> CP949(한국어 윈도우 기본) 순서이며, 둘 다 아니면 깨진 바이트를 버리고 UTF-8로 읽습니다.
+        """
+        for bom, encoding in ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')):
+            if sample.startswith(bom): return encoding, 'strict'
+        for encoding in ('utf-8', 'cp949'):
+            try:
+                # final=False: 블록 끝에서 잘린 멀티바이트 문자는 오류로 보지 않음
+                codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+                return encoding, 'strict'
+            except UnicodeDecodeError:
+                continue
+        return 'utf-8', 'ignore'
+
+    def iter_text(self, reader, name=""):
+        """reader를 UPLOAD_READ_BLOCK 바이트씩 읽어 디코딩한 텍스트 조각을 차례로 돌려줍니다."""
+        block = reader.read(Config.UPLOAD_READ_BLOCK)
+        encoding, errors = self.detect_encoding(block)
+        decoder = codecs.getincrementaldecoder(encoding)(errors)
+        ascii_only = True   # 지금까지 내보낸 텍스트가 모두 ASCII 인지 (인코딩을 다시 골라도 앞부분이 그대로인지)
+        final = False
+        while not final:
+            final = not block
+            try:
+                piece = decoder.decode(block, final=final)
+            except UnicodeDecodeError:
+                # 디코더에 남아 있던(앞 블록 끝에서 잘린) 바이트부터 이번 블록까지 다시 풉니다.
+                block = decoder.getstate()[0] + block
+                piece = None
+                if ascii_only:
+                    # 앞부분이 ASCII 뿐이라 첫 블록으로 잘못 골랐던 경우: 여기서부터 다시 판별합니다. (보통 CP949)
+                    sniffed, sniffed_errors = self.detect_encoding(block)
+                    if sniffed != encoding and sniffed_errors == 'strict':
+                        print(f"⚠️ {name}: {encoding} 디코딩 실패, 이후 내용을 {sniffed}(으)로 읽습니다.")
+                        encoding = sniffed
+                        decoder = codecs.getincrementaldecoder(encoding)('strict')
+                        try:
+                            piece = decoder.decode(block, final=final)
+                        except UnicodeDecodeError:
+                            pass
+                if piece is None:
+                    # 다시 골라도 맞지 않으면 나머지는 깨진 바이트를 버리고 읽습니다.
+                    print(f"⚠️ {name}: {encoding} 디코딩 실패, 깨진 바이트를 건너뜁니다.")
+                    decoder = codecs.getincrementaldecoder(encoding)('ignore')
+                    piece = decoder.decode(block, final=final)
+            if piece:
+                ascii_only = ascii_only and piece.isascii()
+                yield piece
+            if not final: block = reader.read(Config.UPLOAD_READ_BLOCK)
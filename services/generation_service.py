@@ -1,4 +1,3 @@
-from google import genai
 from config import Config
 
 class GenerationService:
@@ -7,12 +6,9 @@ class GenerationService:
         self._init_ai()
 
     def _init_ai(self):
-        api_key = Config.GOOGLE_API_KEY
-        if api_key:
-            try:
-                self.client = genai.Client(api_key=api_key)
-            except Exception as e:
-                print(f"⚠️ GenerationService AI Init Failed: {e}")
+        # 프로세스 공용 클라이언트 (google.genai 는 키가 있을 때만 import)
+        from services.container import container
+        self.client = container.genai_client
 
     def generate_ai_sentence(self, grades, keyword, hint=""):
         if not self.client: return "오류: AI 모델이 초기화되지 않았습니다."
@@ -73,7 +69,8 @@ class GenerationService:
         return "오류: 알 수 없는 이유로 생성이 실패했습니다."
 
     def generate_with_validation(self, grades, keyword, hint, analysis_service):
-        import re 
+        from services.levels import level_label
+        from services.token_table import TokenTable
         
         target_max_level = 6
         if "all" not in grades and grades:
@@ -86,7 +83,7 @@ class GenerationService:
         forbidden_words = [] 
         
         final_sentence = ""
-        final_analysis = []
+        final_analysis = TokenTable()
         final_grade = ""
         rejected_history = []
 
@@ -109,15 +106,11 @@ class GenerationService:
 
             if "all" not in grades:
                 for item in temp_analysis:
-                    if '급' in item['level']:
-                        try:
-                            level_num = int(re.sub(r'[^0-9]', '', item['level']))
-                            if level_num > target_max_level:
-                                violation_found = True
-                                violation_words.append(f"{item['form']}({item['level']})")
-                                if item['form'] not in forbidden_words:
-                                    forbidden_words.append(item['form'])
-                        except: pass
+                    if item['level'] > target_max_level:
+                        violation_found = True
+                        violation_words.append(f"{item['form']}({level_label(item['level'])})")
+                        if item['form'] not in forbidden_words:
+                            forbidden_words.append(item['form'])
             
             if not violation_found:
                 final_sentence = temp_sentence
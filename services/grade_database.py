@@ -1,7 +1,44 @@
-import pandas as pd
+import functools
+import gzip
+import hashlib
+import json
 import re
 import unicodedata
 import os
+import sys
+import threading
+import time
+from array import array
+from config import Config
+from services.lexicon_snapshot import LexiconSnapshot
+from services.expression_automaton import ExpressionAutomaton
+from services.local_disambiguator import LocalDisambiguator
+from services.levels import parse_level
+from services.lexicon_entry import LexiconEntry, intern_text
+from services.mapped_lexicon import MappedLexicon, write_mapped_lexicon
+from services.lexicon_state import LexiconState
+from services.search_index import NgramSearchIndex, JamoPrefixIndex, FuzzyIndex, normalize_search_text
+
+@functools.lru_cache(maxsize=65536)
+def _clean_key(key):
+    # 같은 형태소가 반복해서 들어오므로 정규화 결과를 메모합니다. (입력 문자열 -> 결과만 의존)
+    key = key.replace('ᆯ', 'ㄹ').replace('ᆫ', 'ㄴ').replace('ᆸ', 'ㅂ')
+    key = key.replace('ᆷ', 'ㅁ').replace('ᆼ', 'ㅇ').replace('ᆨ', 'ㄱ')
+    key = key.replace('.', '').replace('-', '').replace('–', '').replace('~', '').replace('"', '').replace("'", '').strip()
+    key = re.sub(r'[0-9]+\([0-9]+\)', '', key)
+    key = re.sub(r'\([0-9]+\)', '', key)
+    key = re.sub(r'[0-9]+$', '', key)
+    return unicodedata.normalize('NFKC', key).strip()
+
+def _row_fingerprints(df):
+    """행 내용의 64비트 지문 배열 (DataFrame을 들고 있지 않고도 다시 불러올 때 바뀐 행 수를 셀 수 있도록)"""
+    return array('Q', (int.from_bytes(hashlib.blake2b(repr(row).encode('utf-8'), digest_size=8).digest(), 'little')
+                       for row in df.fillna('').astype(str).itertuples(index=False, name=None)))
+
+def _count_changed_rows(old_fingerprints, new_fingerprints):
+    """새 CSV에서 이전 버전에 없던(추가·수정된) 행 수"""
+    old_rows = set(old_fingerprints)
+    return sum(1 for row in new_fingerprints if row not in old_rows)
 
 class GradeDatabase:
     _instance = None
@@ -17,12 +54,14 @@ class GradeDatabase:
         
         self.is_ready = False
         self.error_msg = ""
-        self.word_df = None
-        self.grammar_df = None
-        self.word_map = {}
-        self.grammar_map = {}
-        self.expression_map = {}
-        self.ida_entry = None
+        # 현재 어휘 버전의 컴파일 결과 (다시 불러오면 새 LexiconState 로 통째로 교체)
+        self.state = LexiconState()
+        self.word_path = ""
+        self.grammar_path = ""
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        # 다시 불러오기 진행 상황 (/api/lexicon 응답용)
+        self.reload_status = {'state': 'idle', 'error': '', 'started_at': None, 'finished_at': None, 'changed_rows': None}
         self.morph_service = None  # Dependency injection later or manual init? 
                                    # Ideally passed or accessed. 
                                    # For singleton, we can import or set it.
@@ -53,6 +92,21 @@ class GradeDatabase:
         
         self._initialized = True
 
+    # 기존 호출부 호환용: 현재 상태 객체의 값을 그대로 보여 줍니다.
+    lexicon_version = property(lambda self: self.state.version)
+    lexicon_source = property(lambda self: self.state.source)
+    word_df = property(lambda self: self.state.word_df)
+    grammar_df = property(lambda self: self.state.grammar_df)
+    lexicon_entries = property(lambda self: self.state.lexicon_entries)
+    word_map = property(lambda self: self.state.word_map)
+    grammar_map = property(lambda self: self.state.grammar_map)
+    mapped_lexicon = property(lambda self: self.state.mapped_lexicon)
+    expression_map = property(lambda self: self.state.expression_map)
+    expression_automaton = property(lambda self: self.state.expression_automaton)
+    local_disambiguator = property(lambda self: self.state.local_disambiguator)
+    ambiguity_classes = property(lambda self: self.state.ambiguity_classes)
+    ida_entry = property(lambda self: self.state.ida_entry)
+
     def initialize(self, morph_service):
         """
         Explicit initialization method to inject MorphService
@@ -65,51 +119,215 @@ class GradeDatabase:
         try:
             # 1. 파일 경로 및 로드 (상위 디렉토리 기준)
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            word_path = os.path.join(base_dir, 'word.csv')
-            grammar_path = os.path.join(base_dir, 'grammar.csv')
+            self.word_path = os.path.join(base_dir, 'word.csv')
+            self.grammar_path = os.path.join(base_dir, 'grammar.csv')
 
-            if not os.path.exists(word_path): raise FileNotFoundError(f"파일 없음: {word_path}")
-            
-            self.word_df = pd.read_csv(word_path, encoding='utf-8')
-            self.grammar_df = pd.read_csv(grammar_path, encoding='utf-8')
-            self.grammar_df['search_related'] = self.grammar_df['관련형'].fillna('').apply(self._parse_related_forms)
+            if not os.path.exists(self.word_path): raise FileNotFoundError(f"파일 없음: {self.word_path}")
 
-            # '이다' 데이터
-            try:
-                ida_row = self.grammar_df[self.grammar_df['전체 번호'] == 17].iloc[0]
-                self.ida_entry = {
-                    'level': ida_row['등급'], 
-                    'uid': ida_row['전체 번호'], 
-                    'desc': ida_row.get('길잡이말', ''), 
-                    'meaning': ida_row.get('의미', '')
-                }
-            except:
-                self.ida_entry = {'level': '1급', 'uid': 17, 'desc': '서술격 조사', 'meaning': ''}
-
-            self._build_lookup_tables()
+            self.state = self._load_state()
             self.is_ready = True
         except Exception as e:
             self.error_msg = str(e); print(f"DataService 초기화 오류: {self.error_msg}")
 
+    def _load_state(self, previous=None):
+        """
+        현재 CSV 파일로 새 LexiconState 를 만듭니다. (self.state 는 건드리지 않음)
+        :param previous: 다시 불러오기 시 이전 상태 - 바뀌지 않은 행의 표현 패턴·길잡이말 토큰화를 재사용합니다.
+        """
+        # 2. 유효한 스냅샷이 있으면 CSV 파싱과 Kiwi 토큰화를 건너뜁니다.
+        snapshot = LexiconSnapshot(Config.LEXICON_SNAPSHOT_PATH, [self.word_path, self.grammar_path])
+        state = LexiconState(snapshot.compute_key())
+        # 수정 시각만 바뀌고 내용은 같으면 다시 만들지 않습니다.
+        if previous is not None and state.version == previous.version: return previous
+        payload = snapshot.load(state.version)
+        # 항목·지도를 mmap 파일에 둔 스냅샷은 같은 버전의 mmap 파일이 열릴 때만 유효합니다.
+        if payload and payload.get('lexicon_store') == 'mmap' and not self._open_mapped_lexicon(state):
+            payload = None
+        if payload:
+            self._apply_snapshot_payload(state, payload)
+            state.source = "snapshot"
+        else:
+            self._build_from_csv(state, previous)
+            analyzer = self.morph_service.get_analyzer() if self.morph_service else None
+            candidate_lists = ((key[0], state.entries_for(codes, main_only=False))
+                               for lexicon_map in (state.word_map, state.grammar_map) for key, codes in lexicon_map.items())
+            known_features = previous.gloss_features() if previous else None
+            state.local_disambiguator = LocalDisambiguator.build(candidate_lists, analyzer, self.clean_key, known_features)
+            self._build_search_indexes(state)
+            state.source = "reload" if previous else "csv"
+            # Kiwi 없이 만든 표현 지도는 불완전하므로 저장하지 않습니다.
+            if analyzer:
+                self._open_mapped_lexicon(state, write=True)
+                snapshot.save(state.version, self._snapshot_payload(state))
+
+        # mmap 파일을 쓰지 않는 스냅샷은 DataFrame에서 검색 색인을 다시 만듭니다.
+        if state.word_search_index is None: self._build_search_indexes(state)
+        state.expression_automaton = ExpressionAutomaton(state.expression_map)
+        self._build_ambiguity_classes(state)
+        # 검색 레코드·색인까지 만든 뒤에는 DataFrame이 필요 없으므로 워커마다 들고 있지 않습니다.
+        state.word_df = state.grammar_df = None
+        return state
+
+    def _build_from_csv(self, state, previous=None):
+        import pandas as pd  # 스냅샷으로 뜨는 경우에는 CSV 파서가 필요 없습니다.
+        state.word_df = pd.read_csv(self.word_path, encoding='utf-8')
+        state.grammar_df = pd.read_csv(self.grammar_path, encoding='utf-8')
+        state.grammar_df['search_related'] = state.grammar_df['관련형'].fillna('').apply(self._parse_related_forms)
+        state.row_fingerprints = {'word': _row_fingerprints(state.word_df), 'grammar': _row_fingerprints(state.grammar_df)}
+        if previous is not None and previous.row_fingerprints:
+            self.reload_status['changed_rows'] = {
+                name: _count_changed_rows(previous.row_fingerprints[name], state.row_fingerprints[name])
+                for name in ('word', 'grammar')
+            }
+
+        self._build_lookup_tables(state, previous.expression_patterns() if previous else None)
+
+        # '이다' 데이터 (문법 17번 행)
+        state.ida_entry = next((e for e in state.lexicon_entries if e.grammar_class is not None and e.uid == 17), None)
+        if state.ida_entry is None:
+            state.ida_entry = LexiconEntry(17, 1, '서술격 조사', '', grammar_class='조사')
+
+    def _open_mapped_lexicon(self, state, write=False):
+        """
+        LEXICON_MMAP_PATH 의 mmap 파일을 열어 항목·지도와 /api/search 레코드·색인을 그 뷰로 바꿉니다.
+        :param write: True면 현재(메모리) 항목·지도·검색 색인으로 파일을 먼저 새로 씁니다.
+        :return: 성공 여부 (실패하면 메모리의 항목·지도·색인을 그대로 씁니다)
+        """
+        path = Config.LEXICON_MMAP_PATH
+        if not path: return False
+        try:
+            # 이미 이 파일을 연 다른 워커/이전 상태는 교체 전 파일(inode)을 계속 보므로 영향이 없습니다.
+            if write:
+                search_tables = {
+                    'word': (state.word_search_records, state.word_search_index, state.word_prefix_index),
+                    'grammar': (state.grammar_search_records, state.grammar_search_index, state.grammar_prefix_index),
+                }
+                write_mapped_lexicon(path, state.version, state.lexicon_entries, state.word_map, state.grammar_map, search_tables)
+        except OSError as e:
+            print(f"⚠️ 어휘 mmap 파일 저장 실패: {e}")
+            return False
+        mapped = MappedLexicon.open(path, state.version)
+        if mapped is None: return False
+        state.mapped_lexicon = mapped
+        state.lexicon_entries = mapped.entries
+        state.word_map = mapped.word_map
+        state.grammar_map = mapped.grammar_map
+
+        def open_indexes(table):
+            return (table.records, table.orders,
+                    NgramSearchIndex.from_tables(table.documents, table.orders, table.postings, table.stem_postings, table.max_n),
+                    JamoPrefixIndex.from_tables(table.jamo_keys, table.jamo_doc_ids, table.orders))
+        (state.word_search_records, state.word_search_grades,
+         state.word_search_index, state.word_prefix_index) = open_indexes(mapped.search_tables['word'])
+        (state.grammar_search_records, state.grammar_search_grades,
+         state.grammar_search_index, state.grammar_prefix_index) = open_indexes(mapped.search_tables['grammar'])
+        return True
+
+    def _snapshot_payload(self, state):
+        payload = {
+            'lexicon_store': 'mmap' if state.mapped_lexicon else 'inline',
+            'expression_map': state.expression_map,
+            'ida_entry': state.ida_entry,
+            'local_disambiguator': state.local_disambiguator.vectors,
+            'row_fingerprints': state.row_fingerprints,
+        }
+        # mmap 파일에 검색 레코드·색인이 있으면 DataFrame은 저장하지 않습니다. (스냅샷으로 뜰 때 pandas를 올리지 않음)
+        if not state.mapped_lexicon:
+            payload.update(word_df=state.word_df, grammar_df=state.grammar_df, lexicon_entries=state.lexicon_entries,
+                           word_map=state.word_map, grammar_map=state.grammar_map)
+        return payload
+
+    def _apply_snapshot_payload(self, state, payload):
+        if payload['lexicon_store'] == 'inline':
+            state.word_df = payload['word_df']
+            state.grammar_df = payload['grammar_df']
+            state.lexicon_entries = payload['lexicon_entries']
+            state.word_map = payload['word_map']
+            state.grammar_map = payload['grammar_map']
+        state.expression_map = payload['expression_map']
+        state.ida_entry = payload['ida_entry']
+        state.local_disambiguator = LocalDisambiguator(payload['local_disambiguator'])
+        state.row_fingerprints = payload['row_fingerprints']
+
+    def reload(self, wait=False):
+        """
+        CSV 파일을 다시 읽어 새 어휘 상태를 백그라운드에서 만든 뒤 한 번에 교체합니다.
+        진행 중인 분석은 시작할 때 잡은 이전 상태로 끝까지 처리됩니다.
+        :param wait: True면 교체가 끝날 때까지 기다립니다.
+        :return: 새로 시작했으면 True, 이미 다시 불러오는 중이면 False
+        """
+        if not self._reload_lock.acquire(blocking=False): return False
+        self.reload_status.update(state='running', error='', started_at=time.time(), finished_at=None, changed_rows=None)
+        worker = threading.Thread(target=self._reload_worker, name="lexicon-reload", daemon=True)
+        worker.start()
+        if wait: worker.join()
+        return True
+
+    def _reload_worker(self):
+        try:
+            previous = self.state
+            state = self._load_state(previous)
+            if state.version != previous.version:
+                self.state = state
+                self.is_ready = True
+                print(f"🔄 어휘 교체 완료: {previous.version[:12]} -> {state.version[:12]} ({state.source})")
+            self.reload_status.update(state='idle')
+        except Exception as e:
+            self.reload_status.update(state='failed', error=str(e))
+            print(f"⚠️ 어휘 다시 불러오기 실패 (이전 버전 유지): {e}")
+        finally:
+            self.reload_status['finished_at'] = time.time()
+            self._reload_lock.release()
+
+    def start_watcher(self, interval):
+        """interval 초마다 CSV 파일의 수정 시각·크기를 확인해 바뀌면 reload() 합니다. (0 이하면 사용 안 함)"""
+        if interval <= 0 or self._watcher is not None or not self.word_path: return
+        def signature():
+            try: return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in (self.word_path, self.grammar_path))
+            except OSError: return None
+        def watch():
+            last = signature()
+            while True:
+                time.sleep(interval)
+                current = signature()
+                if current is not None and current != last:
+                    # 편집기가 파일을 쓰는 중일 수 있으므로 한 주기 동안 그대로인지 확인한 뒤 불러옵니다.
+                    time.sleep(interval)
+                    if signature() == current and self.reload():
+                        last = current
+        self._watcher = threading.Thread(target=watch, name="lexicon-watcher", daemon=True)
+        self._watcher.start()
+
     def clean_key(self, key_str):
-        key = str(key_str)
-        key = key.replace('ᆯ', 'ㄹ').replace('ᆫ', 'ㄴ').replace('ᆸ', 'ㅂ')
-        key = key.replace('ᆷ', 'ㅁ').replace('ᆼ', 'ㅇ').replace('ᆨ', 'ㄱ')
-        key = key.replace('.', '').replace('-', '').replace('–', '').replace('~', '').replace('"', '').replace("'", '').strip()
-        key = re.sub(r'[0-9]+\([0-9]+\)', '', key)
-        key = re.sub(r'\([0-9]+\)', '', key)
-        key = re.sub(r'[0-9]+$', '', key)
-        return unicodedata.normalize('NFKC', key).strip()
+        return _clean_key(str(key_str))
 
     def _parse_related_forms(self, raw_str):
         if not raw_str: return []
         clean_str = re.sub(r'<[^>]+>', ' ', str(raw_str))
         return [item.strip() for item in re.split(r'[,./]', clean_str) if item.strip()]
 
-    def _build_lookup_tables(self):
+    def entries_for(self, codes, main_only=True):
+        """현재 상태 기준 LexiconState.entries_for"""
+        return self.state.entries_for(codes, main_only)
+
+    def _build_lookup_tables(self, state, known_patterns=None):
+        """
+        :param known_patterns: 원문 패턴 -> 토큰화 결과 (이전 버전에서 재사용, 바뀐 패턴만 Kiwi로 분석)
+        """
+        known_patterns = known_patterns or {}
+        # 행마다 LexiconEntry 하나, 지도에는 행 번호만 저장
+        state.lexicon_entries = []
+
+        def add_to_map(lexicon_map, key, row_id, is_main=True):
+            codes = lexicon_map.get(key)
+            if codes is None:
+                codes = lexicon_map[(sys.intern(key[0]), key[1])] = []
+            if row_id in codes or ~row_id in codes: return
+            codes.append(row_id if is_main else ~row_id)
+
         # 1. 단어 지도
-        self.word_map = {}
-        for _, row in self.word_df.fillna('').iterrows():
+        state.word_map = {}
+        for row in state.word_df.fillna('').to_dict('records'):
             pos_str = str(row['품사'])
             target_pos_keys = []
             if '의존명사' in pos_str: target_pos_keys.append('NB')
@@ -121,23 +339,21 @@ class GradeDatabase:
             if '감탄사' in pos_str: target_pos_keys.append('I')
             if not target_pos_keys: target_pos_keys.append(self.pos_map.get(pos_str, 'ETC'))
 
+            row_id = len(state.lexicon_entries)
+            state.lexicon_entries.append(LexiconEntry(
+                int(row['전체 번호']), parse_level(row['등급']), intern_text(row['길잡이말']), '',
+                raw_pos=intern_text(row['품사'])
+            ))
             raw_words = re.split(r'[?/]', str(row['어휘']))
             for word in raw_words:
                 cleaned = self.clean_key(word)
                 if cleaned:
-                    data = {'level': row['등급'], 'uid': row['전체 번호'], 'desc': row['길잡이말'], 'raw_pos': row['품사'], 'is_main': True}
                     for p_key in target_pos_keys:
-                        if (cleaned, p_key) not in self.word_map: self.word_map[(cleaned, p_key)] = []
-                        is_duplicate = False
-                        for existing in self.word_map[(cleaned, p_key)]:
-                            if existing['uid'] == data['uid']:
-                                is_duplicate = True; break
-                        if not is_duplicate:
-                            self.word_map[(cleaned, p_key)].append(data)
+                        add_to_map(state.word_map, (cleaned, p_key), row_id)
 
         # 2. 문법/표현 지도
-        self.grammar_map = {}
-        self.expression_map = {} 
+        state.grammar_map = {}
+        state.expression_map = {} 
 
         def get_grammar_pos_keys(class_str):
             keys = []
@@ -151,28 +367,33 @@ class GradeDatabase:
             if any(x in class_str for x in ['동사', '형용사', '용언', '표현']): keys.append('V')
             return keys
 
-        def register_grammar(key, data_dict, is_main=True):
-            if key not in self.grammar_map: self.grammar_map[key] = []
-            entry = data_dict.copy()
-            entry['is_main'] = is_main 
-            if not any(d['uid'] == entry['uid'] for d in self.grammar_map[key]):
-                self.grammar_map[key].append(entry)
-
-        def register_expression(raw_pattern, data_dict):
-            clean_pat_str = raw_pattern.replace('-', '').replace('~', '').replace('(으)', '').strip()
-            if not clean_pat_str: return
-            pattern_chunks = clean_pat_str.split()
+        def add_expression(start_key, rest_seq, entry, raw_pattern):
+            if start_key not in state.expression_map: state.expression_map[sys.intern(start_key)] = []
+            for existing in state.expression_map[start_key]:
+                if existing['sequence'] == rest_seq and existing['data'] is entry: return
+            state.expression_map[start_key].append({'sequence': rest_seq, 'data': entry, 'full_text': raw_pattern})
+
+        # 표현 패턴은 행을 훑으며 모아 두었다가, 고유한 어절(chunk)만 한 번에 Kiwi로 분석한 뒤 원래 순서대로 등록합니다.
+        pending_expressions = []
+
+        def register_expression(raw_pattern, entry):
+            pending_expressions.append((raw_pattern, entry))
+
+        def pattern_chunks(raw_pattern):
+            return raw_pattern.replace('-', '').replace('~', '').replace('(으)', '').strip().split()
+
+        def compile_expression(raw_pattern, entry, chunk_tokens):
+            if raw_pattern in known_patterns:
+                for start_key, rest_seq in known_patterns[raw_pattern]: add_expression(start_key, rest_seq, entry, raw_pattern)
+                return
+            chunks = pattern_chunks(raw_pattern)
+            if not chunks: return
             valid_tokens = []
             try:
-                # Use injected MorphService to analyze chunks
-                analyzer = self.morph_service.get_analyzer()
-                if not analyzer: return # Cannot tokenize if no analyzer
-
-                for chunk in pattern_chunks:
-                    res = analyzer.analyze(chunk)
-                    tokens = res[0][0]
+                for chunk in chunks:
+                    tokens = chunk_tokens[chunk]
                     for idx, t in enumerate(tokens):
-                        if chunk == pattern_chunks[-1] and idx == len(tokens) - 1 and t.form == '다' and t.tag == 'EF':
+                        if chunk == chunks[-1] and idx == len(tokens) - 1 and t.form == '다' and t.tag == 'EF':
                             continue
                         
                         form_val = self.clean_key(t.form)
@@ -184,24 +405,21 @@ class GradeDatabase:
                         valid_tokens.append(form_val)
                 if len(valid_tokens) >= 2:
                     start_key = valid_tokens[0]
-                    rest_seq = valid_tokens[1:]
-                    if start_key not in self.expression_map: self.expression_map[start_key] = []
-                    exists = False
-                    for existing in self.expression_map[start_key]:
-                        if existing['sequence'] == rest_seq and existing['data']['uid'] == data_dict['uid']:
-                            exists = True; break
-                    if not exists:
-                        entry = data_dict.copy()
-                        entry['is_main'] = True
-                        self.expression_map[start_key].append({'sequence': rest_seq, 'data': entry, 'full_text': raw_pattern})
-            except Exception as e: 
+                    rest_seq = tuple(sys.intern(token) for token in valid_tokens[1:])
+                    add_expression(start_key, rest_seq, entry, raw_pattern)
+            except Exception: 
                 # print(f"Expression parsing error: {e}")
                 pass
 
-        for _, row in self.grammar_df.fillna('').iterrows():
-            data = {'level': row['등급'], 'uid': row['전체 번호'], 'desc': row.get('길잡이말', ''), 'meaning': row.get('의미', ''), 'class': str(row['분류'])}
+        for row in state.grammar_df.fillna('').to_dict('records'):
+            row_id = len(state.lexicon_entries)
+            data = LexiconEntry(
+                int(row['전체 번호']), parse_level(row['등급']), intern_text(row.get('길잡이말', '')), intern_text(row.get('의미', '')),
+                grammar_class=intern_text(row['분류'])
+            )
+            state.lexicon_entries.append(data)
             main_form = str(row['대표형']).strip()
-            if ' ' in main_form or '표현' in data['class']: register_expression(main_form, data)
+            if ' ' in main_form or '표현' in data.grammar_class: register_expression(main_form, data)
             
             class_str = str(row['분류'])
             pos_keys = get_grammar_pos_keys(class_str)
@@ -209,55 +427,206 @@ class GradeDatabase:
             else: cleaned_main = self.clean_key(main_form)
             
             if cleaned_main:
-                for pk in pos_keys: register_grammar((cleaned_main, pk), data, is_main=True)
+                for pk in pos_keys: add_to_map(state.grammar_map, (cleaned_main, pk), row_id, is_main=True)
             
             for rel_form in row['search_related']:
-                if ' ' in rel_form or '표현' in data['class']: register_expression(rel_form, data)
+                if ' ' in rel_form or '표현' in data.grammar_class: register_expression(rel_form, data)
                 cleaned_rel = self.clean_key(rel_form)
                 if cleaned_rel:
-                    for pk in pos_keys: register_grammar((cleaned_rel, pk), data, is_main=False)
+                    for pk in pos_keys: add_to_map(state.grammar_map, (cleaned_rel, pk), row_id, is_main=False)
+
+        # Use injected MorphService to analyze chunks (Kiwi 없이는 표현 지도를 만들 수 없음)
+        analyzer = self.morph_service.get_analyzer() if self.morph_service else None
+        if analyzer:
+            chunks = dict.fromkeys(chunk for raw_pattern, _ in pending_expressions if raw_pattern not in known_patterns
+                                   for chunk in pattern_chunks(raw_pattern))
+            chunk_tokens = self._tokenize_chunks(analyzer, list(chunks))
+            for raw_pattern, entry in pending_expressions:
+                compile_expression(raw_pattern, entry, chunk_tokens)
+
+        for k in state.expression_map:
+            state.expression_map[k].sort(key=lambda x: len(x['sequence']), reverse=True)
+        # 빌드가 끝난 행 번호 목록은 tuple로 고정합니다. (list보다 작음)
+        for lexicon_map in (state.word_map, state.grammar_map):
+            for key in lexicon_map: lexicon_map[key] = tuple(lexicon_map[key])
+
+    def _tokenize_chunks(self, analyzer, chunks):
+        """
+        표현 패턴 어절들을 Kiwi의 반복자(iterable) API로 한 번에 분석합니다.
+        Kiwi 생성 시 num_workers(KIWI_NUM_WORKERS) 만큼의 내부 스레드가 나눠 처리합니다.
+        :return: 어절 -> 1순위 토큰 리스트
+        """
+        if not chunks: return {}
+        try:
+            return {chunk: result[0][0] for chunk, result in zip(chunks, analyzer.analyze(chunks))}
+        except Exception as e:
+            # 단일 스레드 모드 등 반복자 API를 쓸 수 없으면 하나씩 분석합니다.
+            print(f"⚠️ Kiwi 일괄 분석 실패, 개별 분석으로 진행: {e}")
+            return {chunk: analyzer.analyze(chunk)[0][0] for chunk in chunks}
+
+    def _build_ambiguity_classes(self, state):
+        """
+        후보가 2개 이상인 (키, 품사)마다 후보 간 등급이 갈리는지 미리 기록합니다.
+        GradeProfiler와 같은 방식(대표형 우선)으로 후보를 고르며,
+        단어 조회는 단어+문법 사전을 합쳐서, 조사/어미 조회는 문법 사전만 봅니다.
+        """
+        def classify(codes):
+            candidates = state.entries_for(codes)
+            if len(candidates) < 2: return None
+            return 'level' if len({c.level for c in candidates}) > 1 else 'sense'
+
+        classes = {}
+        for key in set(state.word_map) | set(state.grammar_map):
+            cls = classify(state.word_map.get(key, ()) + state.grammar_map.get(key, ()))
+            if cls: classes[('word',) + key] = cls
+        for key, codes in state.grammar_map.items():
+            cls = classify(codes)
+            if cls: classes[('grammar',) + key] = cls
+        state.ambiguity_classes = classes
+
+    def ambiguity_class(self, scope, key, pos):
+        """:return: 'level', 'sense' 또는 None(모호하지 않음)"""
+        return self.state.ambiguity_class(scope, key, pos)
 
-        for k in self.expression_map:
-            self.expression_map[k].sort(key=lambda x: len(x['sequence']), reverse=True)
+    def _build_search_indexes(self, state):
+        """/api/search 용 n-gram 역색인과 결과 레코드를 미리 만들어 둡니다."""
+        def grade_order(level):
+            return parse_level(level) or 99
 
-    def search_keyword(self, query, search_type):
+        word_rows = state.word_df.fillna('')
+        word_docs = [[normalize_search_text(str(w))] for w in word_rows['어휘']]
+        word_grades = [grade_order(lvl) for lvl in word_rows['등급']]
+        state.word_search_records = [
+            {"text": row['어휘'], "grade": row['등급'], "desc": str(row['길잡이말']), "pos": row['품사'], "meaning": "", "uid": row['전체 번호']}
+            for row in word_rows.to_dict('records')
+        ]
+        state.word_search_index = NgramSearchIndex(word_docs, sort_keys=word_grades)
+        state.word_prefix_index = JamoPrefixIndex(word_docs, sort_keys=word_grades)
+
+        grammar_rows = state.grammar_df.fillna('')
+        state.grammar_search_records = [
+            {"text": row['대표형'], "grade": row['등급'], "desc": str(row.get('길잡이말', '')), "pos": row['분류'], "related": ", ".join(row['search_related']), "meaning": str(row.get('의미', '')), "uid": row['전체 번호']}
+            for row in grammar_rows.to_dict('records')
+        ]
+        grammar_docs = []
+        for main_form, related in zip(grammar_rows['대표형'], grammar_rows['search_related']):
+            texts = [normalize_search_text(str(main_form))] + [normalize_search_text(str(r)) for r in related]
+            grammar_docs.append([t for t in texts if t])
+        grammar_grades = [grade_order(lvl) for lvl in grammar_rows['등급']]
+        state.grammar_search_index = NgramSearchIndex(grammar_docs, sort_keys=grammar_grades)
+        state.grammar_prefix_index = JamoPrefixIndex(grammar_docs, sort_keys=grammar_grades)
+
+        state.word_search_grades = word_grades
+        state.grammar_search_grades = grammar_grades
+
+    def get_fuzzy_index(self, search_type, lexicon=None):
+        """clean_key 기준 표제어(단어: 어휘, 문법: 대표형+관련형)에 대한 오타 허용 색인을 반환합니다."""
+        state = lexicon or self.state
+        index = state.fuzzy_indexes.get(search_type)
+        if index is not None: return index
+        with state.fuzzy_lock:
+            index = state.fuzzy_indexes.get(search_type)
+            if index is None:
+                terms = {}
+                def add_term(raw, doc_id):
+                    cleaned = self.clean_key(raw)
+                    if cleaned:
+                        docs = terms.setdefault(cleaned, [])
+                        if doc_id not in docs: docs.append(doc_id)
+                # 검색 레코드의 표제어·관련형(", "로 이어 붙인 값)에서 만듭니다. (DataFrame은 로드 후 버림)
+                if search_type == "word":
+                    for doc_id, record in enumerate(state.word_search_records):
+                        for part in re.split(r'[?/]', record['text']): add_term(part, doc_id)
+                else:
+                    for doc_id, record in enumerate(state.grammar_search_records):
+                        add_term(record['text'], doc_id)
+                        for rel_form in record['related'].split(', ') if record['related'] else (): add_term(rel_form, doc_id)
+                index = FuzzyIndex(terms)
+                state.fuzzy_indexes[search_type] = index
+        return index
+
+    def fuzzy_search(self, query, search_type, max_distance=2, limit=10, lexicon=None):
+        """
+        자모 편집 거리 max_distance 이내의 표제어를 (거리, 등급) 순으로 반환합니다.
+        :param lexicon: 조회할 LexiconState (없으면 현재 상태)
+        """
         if not query or not self.is_ready: return []
+        state = lexicon or self.state
+        if search_type == "word":
+            records, grades = state.word_search_records, state.word_search_grades
+        else:
+            records, grades = state.grammar_search_records, state.grammar_search_grades
+        ranked = {}
+        for _, distance, doc_ids in self.get_fuzzy_index(search_type, state).lookup(self.clean_key(query), max_distance, limit=limit * 2):
+            for doc_id in doc_ids:
+                if doc_id not in ranked or distance < ranked[doc_id]: ranked[doc_id] = distance
+        ordered = sorted(ranked, key=lambda d: (ranked[d], grades[d], d))[:limit]
+        results = []
+        for doc_id in ordered:
+            result = dict(records[doc_id])
+            result['distance'] = ranked[doc_id]
+            results.append(result)
+        return results
+
+    def search_index_blob(self, lexicon=None):
+        """
+        브라우저에서 /api/search 와 같은 결과를 직접 계산할 수 있는 검색 색인 (static/lexicon_search.js 가 사용).
+        어휘 버전마다 한 번만 만들며, 열 단위 JSON과 미리 압축한 gzip 본문을 함께 돌려줍니다.
+        :return: (어휘 버전, JSON bytes, gzip bytes)
+        """
+        state = lexicon or self.state
+        if state.search_index_blob is not None: return state.search_index_blob
+        with state.fuzzy_lock:
+            if state.search_index_blob is None:
+                def columns(records, index, grades, fields):
+                    data = {field: [record[field] for record in records] for field in fields}
+                    data['order'] = list(grades)      # 등급 정렬 키 (등급 없음 = 99)
+                    # 정규화된 검색 대상 문자열 (대표형 + 관련형), 표제어 그대로이면 null
+                    data['docs'] = [None if doc == [text] else doc for doc, text in zip(index.documents, data['text'])]
+                    return data
+                payload = {
+                    'version': state.version,
+                    'word': columns(state.word_search_records, state.word_search_index, state.word_search_grades,
+                                    ('text', 'grade', 'desc', 'pos', 'uid')),
+                    'grammar': columns(state.grammar_search_records, state.grammar_search_index, state.grammar_search_grades,
+                                       ('text', 'grade', 'desc', 'pos', 'related', 'meaning', 'uid')),
+                }
+                body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+                state.search_index_blob = (state.version, body, gzip.compress(body, compresslevel=9, mtime=0))
+        return state.search_index_blob
+
+    def search_keyword(self, query, search_type, mode="contains"):
+        """
+        :param mode: "contains" (부분 일치, 결과가 없으면 자모 접두 검색으로 대체)
+                     | "prefix" (자모 단위 접두 검색, 조합 중인 음절 자동완성용)
+                     | "fuzzy" (자모 편집 거리 2 이내의 오타 허용 검색, 명시적으로 요청할 때만 - 결과에 distance 포함)
+        """
+        if not query or not self.is_ready: return []
+        state = self.state
         results = []
-        def normalize(text):
-            if not isinstance(text, str): return ""
-            return re.sub(r'[\s\-\~\(\)\[\]\.\?\/ㆍ]', '', text)
         try:
+            if mode == "fuzzy": return self.fuzzy_search(query, search_type, lexicon=state)
+            norm_query = normalize_search_text(query)
             if search_type == "word":
-                norm_query = normalize(query)
-                mask = self.word_df['어휘'].astype(str).apply(normalize).str.contains(norm_query, na=False)
-                df = self.word_df[mask].head(10)
-                for _, row in df.fillna('').iterrows():
-                    results.append({"text": row['어휘'], "grade": row['등급'], "desc": str(row['길잡이말']), "pos": row['품사'], "meaning": "", "uid": row['전체 번호']})
+                records, prefix_index = state.word_search_records, state.word_prefix_index
+                doc_ids = [] if mode == "prefix" else state.word_search_index.search([norm_query], limit=10)
             else:
-                norm_query = normalize(query)
-                search_candidates = {norm_query}
-                target_endings = ['다', '는', '은', 'ㄴ', '을', 'ㄹ', '요', '죠', '니', '면']
-                if len(norm_query) >= 2:
-                    for end in target_endings:
-                        if norm_query.endswith(end):
-                            stem = norm_query[:-len(end)]
-                            if len(stem) > 0: search_candidates.add(stem)
-                            break 
-                def check_match(row_text):
-                    if not row_text: return False
-                    norm_target = normalize(str(row_text)) 
-                    for candidate in search_candidates:
-                        if candidate in norm_target: return True
-                    norm_target_stem = norm_target
-                    if norm_target.endswith('다'): norm_target_stem = norm_target[:-1]
-                    for candidate in search_candidates:
-                        if len(norm_target_stem) >= 2 and norm_target_stem in candidate: return True
-                    return False
-                main_mask = self.grammar_df['대표형'].apply(check_match)
-                related_mask = self.grammar_df['search_related'].apply(lambda items: any(check_match(item) for item in items))
-                final_mask = main_mask | related_mask
-                df = self.grammar_df[final_mask].head(10)
-                for _, row in df.fillna('').iterrows():
-                    results.append({"text": row['대표형'], "grade": row['등급'], "desc": str(row.get('길잡이말', '')), "pos": row['분류'], "related": ", ".join(row['search_related']), "meaning": str(row.get('의미', '')), "uid": row['전체 번호']})
+                records, prefix_index = state.grammar_search_records, state.grammar_prefix_index
+                doc_ids = []
+                if mode != "prefix":
+                    search_candidates = [norm_query]
+                    target_endings = ['다', '는', '은', 'ㄴ', '을', 'ㄹ', '요', '죠', '니', '면']
+                    if len(norm_query) >= 2:
+                        for end in target_endings:
+                            if norm_query.endswith(end):
+                                stem = norm_query[:-len(end)]
+                                if len(stem) > 0: search_candidates.append(stem)
+                                break 
+                    doc_ids = state.grammar_search_index.search(search_candidates, limit=10, match_stem_within_query=True)
+
+            # 조합 중인 음절('가ㅂ', 'ㄱ')은 부분 일치로는 찾을 수 없으므로 자모 접두 검색을 사용합니다.
+            if not doc_ids:
+                doc_ids = prefix_index.search(norm_query, limit=10)
+            results = [dict(records[d]) for d in doc_ids]
         except Exception as e: print(f"검색 오류: {e}")
         return results
@@ -1,342 +1,398 @@
-import re
 import json
+from config import Config
 from services.grade_database import GradeDatabase
 from services.ai_disambiguation_service import AIDisambiguationService
+from services.local_disambiguator import content_features
+from services.cache_utils import LRUCache
+from services.levels import LEVEL_NONE, level_label
+from services.token_table import TokenTable, ID_KINDS
+from services.lexicon_entry import LexiconEntry
+from services.metrics import metrics
+
+POS_PRIORITIES = ['N', 'NB', 'V', 'M', 'MA', 'I']
+FUNC_TAGS = {
+    'XSN', 'XSV', 'XSA', 'XSA-I', 'XSV-I', 
+    'EP', 'EF', 'EC', 'ETN', 'ETM', 
+    'JKS', 'JKC', 'JKG', 'JKO', 'JKB', 'JKV', 'JKQ', 'JX', 'JC'
+}
+PREDICATE_TAGS = {
+    'VV', 'VA', 'VX', 'VCP', 'VCN', 'VV-I', 'VA-I', 'VX-I', 'VV-R', 'VA-R'
+}
+ENDING_TAGS = {'EP', 'EF', 'EC', 'ETN', 'ETM'}
+# 사전 조회 없이 고정 매핑하는 항목 ('하' 접미사, 종결어미 '다')
+HA_ENTRY = LexiconEntry('1769', 2, '건강하다')
+DA_ENTRY = LexiconEntry('120', 3, '')
+# 로컬 판별 시 앞뒤로 살펴볼 형태소 수
+LOCAL_CONTEXT_WINDOW = 6
+
+# 프로세스 내 GradeProfiler들이 공유하는 판정 캐시 (키에 어휘 버전 포함)
+_resolution_cache = LRUCache(Config.RESOLUTION_CACHE_SIZE)
+metrics.register_gauge('resolution_cache', _resolution_cache.stats)
 
 class GradeProfiler:
-    def __init__(self, data_service: GradeDatabase):
+    def __init__(self, data_service: GradeDatabase, suggest_unknown=None):
         self.data = data_service
         self.ai_service = AIDisambiguationService()
-        self.debug_lines = []
+        # '검색 실패' 토큰에 대해 오타 허용 색인으로 유사 항목 제안 (opt-in)
+        self.suggest_unknown = Config.SUGGEST_UNKNOWN_TOKENS if suggest_unknown is None else suggest_unknown
+        # 형태소 창 -> 병합/단일 판정 결과 캐시
+        self.resolution_cache = _resolution_cache
+        # 동음이의어 판별 방식 (hybrid / local / ai)
+        self.disambiguation_mode = Config.DISAMBIGUATION_MODE
+        self.local_margin = Config.LOCAL_DISAMBIGUATION_MARGIN
+        # AI 판별 범위: level(등급이 갈리는 항목만) / sense(모든 동음이의어)
+        self.disambiguation_scope = Config.DISAMBIGUATION_SCOPE
+
+    def cache_stats(self):
+        """판정 캐시 현황 (size, hits, misses, hit_rate)"""
+        return self.resolution_cache.stats()
+
+    def _disambiguate_locally(self, state, tokens, ambiguous_items, analysis_data, client, max_level, debug_lines):
+        """
+        모호한 항목을 주변 형태소와 후보 길잡이말의 겹침으로 판별합니다. (판별 기록은 debug_lines 에 추가)
+        :return: (AI에 넘길 항목 리스트, 갱신된 max_level)
+        """
+        escalated = []
+        for item in ambiguous_items:
+            ti, span = item['token_index'], item['span']
+            context = content_features(list(tokens[max(0, ti - LOCAL_CONTEXT_WINDOW):ti]) + list(tokens[ti + span:ti + span + LOCAL_CONTEXT_WINDOW]))
+            best, margin = state.local_disambiguator.rank(item['candidates'], context)
+            confident = best is not None and margin >= self.local_margin
+            if best is not None and margin > 0 and (confident or not client or self.disambiguation_mode == 'local'):
+                index = item['index']
+                id_kind = ID_KINDS[analysis_data.id_kinds[index]] or '단어'
+                desc = best.desc or best.meaning
+                analysis_data.set(index, level=best.level, id=f"{id_kind}#{best.uid}", desc=desc)
+                debug_lines.append(f"📚 로컬 판별 [{item['word']}]: {desc} (#{best.uid}, 점수 차 {margin:.2f})")
+                max_level = max(max_level, best.level)
+            if not confident: escalated.append(item)
+        return (escalated if self.disambiguation_mode == 'hybrid' else []), max_level
+
+    def _context_window(self, sentence, start, length, radius=80):
+        """토큰이 속한 문장(최대 앞뒤 radius 글자)을 잘라 AI 판별 캐시 키의 문맥으로 사용합니다."""
+        end = start + length
+        left = max(0, start - radius)
+        for i in range(start - 1, left - 1, -1):
+            if sentence[i] in '.!?\n':
+                left = i + 1; break
+        right = min(len(sentence), end + radius)
+        for i in range(end, right):
+            if sentence[i] in '.!?\n':
+                right = i + 1; break
+        return sentence[left:right].strip()
+
+    def _resolve(self, state, form_clean, tag, next_clean, next_tag):
+        """
+        (형태, 품사, 다음 형태, 다음 품사) 창에 대한 병합/단일 판정을 LRU 캐시에서 찾거나 계산합니다.
+        판정은 사전 조회만으로 결정되므로 문장 위치와 무관하며, 캐시 키에 어휘 버전을 넣어
+        어휘 교체 중에 이전 버전으로 처리 중인 요청과 섞이지 않도록 합니다.
+        :return: (merge, single) - 병합 성공 시 merge dict, 아니면 single dict
+        """
+        key = (state.version, form_clean, tag, next_clean, next_tag)
+        cached = self.resolution_cache.get(key)
+        if cached is not None: return cached
+
+        merge = self._resolve_merge(state, form_clean, tag, next_clean, next_tag) if next_tag is not None else None
+        result = (merge, None if merge else self._resolve_single(state, form_clean, tag))
+        self.resolution_cache.put(key, result)
+        return result
+
+    def _resolve_merge(self, state, form_clean, tag, next_clean, next_tag):
+        # 1. 조사(J)가 포함되면 병합하지 않음
+        if tag.startswith('J') or next_tag.startswith('J'):
+            return None
+        # 2. 유효한 검색 키(clean_key)가 없으면(예: 기호, 숫자 등) 병합하지 않음
+        if not form_clean or not next_clean:
+            return None
+
+        combined_form = form_clean + next_clean
+        
+        # 병합 시도: (합친단어, 'N') 또는 (합친단어, 'V') 등으로 데이터 조회
+        # 우선순위: 명사(N) -> 동사(V) -> 기타
+        # [전략] 합친 형태가 데이터베이스 'N'(명사) 혹은 'V'(동사) 등에 존재하는지 확인
+        # 예: 선생(NNG) + 님(XSN) -> 선생님(N) 존재 확인
+        for p_key in POS_PRIORITIES:
+            # 1. 원형 (그대로) 검색
+            lookup_keys = [combined_form]
+            
+            # 2. 동사/표현 등인 경우 '다' 붙여서 검색 (어지 -> 어지다)
+            if p_key in ['V', 'ETC']: 
+                 if not combined_form.endswith('다'):
+                     lookup_keys.append(combined_form + '다')
+
+            for key_var in lookup_keys:
+
+                # 병합 규칙 개선:
+                # 1. 기능소끼리의 결합은 명사로 오인식되지 않도록 차단
+                # 2. 용언(V)과 어미(E)의 결합이 명사로 오인식되는 경우 차단 (예: 하자, 얼음)
+                #    - 이는 용언 활용형이 동음이의어(명사)로 잘못 분석되는 것을 방지합니다.
+                is_noun_target = (p_key in ['N', 'NB', 'NP', 'NR'])
+                
+                if is_noun_target:
+                    # A. 기능소 + 기능소 -> 명사 금지
+                    if (tag in FUNC_TAGS and next_tag in FUNC_TAGS):
+                        continue
+                    
+                    # B. 용언(V) + 어미(E) -> 명사 금지
+                    # 용언 어간 뒤에 어미가 왔는데 명사가 되었다? -> 동음이의어(하자, 얼음 등)일 확률 높음
+                    is_pred_inflection = (tag in PREDICATE_TAGS and next_tag in ENDING_TAGS)
+                    if is_pred_inflection:
+                        continue
+
+                # 단어 사전과 문법 사전을 모두 조회하여 후보를 찾습니다.
+                # ('어지다'와 같은 항목은 문법 사전에 'V'로 등록되어 있을 수 있습니다.)
+                codes = state.word_map.get((key_var, p_key), ()) + state.grammar_map.get((key_var, p_key), ())
+                candidates = state.entries_for(codes)
+                
+                if candidates:
+                    # 병합 성공
+                    # 만약 '다'를 붙여서 찾았다면, combined_form 자체는 합친 텍스트 그대로 두고,
+                    # desc나 id는 찾은 '어지다'의 것을 사용함.
+                    merge = self._merge_result(candidates[0], p_key, combined_form,
+                                               key_var if len(candidates) > 1 else None,
+                                               candidates if len(candidates) > 1 else None)
+                    merge['ambiguity'] = state.ambiguity_class('word', key_var, p_key)
+                    return merge
+        
+        # '하다' 파생 용언의 경우 추가 처리 (어근 병합 로직 유지)
+        is_root_merge = (tag == 'XR' and next_tag in ['XSA', 'XSV', 'XSA-I', 'XSV-I'])
+        if is_root_merge:
+             combined_form_v = combined_form + '다'
+             candidates = state.entries_for(state.word_map.get((combined_form_v, 'V'), ()), main_only=False)
+             if candidates:
+                 # 시각화에는 '하다/되다'가 결합된 형태가 아닌, 실제 문장 내의 형태를 사용해야 자연스럽습니다.
+                 # 예를 들어 '건강+하다'가 합쳐져 '건강하다'로 인식되었더라도, 원문 표기는 그대로 유지합니다.
+                 return self._merge_result(candidates[0], 'V', combined_form_v, None, None)
+        return None
+
+    def _merge_result(self, candidate, pos_type, combined_form, ambiguous_word, ambiguous_candidates):
+        # 품사 명칭 동적 결정 (문법적 표현, 단어 품사 등)
+        pos_label = "복합어/파생어"
+        if candidate.grammar_class is not None:
+            # 문법 DB 유래
+            cls_val = candidate.grammar_class
+            if '표현' in cls_val: pos_label = "문법적 표현"
+            else: pos_label = cls_val
+        elif candidate.raw_pos is not None:
+            # 단어 DB 유래
+            pos_label = candidate.raw_pos
+        return {
+            'candidate': candidate, 'pos_type': pos_type, 'combined_form': combined_form, 'pos_label': pos_label,
+            'ambiguous_word': ambiguous_word, 'ambiguous_candidates': ambiguous_candidates
+        }
+
+    def _resolve_single(self, state, form_clean, tag):
+        source_type = ""; search_key = ""; candidates = (); ambiguity = None
+        pos_key = self.data.pos_map.get(tag, 'ETC')
+        # 검색 대상 기본값 초기화
+        target = form_clean 
 
+        if tag in ['XSV', 'XSA'] and form_clean == '하':
+            source_type = "단어"; candidates = [HA_ENTRY]
+        elif tag in ['EF'] and form_clean == '다':
+            source_type = "문법"; candidates = [DA_ENTRY]
+        elif tag.startswith('J') or tag.startswith('E'):
+            source_type = "문법"
+            if (form_clean, pos_key) in state.grammar_map:
+                candidates = state.entries_for(state.grammar_map[(form_clean, pos_key)])
+                search_key = f"({form_clean}, {pos_key})"
+                ambiguity = state.ambiguity_class('grammar', form_clean, pos_key)
+            else:
+                fallback_key = 'J' if tag.startswith('J') else 'E'
+                if (form_clean, fallback_key) in state.grammar_map:
+                    candidates = state.entries_for(state.grammar_map[(form_clean, fallback_key)])
+                    search_key = f"({form_clean}, {fallback_key})"
+                    ambiguity = state.ambiguity_class('grammar', form_clean, fallback_key)
+        else:
+            source_type = "단어"
+            target = form_clean + '다' if pos_key == 'V' and not form_clean.endswith('다') else form_clean
+            search_key = f"({target}, {pos_key})"
+            candidates = state.entries_for(state.word_map.get((target, pos_key), ()) + state.grammar_map.get((target, pos_key), ()))
+            ambiguity = state.ambiguity_class('word', target, pos_key)
 
+        if candidates:
+            # entries_for가 대표형 항목만 골라 새 리스트로 돌려주므로 그대로 정렬합니다.
+            candidates = sorted(candidates, key=lambda x: x.level)
+        return {'source_type': source_type, 'search_key': search_key, 'target': target, 'candidates': candidates, 'ambiguity': ambiguity}
 
-    def profile(self, tokens, sentence, client=None, model_name=None):
+    def profile(self, tokens, sentence, client=None, model_name=None, sense_level=None, lexicon=None):
         """
         형태소 분석 결과(tokens)를 바탕으로 등급을 프로파일링합니다.
         :param tokens: Kiwi 형태소 분석 결과 (Token 객체 리스트 or dict 리스트)
         :param sentence: 원문 문장 (AI 문맥 파악용)
         :param client: val (동음이의어 처리용)
         :param model_name: str
-        :return: analysis_data (list), max_level (int), debug_log (str)
+        :param sense_level: True면 등급이 같은 후보 사이의 의미 구분도 AI에 묻습니다. (None이면 설정값)
+        :param lexicon: 사용할 LexiconState (없으면 현재 상태). 결과의 lexicon_version 에 기록됩니다.
+        :return: analysis_data (TokenTable), max_level (int), debug_log (str), complete (bool)
+                 complete: AI 판별이 필요했지만 응답을 받지 못한 항목이 있으면 False (결과 캐시 저장 여부 판단용)
         """
-        self.debug_lines = []
+        # 프로파일러는 여러 스레드(요청·작업 큐)가 함께 쓰므로, 호출마다의 상태는 지역 변수로만 둡니다.
+        state = lexicon or self.data.state
+        debug_lines = []
+        complete = True
         max_level = 0
-        analysis_data = []
+        analysis_data = TokenTable(lexicon_version=state.version)
         ambiguous_items = []
         
-        self.debug_lines.append(f"입력: {sentence}")
+        debug_lines.append(f"입력: {sentence}")
         
+        # 형태소별 정규화 키는 한 번만 계산하고, 표현 패턴은 오토마톤으로 문서 전체를 한 번에 매칭합니다.
+        forms = [token.form if hasattr(token, 'form') else token['form'] for token in tokens]
+        forms_clean = [self.data.clean_key(f) for f in forms]
+        expression_matches = state.expression_automaton.longest_matches(forms_clean)
+
         i = 0
         while i < len(tokens):
             # Token 객체인지 dict인지 확인 (유연성)
             token = tokens[i]
-            form = token.form if hasattr(token, 'form') else token['form']
+            form = forms[i]
             tag = token.tag if hasattr(token, 'tag') else token['tag']
             
             # 위치 정보 (없을 수도 있음)
             t_start = getattr(token, 'start', 0)
             t_len = getattr(token, 'len', 0)
 
-            form_clean = self.data.clean_key(form)
+            form_clean = forms_clean[i]
             
-            # 0. 표현 패턴 매칭
-            expression_matched = False
-            if form_clean in self.data.expression_map:
-                candidates = self.data.expression_map[form_clean]
-                for cand in candidates:
-                    seq = cand['sequence']
-                    if i + len(seq) >= len(tokens): continue
-                    match = True
-                    matched_tokens_forms = [form]
-                    for offset, target_stem in enumerate(seq):
-                        next_t = tokens[i + 1 + offset]
-                        next_form = next_t.form if hasattr(next_t, 'form') else next_t['form']
-                        next_clean = self.data.clean_key(next_form)
-                        if next_clean != target_stem: match = False; break
-                        matched_tokens_forms.append(next_form)
-                    
-                    if match:
-                        data = cand['data']
-                        full_pattern_text = "+".join(matched_tokens_forms)
-                        self.debug_lines.append(f"🧩 표현 발견: {full_pattern_text} -> {data['desc']} (#{data['uid']})")
-                        level_str = data['level']
-                        if level_str:
-                            try: max_level = max(max_level, int(re.sub(r'[^0-9]', '', str(level_str))))
-                            except: pass
-                        
-                        last_t = tokens[i + len(seq)]
-                        # 길이 계산 주의 (Token 객체일 때만 정확)
-                        full_len = 0
-                        if hasattr(last_t, 'start'):
-                            full_len = (last_t.start + last_t.len) - t_start
-
-                        analysis_data.append({
-                            "form": full_pattern_text, "tag_code": "Expression", "tag_name": "문법적 표현",
-                            "level": level_str, "id": f"표현#{data['uid']}", "desc": data['desc'],
-                            "offset_start": t_start, "offset_len": full_len
-                        })
-                        i += (1 + len(seq))
-                        expression_matched = True; break
-            if expression_matched: continue
+            # 0. 표현 패턴 매칭 (가장 긴 표현 우선)
+            if expression_matches[i] is not None:
+                match_len, cand = expression_matches[i]
+                data = cand['data']
+                full_pattern_text = "+".join(forms[i:i + match_len])
+                debug_lines.append(f"🧩 표현 발견: {full_pattern_text} -> {data.desc} (#{data.uid})")
+                level = data.level
+                max_level = max(max_level, level)
+                
+                last_t = tokens[i + match_len - 1]
+                # 길이 계산 주의 (Token 객체일 때만 정확)
+                full_len = 0
+                if hasattr(last_t, 'start'):
+                    full_len = (last_t.start + last_t.len) - t_start
+
+                analysis_data.append(full_pattern_text, "Expression", "문법적 표현",
+                                     level, "표현", data.uid, data.desc, t_start, full_len)
+                i += match_len
+                continue
 
             # [VCP 절대 우선]
             if tag.startswith('VCP'):
-                final_cand = self.data.ida_entry
-                level_str = final_cand['level']
-                self.debug_lines.append(f"🔒 지정사(VCP) 강제 매핑: 이다 -> {level_str} (#{final_cand['uid']})")
-                if level_str:
-                    try: max_level = max(max_level, int(re.sub(r'[^0-9]', '', str(level_str))))
-                    except: pass
-                analysis_data.append({
-                    "form": form, "tag_code": tag, "tag_name": self.data.friendly_pos_map.get(tag, tag),
-                    "level": level_str, "id": f"문법#{final_cand['uid']}", "desc": final_cand['desc'],
-                    "offset_start": t_start, "offset_len": t_len
-                })
+                final_cand = state.ida_entry
+                level = final_cand.level
+                debug_lines.append(f"🔒 지정사(VCP) 강제 매핑: 이다 -> {level_label(level)} (#{final_cand.uid})")
+                max_level = max(max_level, level)
+                analysis_data.append(form, tag, self.data.friendly_pos_map.get(tag, tag),
+                                     level, "문법", final_cand.uid, final_cand.desc, t_start, t_len)
                 i += 1; continue 
 
-            # 1. 단어 병합 (2-gram Lookahead)
-            if i + 1 < len(tokens):
+            # 1. 단어 병합 (2-gram Lookahead) / 2. 단일 토큰 처리
+            # 같은 (형태, 품사, 다음 형태, 다음 품사) 창은 캐시된 판정 결과를 재사용합니다.
+            has_next = i + 1 < len(tokens)
+            if has_next:
                 next_token = tokens[i+1]
-                next_form = next_token.form if hasattr(next_token, 'form') else next_token['form']
+                next_form = forms[i+1]
+                next_clean = forms_clean[i+1]
                 next_tag = next_token.tag if hasattr(next_token, 'tag') else next_token['tag']
-
-                # 1. 조사(J)가 포함되면 병합하지 않음
-                if tag.startswith('J') or next_tag.startswith('J'):
-                    pass 
-                # 2. 유효한 검색 키(clean_key)가 없으면(예: 기호, 숫자 등) 병합하지 않음
-                elif not form_clean or not self.data.clean_key(next_form):
-                    pass
-                else:
-                    combined_form = form_clean + self.data.clean_key(next_form)
-                    raw_combined_form = form + next_form # 시각화용 원본 텍스트 보존
-                    
-                    # 병합 시도: (합친단어, 'N') 또는 (합친단어, 'V') 등으로 데이터 조회
-                    # 우선순위: 명사(N) -> 동사(V) -> 기타
-                    merge_found = False
-                    matched_candidate = None
-                    matched_pos_type = ''
-
-                    # [전략] 합친 형태가 데이터베이스 'N'(명사) 혹은 'V'(동사) 등에 존재하는지 확인
-                    # 예: 선생(NNG) + 님(XSN) -> 선생님(N) 존재 확인
-                    pos_priorities = ['N', 'NB', 'V', 'M', 'MA', 'I']
-                    
-                    for p_key in pos_priorities:
-                        # 1. 원형 (그대로) 검색
-                        lookup_keys = [combined_form]
-                        
-                        # 2. 동사/표현 등인 경우 '다' 붙여서 검색 (어지 -> 어지다)
-                        if p_key in ['V', 'ETC']: 
-                             if not combined_form.endswith('다'):
-                                 lookup_keys.append(combined_form + '다')
-
-                        for key_var in lookup_keys:
-
-                            # 병합 규칙 개선:
-                            # 1. 기능소끼리의 결합은 명사로 오인식되지 않도록 차단
-                            # 2. 용언(V)과 어미(E)의 결합이 명사로 오인식되는 경우 차단 (예: 하자, 얼음)
-                            #    - 이는 용언 활용형이 동음이의어(명사)로 잘못 분석되는 것을 방지합니다.
-                            
-                            func_tags = {
-                                'XSN', 'XSV', 'XSA', 'XSA-I', 'XSV-I', 
-                                'EP', 'EF', 'EC', 'ETN', 'ETM', 
-                                'JKS', 'JKC', 'JKG', 'JKO', 'JKB', 'JKV', 'JKQ', 'JX', 'JC'
-                            }
-                            predicate_tags = {
-                                'VV', 'VA', 'VX', 'VCP', 'VCN', 'VV-I', 'VA-I', 'VX-I', 'VV-R', 'VA-R'
-                            }
-                            ending_tags = {'EP', 'EF', 'EC', 'ETN', 'ETM'}
-
-                            is_noun_target = (p_key in ['N', 'NB', 'NP', 'NR'])
-                            
-                            if is_noun_target:
-                                # A. 기능소 + 기능소 -> 명사 금지
-                                if (tag in func_tags and next_tag in func_tags):
-                                    continue
-                                
-                                # B. 용언(V) + 어미(E) -> 명사 금지
-                                # 용언 어간 뒤에 어미가 왔는데 명사가 되었다? -> 동음이의어(하자, 얼음 등)일 확률 높음
-                                is_pred_inflection = (tag in predicate_tags and next_tag in ending_tags)
-                                if is_pred_inflection:
-                                    continue
-
-                            # 단어 사전과 문법 사전을 모두 조회하여 후보를 찾습니다.
-                            # ('어지다'와 같은 항목은 문법 사전에 'V'로 등록되어 있을 수 있습니다.)
-                            candidates = []
-                            if (key_var, p_key) in self.data.word_map:
-                                candidates.extend(self.data.word_map[(key_var, p_key)])
-                            if (key_var, p_key) in self.data.grammar_map:
-                                candidates.extend(self.data.grammar_map[(key_var, p_key)])
-
-                            main_cands = [c for c in candidates if c.get('is_main', False)]
-                            if main_cands: candidates = main_cands
-                            
-                            if candidates:
-                                    # 병합 성공
-                                    matched_candidate = candidates[0]
-                                    matched_pos_type = p_key
-                                    
-                                    # 만약 '다'를 붙여서 찾았다면, 형태도 그에 맞추거나 메모
-                                    # 여기서는 combined_form 자체는 합친 텍스트 그대로 두고,
-                                    # desc나 id는 찾은 '어지다'의 것을 사용함.
-                                    
-                                    if len(candidates) > 1:
-                                        ambiguous_items.append({
-                                            'index': len(analysis_data), 
-                                            'word': key_var, 
-                                            'candidates': candidates
-                                        })
-                                    merge_found = True
-                                    break
-                        if merge_found: break
-                    
-                    # '하다' 파생 용언의 경우 추가 처리 (어근 병합 로직 유지)
-                    if not merge_found:
-                        is_root_merge = (tag == 'XR' and next_tag in ['XSA', 'XSV', 'XSA-I', 'XSV-I'])
-                        if is_root_merge:
-                             combined_form_v = combined_form + '다'
-                             if (combined_form_v, 'V') in self.data.word_map:
-                                 candidates = self.data.word_map[(combined_form_v, 'V')]
-                                 if candidates:
-                                     matched_candidate = candidates[0]
-                                     matched_pos_type = 'V'
-                                     combined_form = combined_form_v # 검색용 키 업데이트
-                                     # 시각화에는 '하다/되다'가 결합된 형태가 아닌, 실제 문장 내의 형태(raw_combined_form)를 사용해야 자연스럽습니다.
-                                     # 예를 들어 '건강+하다'가 합쳐져 '건강하다'로 인식되었더라도, 원문 표기는 그대로 유지합니다.
-                                     merge_found = True
-
-                    if merge_found and matched_candidate:
-                        level_str = matched_candidate['level']
-                        self.debug_lines.append(f"🔄 2-gram 병합 성공: {form}+{next_form} -> {combined_form} ({matched_pos_type}) -> {level_str}")
-                        
-                        if level_str:
-                            try: max_level = max(max_level, int(re.sub(r'[^0-9]', '', str(level_str))))
-                            except: pass
-                        
-                        # 길이 계산
-                        next_len = getattr(next_token, 'len', 0)
-                        next_start = getattr(next_token, 'start', 0)
-                        calc_len = (next_start + next_len) - t_start if next_start > 0 else 0
-
-                        # 품사 명칭 동적 결정 (문법적 표현, 단어 품사 등)
-                        pos_label = "복합어/파생어"
-                        if 'class' in matched_candidate:
-                            # 문법 DB 유래
-                            cls_val = matched_candidate['class']
-                            if '표현' in cls_val: pos_label = "문법적 표현"
-                            else: pos_label = cls_val
-                        elif 'raw_pos' in matched_candidate:
-                            # 단어 DB 유래
-                            pos_label = matched_candidate['raw_pos']
-
-                        analysis_data.append({
-                            "form": raw_combined_form, # 시각화용 원본 형태 사용 (원본 문자열 보존)
-                            "tag_code": f"{tag}+{next_tag}",
-                            "tag_name": pos_label,
-                            "level": level_str,
-                            "id": f"단어#{matched_candidate['uid']}",
-                            "desc": matched_candidate['desc'],
-                            "offset_start": t_start,
-                            "offset_len": calc_len
-                        })
-                        i += 2; continue
-
-            # 2. 단일 토큰 처리
-            source_type = ""; search_key = ""; candidates = []
-            pos_key = self.data.pos_map.get(tag, 'ETC')
-            # 검색 대상 기본값 초기화
-            target = form_clean 
-
-            if tag in ['XSV', 'XSA'] and form_clean == '하':
-                source_type = "단어"; candidates = [{'level': '2급', 'uid': '1769', 'desc': '건강하다', 'is_main': True}]
-            elif tag in ['EF'] and form_clean == '다':
-                source_type = "문법"; candidates = [{'level': '3급', 'uid': '120', 'desc': '', 'is_main': True}]
-            elif tag.startswith('J') or tag.startswith('E'):
-                source_type = "문법"
-                if (form_clean, pos_key) in self.data.grammar_map:
-                    candidates = self.data.grammar_map[(form_clean, pos_key)]
-                    search_key = f"({form_clean}, {pos_key})"
-                else:
-                    fallback_key = 'J' if tag.startswith('J') else 'E'
-                    if (form_clean, fallback_key) in self.data.grammar_map:
-                        candidates = self.data.grammar_map[(form_clean, fallback_key)]
-                        search_key = f"({form_clean}, {fallback_key})"
+                merge, single = self._resolve(state, form_clean, tag, next_clean, next_tag)
             else:
-                source_type = "단어"
-                target = form_clean + '다' if pos_key == 'V' and not form_clean.endswith('다') else form_clean
-                search_key = f"({target}, {pos_key})"
-                word_candidates = self.data.word_map.get((target, pos_key), [])
-                grammar_candidates = []
-                if (target, pos_key) in self.data.grammar_map:
-                    grammar_candidates = self.data.grammar_map[(target, pos_key)]
-                candidates = word_candidates + grammar_candidates
-
-            final_level = "-"; final_id = ""; final_desc = ""
-            if candidates:
-                main_cands = [c for c in candidates if c.get('is_main', False)]
-                if main_cands: candidates = main_cands
+                merge, single = self._resolve(state, form_clean, tag, None, None)
 
+            if merge:
+                matched_candidate = merge['candidate']
+                if merge['ambiguous_candidates']:
+                    ambiguous_items.append({
+                        'index': len(analysis_data), 
+                        'word': merge['ambiguous_word'], 
+                        'candidates': merge['ambiguous_candidates'],
+                        'ambiguity': merge.get('ambiguity'),
+                        'token_index': i, 'span': 2
+                    })
+
+                raw_combined_form = form + next_form # 시각화용 원본 텍스트 보존
+                level = matched_candidate.level
+                debug_lines.append(f"🔄 2-gram 병합 성공: {form}+{next_form} -> {merge['combined_form']} ({merge['pos_type']}) -> {level_label(level)}")
+                
+                max_level = max(max_level, level)
+                
+                # 길이 계산
+                next_len = getattr(next_token, 'len', 0)
+                next_start = getattr(next_token, 'start', 0)
+                calc_len = (next_start + next_len) - t_start if next_start > 0 else 0
+
+                analysis_data.append(raw_combined_form, # 시각화용 원본 형태 사용 (원본 문자열 보존)
+                                     f"{tag}+{next_tag}", merge['pos_label'],
+                                     level, "단어", matched_candidate.uid, matched_candidate.desc,
+                                     t_start, calc_len)
+                i += 2; continue
+
+            source_type = single['source_type']; search_key = single['search_key']
+            target = single['target']; candidates = single['candidates']
+
+            final_level = LEVEL_NONE; final_id = ""; final_desc = ""
+            if candidates:
                 if len(candidates) > 1:
-                     ambiguous_items.append({'index': len(analysis_data), 'word': target, 'candidates': candidates})
+                     ambiguous_items.append({'index': len(analysis_data), 'word': target, 'candidates': candidates, 'ambiguity': single['ambiguity'], 'token_index': i, 'span': 1})
                 
-                candidates.sort(key=lambda x: x['level'])
                 sel = candidates[0]
-                final_level = sel['level']; final_id = sel['uid']; final_desc = sel.get('desc', '') or sel.get('meaning', '')
-                self.debug_lines.append(f"['{form}'({tag})] -> 키:{search_key} -> 결과:{final_level} (#{final_id})")
-                if final_level:
-                    try: max_level = max(max_level, int(re.sub(r'[^0-9]', '', str(final_level))))
-                    except: pass
+                final_level = sel.level; final_id = sel.uid; final_desc = sel.desc or sel.meaning
+                debug_lines.append(f"['{form}'({tag})] -> 키:{search_key} -> 결과:{level_label(final_level)} (#{final_id})")
+                max_level = max(max_level, final_level)
             else:
-                self.debug_lines.append(f"['{form}'({tag})] -> 검색 실패 (X)")
-
-            analysis_data.append({
-                "form": form, "tag_code": tag, "tag_name": self.data.friendly_pos_map.get(tag, tag),
-                "level": final_level, "id": f"{source_type}#{final_id}" if final_id else "-",
-                "desc": final_desc,
-                "offset_start": t_start, "offset_len": t_len
-            })
+                debug_lines.append(f"['{form}'({tag})] -> 검색 실패 (X)")
+
+            extras = {}
+            if not candidates and self.suggest_unknown and target and not tag.startswith('S'):
+                suggestions = self.data.fuzzy_search(target, "grammar" if source_type == "문법" else "word", max_distance=2, limit=3, lexicon=state)
+                if suggestions:
+                    extras["suggestions"] = [{'text': s['text'], 'grade': s['grade'], 'uid': s['uid'], 'distance': s['distance']} for s in suggestions]
+                    debug_lines.append("   💡 유사 항목 제안: " + ", ".join(f"{s['text']}({s['grade']}, 거리 {s['distance']})" for s in suggestions))
+            analysis_data.append(form, tag, self.data.friendly_pos_map.get(tag, tag),
+                                 final_level, source_type, final_id, final_desc, t_start, t_len, **extras)
             i += 1
             
+        # 로컬 판별 (길잡이말 문맥 벡터): hybrid 모드에서는 확신이 낮은 항목만 AI로 넘깁니다.
+        if ambiguous_items and self.disambiguation_mode != 'ai':
+            ambiguous_items, max_level = self._disambiguate_locally(state, tokens, ambiguous_items, analysis_data, client, max_level, debug_lines)
+
+        # 등급이 같은 후보끼리의 모호성은 등급 통계에 영향이 없으므로, 의미 단위 결과를 요청한 경우에만 AI에 묻습니다.
+        if sense_level is None: sense_level = self.disambiguation_scope == 'sense'
+        if ambiguous_items and not sense_level:
+            level_items = [item for item in ambiguous_items if item['ambiguity'] != 'sense']
+            if len(level_items) < len(ambiguous_items):
+                debug_lines.append(f"⏭️ 등급이 같은 동음이의어 {len(ambiguous_items) - len(level_items)}건은 AI 판별 생략")
+            ambiguous_items = level_items
+
         # AI 결과 반영 (동음이의어 분석)
         if ambiguous_items and not client:
-             self.debug_lines.append("⚠️ API Key 미설정: AI 동음이의어 분석을 건너뛰고 기본값(첫 번째 후보)을 사용합니다.")
+             debug_lines.append("⚠️ API Key 미설정: AI 동음이의어 분석을 건너뛰고 기본값(첫 번째 후보)을 사용합니다.")
 
         if ambiguous_items and client:
-            self.debug_lines.append(f"🤖 AI 동음이의어 분석 시작 ({len(ambiguous_items)}건)...")
+            debug_lines.append(f"🤖 AI 동음이의어 분석 시작 ({len(ambiguous_items)}건)...")
+            for item in ambiguous_items:
+                index = item['index']
+                item['context'] = self._context_window(sentence, analysis_data.offset_starts[index], analysis_data.offset_lens[index])
             ai_decisions, raw_log = self.ai_service.disambiguate(client, model_name, sentence, ambiguous_items)
+            cache_hits = sum(1 for item in ambiguous_items if item.get('from_cache'))
+            if cache_hits:
+                debug_lines.append(f"💾 AI 판별 캐시 적중 {cache_hits}건 (AI 질의 {len(ambiguous_items) - cache_hits}건)")
+            # 일부 배치가 실패해 응답이 빠진 항목은 기본값(첫 번째 후보)을 유지합니다.
+            if len(ai_decisions) < len(ambiguous_items): complete = False
             
             for i, item in enumerate(ambiguous_items):
-                # Request Key: "1", "2"... (1-based Index)
-                req_idx = str(i + 1)
-                
-                word_key = item['word']
+                # 응답 Key: "1", "2"... (1-based Index, AIDisambiguationService에서 정규화됨)
                 target_idx = item['index']
-                selected_uid = None
-                
-                # Check for 1-based index key first
-                if req_idx in ai_decisions:
-                    selected_uid = str(ai_decisions[req_idx])
-                # Fallback check for 0-based index key (just in case)
-                elif str(i) in ai_decisions:
-                    selected_uid = str(ai_decisions[str(i)])
-                # Fallback: Check by word itself (ambiguous if duplicates exists but better than nothing)
-                elif word_key in ai_decisions:
-                    selected_uid = str(ai_decisions[word_key])
+                selected_uid = ai_decisions.get(str(i + 1))
                 
                 if selected_uid:
-                    found = next((c for c in item['candidates'] if str(c['uid']) == selected_uid), None)
+                    found = next((c for c in item['candidates'] if str(c.uid) == selected_uid), None)
                     if found:
-                        analysis_data[target_idx]['level'] = found['level']
-                        analysis_data[target_idx]['id'] = f"단어#{found['uid']}" 
-                        analysis_data[target_idx]['desc'] = f"🤖 {found['desc']}" 
-                        self.debug_lines.append(f"✅ AI 교정 [{item['word']}]: {found['desc']} (#{selected_uid})")
-                        try: 
-                            new_lvl = int(re.sub(r'[^0-9]', '', str(found['level'])))
-                            max_level = max(max_level, new_lvl)
-                        except: pass
+                        analysis_data.set(target_idx, level=found.level, id=f"단어#{found.uid}", desc=f"🤖 {found.desc}")
+                        cache_mark = " (캐시)" if item.get('from_cache') else ""
+                        debug_lines.append(f"✅ AI 교정 [{item['word']}]: {found.desc} (#{selected_uid}){cache_mark}")
+                        max_level = max(max_level, found.level)
                     else:
-                        self.debug_lines.append(f"⚠️ ID 불일치: AI가 없는 ID({selected_uid}) 반환")
+                        debug_lines.append(f"⚠️ ID 불일치: AI가 없는 ID({selected_uid}) 반환")
                 else:
-                    self.debug_lines.append(f"⚠️ AI 응답 누락 [{i}]: {item['word']}")
+                    debug_lines.append(f"⚠️ AI 응답 누락 [{i}]: {item['word']}")
 
-        return analysis_data, max_level, "\n".join(self.debug_lines)
+        return analysis_data, max_level, "\n".join(debug_lines), complete
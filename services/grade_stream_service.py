@@ -0,0 +1,106 @@
+class GradeStreamService:
+    """
+    /api/grade 응답을 NDJSON(한 줄에 JSON 하나) 레코드로 차례차례 만들어 냅니다.
+
+    텍스트 입력은 문장 묶음(iter_sentence_grades) 하나가, 파일 입력은 파일 하나가 분석되는 즉시
+    레코드 하나로 나가므로, 입력이 길거나 파일이 많아도 첫 바이트까지의 시간은 늘어나지 않습니다.
+    업로드 파일은 블록 단위로 디코딩한 조각을 그대로 문장 묶음 분석에 넘기므로, 원문 전체를 한 문자열로 만들지 않습니다.
+    순서: start -> (sentence | file | error)... -> summary
+    """
+
+    def __init__(self, analysis_service, visualization_service, parallel_grading_service, file_processing_service):
+        self.analysis = analysis_service
+        self.visualization = visualization_service
+        self.parallel_grading = parallel_grading_service
+        self.file_processing = file_processing_service
+
+    def iter_records(self, texts=(), documents=(), errors=(), chunk_size=None, uploads=()):
+        """
+        :param texts: 직접 입력한 텍스트 리스트 (문장 묶음 단위로 레코드 생성)
+        :param documents: [(파일명, 텍스트), ...] 이미 읽어 둔 문서 (병렬 풀에서 파일 단위로 레코드 생성)
+        :param errors: [(파일명, 오류 문구), ...] 텍스트 추출에 실패한 파일
+        :param uploads: 아직 읽지 않은 업로드 파일 리스트 (읽으면서 바로 분석, 파일 단위로 레코드 생성)
+        :yield: 레코드 dict
+        """
+        overall = {}
+        # files: 문서 수 + 실패한 파일 수 + 업로드 파일 수 (.zip 은 항목을 미리 세지 않고 하나로 셈)
+        yield {'type': 'start', 'texts': len(texts), 'files': len(documents) + len(errors) + len(uploads),
+               'lexicon_version': self.analysis.data.lexicon_version}
+
+        for index, text in enumerate(texts):
+            for chunk in self.analysis.iter_sentence_grades(text, chunk_size):
+                self._accumulate(overall, chunk['grade_stats'])
+                record = self._result_record('sentence', chunk['grade_stats'], chunk['analysis_data'], chunk['text'], chunk['start'])
+                record.update({'index': index, 'start': chunk['start'], 'end': chunk['end']})
+                yield record
+
+        for filename, error in errors:
+            yield {'type': 'error', 'filename': filename, 'error': error}
+
+        upload_errors = []
+        for document in self.file_processing.iter_uploads(uploads, upload_errors):
+            yield from self._drain_errors(upload_errors)
+            grade_stats, analysis_data, debug_log, runs = self._grade_upload(document, chunk_size)
+            # 읽다가 실패한 문서(크기 초과 등)는 레코드 대신 다음 오류 레코드로 알립니다.
+            if document.error is not None: continue
+            yield from self._file_records(document.name, grade_stats, analysis_data, debug_log, overall, runs=runs)
+        yield from self._drain_errors(upload_errors)
+
+        results = self.parallel_grading.iter_grade_documents([text for _, text in documents], self.analysis)
+        for (filename, text), (grade_stats, analysis_data, debug_log) in zip(documents, results):
+            yield from self._file_records(filename, grade_stats, analysis_data, debug_log, overall, text=text)
+
+        yield {'type': 'summary', 'grade_stats': overall,
+               'chart': self.visualization.create_chart_data_from_stats(
+                   {k: v for k, v in overall.items() if k not in ('기타', '전체')})}
+
+    def _grade_upload(self, document, chunk_size):
+        # 묶음 결과마다 시각화 run 을 이어 붙여, 원문 없이도 파일 전체의 run 을 만듭니다.
+        runs = []
+        index_base = 0
+
+        def add_runs(chunk):
+            nonlocal index_base
+            if chunk['lead']: self.visualization.encode_segments([{'text': chunk['lead'], 'type': 'plain'}], runs)
+            _, segments = self.visualization.get_visualization_data(chunk['analysis_data'], chunk['text'], chunk['start'])
+            self.visualization.encode_segments(segments, runs, index_base)
+            index_base += len(chunk['analysis_data'])
+
+        grade_stats, analysis_data, debug_log = self.analysis.get_document_grade(document, chunk_size, on_chunk=add_runs)
+        return grade_stats, analysis_data, debug_log, runs
+
+    def _file_records(self, filename, grade_stats, analysis_data, debug_log, overall, text=None, runs=None):
+        if not isinstance(grade_stats, dict):
+            yield {'type': 'error', 'filename': filename, 'error': f"{grade_stats}: {debug_log}"}
+            return
+        self._accumulate(overall, grade_stats)
+        analysis_data.set_filename(filename)
+        record = self._result_record('file', grade_stats, analysis_data, text, runs=runs)
+        record['filename'] = filename
+        yield record
+
+    @staticmethod
+    def _drain_errors(errors):
+        while errors:
+            filename, error = errors.pop(0)
+            yield {'type': 'error', 'filename': filename, 'error': error}
+
+    def _result_record(self, record_type, grade_stats, analysis_data, text, offset=0, runs=None):
+        if runs is None:
+            chart, segments = self.visualization.get_visualization_data(analysis_data, text, offset)
+            runs = self.visualization.encode_segments(segments)
+        else:
+            chart = self.visualization.get_chart_data(analysis_data)
+        return {
+            'type': record_type,
+            'grade_stats': grade_stats,
+            'chart': chart,
+            'tokens': analysis_data.to_columns(),
+            # 분석된 구간은 tokens 의 행 번호만 가리킵니다. (VisualizationService.encode_segments 참고)
+            'runs': runs,
+        }
+
+    @staticmethod
+    def _accumulate(overall, grade_stats):
+        for k, v in grade_stats.items():
+            overall[k] = overall.get(k, 0) + v
@@ -0,0 +1,39 @@
+import unicodedata
+
+# 한글 음절 -> 자모 분해 (호환용 자모 기준)
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+         "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+# 겹모음/겹받침은 입력 순서대로 낱자로 풀어 둡니다. ('과' 입력 중 '고' 상태도 접두로 일치하도록)
+_COMPOUND = {
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+}
+
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_LAST = 0xD7A3
+
+
+def decompose_jamo(text):
+    """
+    문자열을 자모 시퀀스로 분해합니다.
+    초성/종성을 구분하지 않으므로 '갑'(ㄱㅏㅂ)은 '가방'(ㄱㅏㅂㅏㅇ)의 접두가 됩니다.
+    한글 음절이 아닌 문자는 그대로 둡니다.
+    """
+    if not text: return ""
+    out = []
+    for ch in unicodedata.normalize('NFC', text):
+        code = ord(ch)
+        if _SYLLABLE_BASE <= code <= _SYLLABLE_LAST:
+            offset = code - _SYLLABLE_BASE
+            cho, rest = divmod(offset, 21 * 28)
+            jung, jong = divmod(rest, 28)
+            out.append(_CHO[cho])
+            out.append(_COMPOUND.get(_JUNG[jung], _JUNG[jung]))
+            if jong: out.append(_COMPOUND.get(_JONG[jong], _JONG[jong]))
+        else:
+            out.append(_COMPOUND.get(ch, ch))
+    return "".join(out)
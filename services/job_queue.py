@@ -0,0 +1,231 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from config import Config
+from services.metrics import metrics
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+_JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _process_alive(pid):
+    """pid 프로세스가 살아 있는지 (확인할 수 없으면 살아 있다고 봅니다)"""
+    if os.name == 'nt': return True  # Windows 에서는 os.kill(pid, 0) 이 신호를 보내므로 확인하지 않음
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    대량 채점 작업을 요청 스레드 밖에서 처리하는 프로세스 내 작업 큐.
+
+    - 제출(submit)하면 작업 ID를 바로 돌려주고, 백그라운드 작업 스레드가 우선순위 순으로 처리합니다.
+      파일이 하나뿐인 작업은 PRIORITY_INTERACTIVE로 들어가 전용 스레드(JOB_INTERACTIVE_WORKERS 개)가 처리하므로
+      대량 작업(JOB_WORKERS 개 스레드)이 돌고 있어도 그 뒤에서 기다리지 않습니다.
+      (/grade 단일 문장 분석은 큐를 거치지 않고 요청 스레드에서 바로 처리됩니다)
+    - 진행 상황과 결과는 JOB_RESULT_DIR 에 파일로 남기므로 다른 워커 프로세스에서도 조회할 수 있고,
+      끝난 작업은 JOB_RESULT_TTL 초가 지나면 지워집니다.
+    - 처리 전 입력은 제출한 프로세스의 메모리에만 있으므로, 그 프로세스가 끝나 멈춘 queued/running 작업은
+      failed 로 바꿔 만료되게 합니다.
+    - 결과는 /api/grade 와 같은 NDJSON 레코드(start -> file | error ... -> summary)입니다.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(JobQueue, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized: return
+        self.result_dir = Config.JOB_RESULT_DIR
+        self.ttl = Config.JOB_RESULT_TTL
+        # 대량 작업용과 대화형(파일 1개) 작업용 큐를 따로 두고 스레드도 나눕니다.
+        self._queues = {'bulk': queue.PriorityQueue(), 'interactive': queue.PriorityQueue()}
+        self._seq = 0
+        self._jobs = {}     # job_id -> 상태 dict (이 프로세스에서 제출한 작업)
+        self._inputs = {}   # job_id -> (documents, errors) 처리 전까지만 보관
+        self._lock = threading.Lock()
+        self._workers = []
+        self._last_purge = 0.0
+        os.makedirs(self.result_dir, exist_ok=True)
+        self._recover_orphans()
+        self._initialized = True
+
+    def submit(self, documents, errors=(), priority=None):
+        """
+        :param documents: [(이름, 텍스트), ...]
+        :param errors: [(이름, 오류 문구), ...] 텍스트 추출에 실패한 파일 (결과에 error 레코드로 남음)
+        :return: 작업 상태 dict
+        """
+        total = len(documents) + len(errors)
+        if priority is None:
+            priority = PRIORITY_INTERACTIVE if total <= 1 else PRIORITY_BULK
+        now = time.time()
+        job = {'id': uuid.uuid4().hex, 'status': 'queued', 'priority': priority, 'done': 0, 'total': total,
+               'created_at': now, 'started_at': None, 'finished_at': None, 'expires_at': None, 'error': "",
+               'pid': os.getpid()}
+        lane = 'interactive' if priority <= PRIORITY_INTERACTIVE else 'bulk'
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._inputs[job['id']] = (list(documents), list(errors))
+            self._seq += 1
+            self._queues[lane].put((priority, self._seq, job['id']))
+        self._write_status(job)
+        self._start_workers()
+        self._purge_expired()
+        metrics.incr('jobs.submitted')
+        return dict(job)
+
+    def get(self, job_id):
+        """작업 상태 dict (없거나 만료되었으면 None)"""
+        if not _JOB_ID_PATTERN.match(job_id or ""): return None
+        job = self._jobs.get(job_id)
+        job = dict(job) if job else self._read_status(job_id)
+        if job and self._is_orphan(job): job = self._mark_orphan_failed(job)
+        if job and job['expires_at'] and job['expires_at'] < time.time(): return None
+        return job
+
+    def result_path(self, job_id):
+        """완료된 작업의 결과(NDJSON) 파일 경로 (아직 끝나지 않았거나 없으면 None)"""
+        job = self.get(job_id)
+        if not job or job['status'] != 'done': return None
+        path = self._path(job_id, '.ndjson')
+        return path if os.path.exists(path) else None
+
+    def stats(self):
+        with self._lock:
+            statuses = [job['status'] for job in self._jobs.values()]
+        return {'workers': len(self._workers), 'queued': statuses.count('queued'), 'running': statuses.count('running'),
+                'done': statuses.count('done'), 'failed': statuses.count('failed')}
+
+    def _start_workers(self):
+        with self._lock:
+            if self._workers: return
+            lanes = (('bulk', Config.JOB_WORKERS), ('interactive', Config.JOB_INTERACTIVE_WORKERS))
+            for lane, count in lanes:
+                for i in range(max(1, count)):
+                    worker = threading.Thread(target=self._work, args=(self._queues[lane],), name=f"job-{lane}-{i}", daemon=True)
+                    self._workers.append(worker)
+                    worker.start()
+
+    def _work(self, lane_queue):
+        while True:
+            _, _, job_id = lane_queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"⚠️ 작업 처리 실패 ({job_id}): {e}")
+                self._update(job_id, status='failed', error=str(e), finished_at=time.time(), expires_at=time.time() + self.ttl)
+            finally:
+                self._inputs.pop(job_id, None)
+                lane_queue.task_done()
+            self._purge_expired()
+
+    def _run(self, job_id):
+        from services.container import container
+        documents, errors = self._inputs[job_id]
+        self._update(job_id, status='running', started_at=time.time())
+        result_path = self._path(job_id, '.ndjson')
+        tmp_path = result_path + '.tmp'
+        done = 0
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in container.grade_stream.iter_records(documents=documents, errors=errors):
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    if record['type'] in ('file', 'error'):
+                        done += 1
+                        self._update(job_id, done=done)
+            os.replace(tmp_path, result_path)
+        except Exception:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+        finished = time.time()
+        self._update(job_id, status='done', finished_at=finished, expires_at=finished + self.ttl)
+        metrics.incr('jobs.completed')
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            job = dict(job)
+        self._write_status(job)
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self.result_dir, job_id + suffix)
+
+    def _write_status(self, job):
+        # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 바꿔 끼웁니다.
+        path = self._path(job['id'], '.json')
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(job, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 작업 상태 저장 실패 ({job['id']}): {e}")
+
+    def _read_status(self, job_id):
+        try:
+            with open(self._path(job_id, '.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_orphan(self, job):
+        """이미 끝난 프로세스가 제출한 queued/running 작업인지 (입력이 사라져 더 이상 처리될 수 없음)"""
+        if job['status'] not in ('queued', 'running') or job['id'] in self._jobs: return False
+        pid = job.get('pid')
+        # 같은 pid 인데 이 프로세스가 모르는 작업이면 재시작 전 프로세스의 것입니다.
+        return not pid or pid == os.getpid() or not _process_alive(pid)
+
+    def _mark_orphan_failed(self, job):
+        now = time.time()
+        job = dict(job, status='failed', error="작업을 처리하던 서버 프로세스가 종료되어 중단되었습니다.",
+                   finished_at=now, expires_at=now + self.ttl)
+        self._write_status(job)
+        print(f"⚠️ 중단된 작업을 실패로 표시했습니다: {job['id']}")
+        return job
+
+    def _recover_orphans(self):
+        """시작할 때, 이전 프로세스가 남긴 queued/running 상태 파일을 failed 로 바꿉니다."""
+        for job in self._iter_status_files():
+            if self._is_orphan(job): self._mark_orphan_failed(job)
+
+    def _iter_status_files(self):
+        try:
+            names = os.listdir(self.result_dir)
+        except OSError:
+            return
+        for name in names:
+            job_id, ext = os.path.splitext(name)
+            if ext != '.json' or not _JOB_ID_PATTERN.match(job_id): continue
+            job = self._read_status(job_id)
+            if job: yield job
+
+    def _purge_expired(self):
+        """만료된 작업의 상태·결과 파일을 지우고, 멈춘(주인 프로세스가 없는) 작업은 failed 로 바꿉니다. (최대 1분에 한 번)"""
+        now = time.time()
+        if now - self._last_purge < 60: return
+        self._last_purge = now
+        for job in self._iter_status_files():
+            if self._is_orphan(job): job = self._mark_orphan_failed(job)
+            if not job['expires_at'] or job['expires_at'] >= now: continue
+            job_id = job['id']
+            for suffix in ('.ndjson', '.json'):
+                try: os.remove(self._path(job_id, suffix))
+                except OSError: pass
+            with self._lock:
+                self._jobs.pop(job_id, None)
@@ -0,0 +1,31 @@
+import re
+import numpy as np
+
+# 등급 코드: 1~6 = 1급~6급, 0 = 등급 없음
+LEVEL_NONE = 0
+MAX_LEVEL = 6
+LEVEL_CODES = range(1, MAX_LEVEL + 1)
+
+_LEVEL_PATTERN = re.compile(r'[1-6]')
+
+
+def parse_level(value):
+    """
+    '3급', '1~2급'(첫 숫자 기준), 3 등을 정수 등급 코드로 바꿉니다.
+    등급 정보가 없으면 LEVEL_NONE(0)을 돌려줍니다.
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value) if 1 <= value <= MAX_LEVEL else LEVEL_NONE
+    found = _LEVEL_PATTERN.search(str(value or ''))
+    return int(found.group()) if found else LEVEL_NONE
+
+
+def level_label(code, none_label='-'):
+    """화면 표시용 문자열 (3 -> '3급'). 템플릿 필터로도 등록됩니다."""
+    if isinstance(code, str): return code
+    return f"{code}급" if code else none_label
+
+
+def level_counts(codes):
+    """등급 코드 배열 -> 길이 MAX_LEVEL+1 의 빈도 배열 (인덱스 0은 등급 없음)"""
+    return np.bincount(np.asarray(codes, dtype=np.int64), minlength=MAX_LEVEL + 1)
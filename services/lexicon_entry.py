@@ -0,0 +1,36 @@
+import sys
+
+
+def intern_text(value):
+    """pandas 값(NaN 포함)을 intern 된 str로 바꿉니다."""
+    if value is None: return ''
+    text = str(value)
+    if text == 'nan': return ''
+    return sys.intern(text)
+
+
+class LexiconEntry:
+    """
+    word.csv / grammar.csv 의 한 행.
+
+    행마다 객체 하나만 만들고 word_map / grammar_map 에는 행 번호만 저장합니다.
+    uid와 level은 파이썬 int, 설명·품사·분류 문자열은 intern 되어 같은 값을 공유합니다.
+    문법 항목은 grammar_class(분류)가 있고, 단어 항목은 raw_pos(품사)가 있습니다.
+    """
+    __slots__ = ('uid', 'level', 'desc', 'meaning', 'raw_pos', 'grammar_class')
+
+    def __init__(self, uid, level, desc='', meaning='', raw_pos=None, grammar_class=None):
+        self.uid = uid
+        self.level = level
+        self.desc = desc
+        self.meaning = meaning
+        self.raw_pos = raw_pos
+        self.grammar_class = grammar_class
+
+    @property
+    def source(self):
+        """'g'(문법) 또는 'w'(단어) - 캐시 키 등에서 uid 충돌을 피하는 데 사용"""
+        return 'g' if self.grammar_class is not None else 'w'
+
+    def __repr__(self):
+        return f"LexiconEntry({self.source}#{self.uid}, level={self.level}, desc={self.desc!r})"
@@ -0,0 +1,109 @@
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import time
+
+# 스냅샷 구조(payload 키 구성)가 바뀌면 이 값을 올려 기존 파일을 무효화합니다.
+SNAPSHOT_FORMAT_VERSION = 7
+
+
+def get_kiwi_version():
+    try:
+        import kiwipiepy
+        return getattr(kiwipiepy, '__version__', 'unknown')
+    except Exception:
+        return 'unavailable'
+
+
+class LexiconSnapshot:
+    """
+    word.csv / grammar.csv 로부터 컴파일된 어휘·문법·표현 지도를
+    바이너리 파일(pickle)로 저장하고 다시 불러옵니다.
+
+    스냅샷은 (포맷 버전, Kiwi 버전, 두 CSV 파일의 내용 해시)로 만든 키를 함께 저장하며,
+    키가 일치하지 않으면 오래된 스냅샷으로 간주하여 사용하지 않습니다.
+    """
+
+    def __init__(self, snapshot_path, source_paths):
+        self.path = snapshot_path
+        self.source_paths = list(source_paths)
+
+    def compute_key(self):
+        hasher = hashlib.sha256()
+        hasher.update(f"format={SNAPSHOT_FORMAT_VERSION};kiwi={get_kiwi_version()}".encode('utf-8'))
+        for src in self.source_paths:
+            hasher.update(os.path.basename(src).encode('utf-8'))
+            with open(src, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    hasher.update(block)
+        return hasher.hexdigest()
+
+    def load(self, key):
+        """키가 일치하는 유효한 스냅샷이면 payload(dict)를, 아니면 None을 반환합니다."""
+        if not self.path or not os.path.exists(self.path): return None
+        try:
+            with open(self.path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ 어휘 스냅샷 로드 실패 (재생성 예정): {e}")
+            return None
+        if not isinstance(snapshot, dict): return None
+        if snapshot.get('format') != SNAPSHOT_FORMAT_VERSION or snapshot.get('key') != key:
+            return None
+        return snapshot.get('payload')
+
+    def save(self, key, payload):
+        """임시 파일에 기록한 뒤 교체하여, 동시에 뜨는 워커가 반쯤 쓰인 파일을 읽지 않도록 합니다."""
+        if not self.path: return False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'format': SNAPSHOT_FORMAT_VERSION, 'key': key, 'payload': payload}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            print(f"⚠️ 어휘 스냅샷 저장 실패: {e}")
+            return False
+
+
+def main(argv=None):
+    """
+    배포 시점에 스냅샷을 미리 만들어 두기 위한 CLI.
+    사용 예: python -m services.lexicon_snapshot --force
+    """
+    parser = argparse.ArgumentParser(description="word.csv / grammar.csv 어휘 스냅샷 사전 빌드")
+    parser.add_argument('--output', help="스냅샷 저장 경로 (기본값: Config.LEXICON_SNAPSHOT_PATH)")
+    parser.add_argument('--force', action='store_true', help="유효한 스냅샷이 있어도 다시 빌드")
+    args = parser.parse_args(argv)
+
+    from config import Config
+    from services.morph_service import MorphService
+    from services.grade_database import GradeDatabase
+
+    if args.output: Config.LEXICON_SNAPSHOT_PATH = args.output
+    if args.force and os.path.exists(Config.LEXICON_SNAPSHOT_PATH):
+        os.remove(Config.LEXICON_SNAPSHOT_PATH)
+
+    morph_service = MorphService()
+    if morph_service.use_mock:
+        print("Kiwi 로드 실패: 표현 지도를 만들 수 없어 스냅샷을 빌드하지 않습니다.")
+        return 1
+
+    started = time.perf_counter()
+    grade_database = GradeDatabase()
+    grade_database.initialize(morph_service)
+    if not grade_database.is_ready:
+        print(f"빌드 실패: {grade_database.error_msg}")
+        return 1
+
+    print(f"스냅샷 준비 완료 ({grade_database.lexicon_source}, {time.perf_counter() - started:.2f}s)")
+    print(f"  경로: {Config.LEXICON_SNAPSHOT_PATH}")
+    print(f"  키: {grade_database.lexicon_version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
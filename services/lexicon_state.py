@@ -0,0 +1,82 @@
+import threading
+from services.expression_automaton import ExpressionAutomaton
+from services.local_disambiguator import LocalDisambiguator
+
+
+class LexiconState:
+    """
+    한 어휘 버전(word.csv / grammar.csv 내용)으로 만든 컴파일 결과 묶음.
+
+    GradeDatabase는 현재 상태 객체 하나만 가리키며, 다시 불러올 때는 새 상태를 따로 다 만든 뒤
+    참조만 바꿔 끼웁니다. 분석 요청은 시작할 때 받은 상태 객체를 끝까지 사용하므로
+    교체 도중에도 한 요청 안에서 서로 다른 버전이 섞이지 않습니다.
+    """
+
+    def __init__(self, version="", source=""):
+        self.version = version      # 스냅샷 키 (CSV 내용 + Kiwi 버전 해시)
+        self.source = source        # "snapshot" | "csv" | "reload"
+        # CSV로 새로 만들 때(또는 mmap 없이 스냅샷으로 뜰 때)만 쓰고, 로드가 끝나면 None 으로 비웁니다.
+        self.word_df = None
+        self.grammar_df = None
+        # 'word' | 'grammar' -> 행 내용 지문 배열 (다시 불러올 때 바뀐 행 수 계산용)
+        self.row_fingerprints = {}
+        # 사전 항목(행) 목록과, (키, 품사) -> 행 번호 tuple 지도
+        # (mmap 파일을 쓰면 MappedLexicon 의 읽기 전용 뷰로 바뀌어 워커 프로세스끼리 페이지를 공유합니다)
+        self.lexicon_entries = []
+        self.word_map = {}
+        self.grammar_map = {}
+        self.mapped_lexicon = None
+        self.expression_map = {}
+        self.expression_automaton = ExpressionAutomaton({})
+        self.local_disambiguator = LocalDisambiguator()
+        # ('word' | 'grammar', 키, 품사) -> 'level'(후보 간 등급이 다름) | 'sense'(등급은 같고 의미만 다름)
+        self.ambiguity_classes = {}
+        self.ida_entry = None
+        # /api/search 용 레코드·색인 (GradeDatabase._build_search_indexes 에서 채움, mmap 파일을 쓰면 그 읽기 전용 뷰)
+        self.word_search_records = []
+        self.grammar_search_records = []
+        self.word_search_grades = []
+        self.grammar_search_grades = []
+        self.word_search_index = None
+        self.word_prefix_index = None
+        self.grammar_search_index = None
+        self.grammar_prefix_index = None
+        # 오타 허용 색인은 빌드 비용이 있어 처음 사용할 때 한 번 만듭니다.
+        self.fuzzy_indexes = {}
+        self.fuzzy_lock = threading.Lock()
+        # 브라우저용 검색 색인 (JSON, gzip) - 처음 요청될 때 한 번 만듭니다.
+        self.search_index_blob = None
+
+    def entries_for(self, codes, main_only=True):
+        """
+        지도 값(행 번호 목록) -> LexiconEntry 리스트.
+        관련형으로 등록된 항목은 음수(~행 번호)로 저장되며, main_only면 대표형 항목이 있을 때 그것만 돌려줍니다.
+        """
+        if main_only and any(code >= 0 for code in codes):
+            return [self.lexicon_entries[code] for code in codes if code >= 0]
+        return [self.lexicon_entries[code if code >= 0 else ~code] for code in codes]
+
+    def ambiguity_class(self, scope, key, pos):
+        """:return: 'level', 'sense' 또는 None(모호하지 않음)"""
+        return self.ambiguity_classes.get((scope, key, pos))
+
+    def expression_patterns(self):
+        """원문 패턴 -> [(첫 형태, 나머지 형태 tuple), ...] (다시 불러올 때 바뀌지 않은 패턴의 토큰화를 재사용)"""
+        patterns = {}
+        for start_key, candidates in self.expression_map.items():
+            for cand in candidates:
+                registered = patterns.setdefault(cand['full_text'], [])
+                if (start_key, cand['sequence']) not in registered:
+                    registered.append((start_key, cand['sequence']))
+        return patterns
+
+    def gloss_features(self):
+        """(출처, uid, 길잡이말, 의미) -> 로컬 판별 특징 집합 (바뀌지 않은 항목의 토큰화를 재사용)"""
+        vectors = self.local_disambiguator.vectors
+        if not vectors: return {}
+        features = {}
+        for entry in self.lexicon_entries:
+            key = (entry.source, str(entry.uid))
+            if key in vectors:
+                features[key + (entry.desc, entry.meaning)] = set(vectors[key][0])
+        return features
@@ -0,0 +1,95 @@
+import math
+
+# 길잡이말/의미에서 문맥 특징으로 쓰는 내용어 품사
+CONTENT_TAG_PREFIXES = ('NN', 'NR', 'NP', 'VV', 'VA', 'MAG', 'XR', 'SL', 'SH')
+
+
+def candidate_key(candidate):
+    """후보 LexiconEntry -> (출처, uid)"""
+    return (candidate.source, str(candidate.uid))
+
+
+def content_features(tokens, skip_forms=()):
+    """Kiwi 토큰 리스트에서 내용어 형태를 특징 집합으로 뽑습니다."""
+    features = set()
+    for token in tokens:
+        form = token.form if hasattr(token, 'form') else token['form']
+        tag = token.tag if hasattr(token, 'tag') else token['tag']
+        if tag.startswith(CONTENT_TAG_PREFIXES) and form not in skip_forms:
+            features.add(form)
+    return features
+
+
+class LocalDisambiguator:
+    """
+    어휘 목록의 길잡이말(용례)과 문법 의미 정보로 만든 희소 문맥 벡터로
+    동음이의어 후보를 점수화합니다. (네트워크 호출 없음)
+
+    후보가 2개 이상인 사전 항목에 대해서만 불러올 때 벡터를 미리 계산하며,
+    점수는 후보 특징의 idf 가중치 합 중 주변 형태소와 겹치는 비율(0~1)입니다.
+    """
+
+    def __init__(self, vectors=None):
+        # (출처, uid) -> ({특징: 가중치}, 가중치 합)
+        self.vectors = vectors or {}
+
+    @classmethod
+    def build(cls, candidate_lists, analyzer, clean_key, known_features=None):
+        """
+        :param candidate_lists: (표제어, [LexiconEntry, ...]) 반복자
+        :param analyzer: Kiwi 인스턴스 (없으면 빈 판별기를 돌려줍니다)
+        :param clean_key: 표제어 정규화 함수 (표제어 자신은 특징에서 제외)
+        :param known_features: (출처, uid, 길잡이말, 의미) -> 특징 집합 (이전 버전에서 재사용, 토큰화 생략)
+        """
+        if analyzer is None: return cls()
+        known_features = known_features or {}
+
+        raw_features = {}
+        for headword, candidates in candidate_lists:
+            if len(candidates) < 2: continue
+            skip = {clean_key(headword)}
+            for cand in candidates:
+                key = candidate_key(cand)
+                if key in raw_features: continue
+                features = known_features.get(key + (cand.desc, cand.meaning))
+                if features is not None:
+                    raw_features[key] = features
+                    continue
+                features = set()
+                for text in (cand.desc, cand.meaning):
+                    text = str(text or '').strip()
+                    if text and text != 'nan':
+                        features |= content_features(analyzer.tokenize(text), skip)
+                raw_features[key] = features
+
+        df = {}
+        for features in raw_features.values():
+            for f in features: df[f] = df.get(f, 0) + 1
+        n = len(raw_features)
+        idf = {f: math.log((n + 1) / (count + 1)) + 1.0 for f, count in df.items()}
+
+        vectors = {}
+        for key, features in raw_features.items():
+            weights = {f: idf[f] for f in features}
+            vectors[key] = (weights, sum(weights.values()))
+        return cls(vectors)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def score(self, candidate, context_features):
+        weights, total = self.vectors.get(candidate_key(candidate), (None, 0.0))
+        if not total: return 0.0
+        return sum(w for f, w in weights.items() if f in context_features) / total
+
+    def rank(self, candidates, context_features):
+        """
+        :return: (최고 점수 후보, 1위-2위 점수 차이). 모든 점수가 0이면 (None, 0.0)
+        동점이면 기존 후보 순서(등급 순)를 따릅니다.
+        """
+        scored = [(self.score(cand, context_features), idx) for idx, cand in enumerate(candidates)]
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        best_score, best_idx = scored[0]
+        if best_score <= 0: return None, 0.0
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        return candidates[best_idx], best_score - runner_up
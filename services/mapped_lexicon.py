@@ -0,0 +1,381 @@
+import mmap
+import os
+import struct
+import weakref
+import zlib
+from array import array
+from services.lexicon_entry import LexiconEntry
+
+# 파일 구조:
+#   [헤더] [항목 테이블] [단어 해시 테이블] [문법 해시 테이블] [검색 테이블 x2] [행 번호 배열] [문자열 힙]
+#   검색 테이블 (단어, 문법): [검색 헤더] [레코드] [검색 대상 문자열] [정렬 키] [n-gram·어간 해시 테이블] [자모 접두 배열]
+# 모든 정수는 little-endian 이며, 문자열은 힙 안의 (오프셋, 길이)로 참조합니다.
+MAGIC = b'HGLXMAP3'
+HEADER = struct.Struct('<8s32sIIIIIIIII')
+ENTRY = struct.Struct('<iB3xIIIIIIII')   # uid, level, desc, meaning, raw_pos, class (각 오프셋·길이)
+COUNT = struct.Struct('<I')              # 해시 테이블 앞의 키 개수 (len() 용)
+SLOT = struct.Struct('<IIII')            # 키 오프셋, 키 길이, 행 번호 배열 시작, 개수
+SEARCH = struct.Struct('<IIIIIIIIIII')   # 문서 수, max_n, 레코드, 검색 문자열, 정렬 키, n-gram·어간 테이블(슬롯 수, 위치), 자모 배열(개수, 위치)
+RECORD = struct.Struct('<i4x' + 'II' * 7)  # uid, text/grade/desc/pos/related/meaning (각 오프셋·길이), 검색 문자열 시작·개수
+TEXT = struct.Struct('<II')              # 문자열 오프셋, 길이
+JAMO = struct.Struct('<III')             # 자모열 오프셋, 길이, 문서 id
+NO_STRING = 0xFFFFFFFF                   # None 문자열 / 빈 슬롯 표시
+SEARCH_TYPES = ('word', 'grammar')
+RECORD_FIELDS = ('text', 'grade', 'desc', 'pos', 'related', 'meaning')
+_KEY_SEP = '\x1f'
+
+
+def _key_bytes(key):
+    word, pos = key
+    return f"{word}{_KEY_SEP}{pos}".encode('utf-8')
+
+
+def _slot_count(n_keys):
+    size = 8
+    while size < n_keys * 2: size *= 2
+    return size
+
+
+def write_mapped_lexicon(path, version, entries, word_map, grammar_map, search_tables):
+    """
+    컴파일된 어휘(항목 + 단어/문법 지도 + /api/search 레코드·색인)를 읽기 전용 mmap 파일로 저장합니다. (원자적 교체)
+    :param version: 어휘 버전(SHA-256 hex) - 스냅샷과 짝이 맞는지 확인하는 데 사용
+    :param search_tables: {'word' | 'grammar': (검색 레코드 리스트, NgramSearchIndex, JamoPrefixIndex)}
+    """
+    heap = bytearray()
+    heap_index = {}
+
+    def add_bytes(data):
+        offset = heap_index.get(data)
+        if offset is None:
+            offset = heap_index[data] = len(heap)
+            heap.extend(data)
+        return offset, len(data)
+
+    def add_string(text):
+        if text is None: return 0, NO_STRING
+        return add_bytes(text.encode('utf-8'))
+
+    entry_blob = bytearray()
+    for entry in entries:
+        fields = []
+        for text in (entry.desc, entry.meaning, entry.raw_pos, entry.grammar_class):
+            fields.extend(add_string(text))
+        entry_blob.extend(ENTRY.pack(int(entry.uid), entry.level, *fields))
+
+    codes = []
+
+    def build_table(items, n_keys):
+        """(키 bytes, 정수 목록) -> 키 개수 + 개방 주소 해시 테이블 (정수 목록은 codes 배열에 이어 붙임)"""
+        n_slots = _slot_count(n_keys)
+        slots = [None] * n_slots
+        mask = n_slots - 1
+        key_count = 0
+        for key_data, row_codes in items:
+            key_count += 1
+            key_offset, key_len = add_bytes(key_data)
+            i = zlib.crc32(key_data) & mask
+            while slots[i] is not None: i = (i + 1) & mask
+            slots[i] = (key_offset, key_len, len(codes), len(row_codes))
+            codes.extend(row_codes)
+        blob = bytearray(COUNT.pack(key_count))
+        for slot in slots:
+            blob.extend(SLOT.pack(*(slot or (0, NO_STRING, 0, 0))))
+        return n_slots, blob
+
+    def build_search_table(offset, records, ngram_index, prefix_index):
+        """검색 테이블 하나 -> (헤더 + 본문 bytes). offset은 이 테이블이 파일에서 시작하는 위치"""
+        record_blob, text_blob = bytearray(), bytearray()
+        n_texts = 0
+        for record, texts in zip(records, ngram_index.documents):
+            fields = []
+            for field in RECORD_FIELDS:
+                fields.extend(add_string(record.get(field)))
+            record_blob.extend(RECORD.pack(int(record['uid']), *fields, n_texts, len(texts)))
+            for text in texts:
+                text_blob.extend(TEXT.pack(*add_string(text)))
+            n_texts += len(texts)
+        order_blob = array('H', ngram_index.sort_keys).tobytes()
+        gram_slots, gram_blob = build_table(((gram.encode('utf-8'), docs) for gram, docs in ngram_index.postings.items()),
+                                            len(ngram_index.postings))
+        stem_slots, stem_blob = build_table(((stem.encode('utf-8'), docs) for stem, docs in ngram_index.stem_postings.items()),
+                                            len(ngram_index.stem_postings))
+        jamo_blob = bytearray()
+        for key, doc_id in zip(prefix_index.keys, prefix_index.doc_ids):
+            jamo_blob.extend(JAMO.pack(*add_string(key), doc_id))
+
+        records_off = offset + SEARCH.size
+        texts_off = records_off + len(record_blob)
+        orders_off = texts_off + len(text_blob)
+        gram_off = orders_off + len(order_blob)
+        stem_off = gram_off + len(gram_blob)
+        jamo_off = stem_off + len(stem_blob)
+        header = SEARCH.pack(len(records), ngram_index.max_n, records_off, texts_off, orders_off,
+                             gram_slots, gram_off, stem_slots, stem_off, len(prefix_index.keys), jamo_off)
+        return header + record_blob + text_blob + order_blob + gram_blob + stem_blob + jamo_blob
+
+    word_slots, word_blob = build_table(((_key_bytes(key), row_codes) for key, row_codes in word_map.items()), len(word_map))
+    grammar_slots, grammar_blob = build_table(((_key_bytes(key), row_codes) for key, row_codes in grammar_map.items()), len(grammar_map))
+
+    entries_off = HEADER.size
+    word_off = entries_off + len(entry_blob)
+    grammar_off = word_off + len(word_blob)
+    search_off = grammar_off + len(grammar_blob)
+    search_blobs = []
+    offset = search_off
+    for search_type in SEARCH_TYPES:
+        search_blobs.append(build_search_table(offset, *search_tables[search_type]))
+        offset += len(search_blobs[-1])
+    codes_blob = struct.pack(f'<{len(codes)}i', *codes)
+    codes_off = offset
+    heap_off = codes_off + len(codes_blob)
+    header = HEADER.pack(MAGIC, bytes.fromhex(version), len(entries), entries_off,
+                         word_slots, word_off, grammar_slots, grammar_off, search_off, codes_off, heap_off)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for blob in (header, entry_blob, word_blob, grammar_blob, *search_blobs, codes_blob, heap):
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class _MappedFile:
+    """
+    mmap 버퍼와 공통 영역(항목 테이블, 행 번호 배열, 문자열 힙) 위치.
+    모든 뷰는 MappedLexicon 이 아니라 이 객체만 참조하므로 참조 순환이 없고,
+    마지막 뷰까지 해제되면 참조 계수만으로 바로 닫힙니다. (가비지 컬렉터를 기다리지 않음)
+    """
+
+    def __init__(self, buffer, header):
+        self._buffer = buffer
+        (_, _, self.entry_count, self._entries_off, _, _, _, _, _, self._codes_off, self._heap_off) = header
+        self._finalizer = weakref.finalize(self, buffer.close)
+
+    def string(self, offset, length):
+        if length == NO_STRING: return None
+        start = self._heap_off + offset
+        return self._buffer[start:start + length].decode('utf-8')
+
+    def codes(self, start, count):
+        return struct.unpack_from(f'<{count}i', self._buffer, self._codes_off + start * 4)
+
+    def close(self):
+        self._finalizer()
+
+
+class MappedLexicon:
+    """
+    write_mapped_lexicon 으로 만든 파일을 mmap으로 열어 둡니다.
+    여러 워커 프로세스가 같은 파일을 열면 운영체제 페이지 캐시의 같은 페이지를 공유하므로,
+    워커를 늘려도 어휘 지도 메모리는 거의 늘지 않습니다.
+
+    어휘를 다시 불러와 상태가 교체되어도, 이전 상태를 잡고 있는 요청이 남아 있을 수 있으므로 명시적으로 닫지 않습니다.
+    매핑(과 파일 디스크립터)은 이전 상태와 그 뷰(항목, 지도, 검색 테이블)를 잡고 있던 마지막 참조가 사라질 때 닫힙니다.
+    """
+
+    def __init__(self, buffer, header):
+        self._file = mapped_file = _MappedFile(buffer, header)
+        (_, _, self.entry_count, _, word_slots, word_off, grammar_slots, grammar_off, search_off, _, _) = header
+        self.entries = MappedEntryTable(mapped_file)
+        self.word_map = MappedLexiconMap(mapped_file, word_slots, word_off)
+        self.grammar_map = MappedLexiconMap(mapped_file, grammar_slots, grammar_off)
+        self.search_tables = {}
+        for search_type in SEARCH_TYPES:
+            search_header = SEARCH.unpack_from(buffer, search_off)
+            table = MappedSearchTable(mapped_file, search_header)
+            self.search_tables[search_type] = table
+            search_off = table.end
+
+    @classmethod
+    def open(cls, path, version):
+        """파일이 없거나 버전이 다르면 None"""
+        if not path or not os.path.exists(path): return None
+        try:
+            with open(path, 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header = HEADER.unpack_from(buffer, 0)
+            if header[0] != MAGIC or header[1] != bytes.fromhex(version):
+                buffer.close()
+                return None
+            return cls(buffer, header)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️ 어휘 mmap 파일 열기 실패: {e}")
+            return None
+
+    def close(self):
+        """아직 뷰를 쓰는 곳이 없을 때만 호출하세요. (닫힌 뒤 뷰에 접근하면 ValueError)"""
+        self._file.close()
+
+
+class MappedEntryTable:
+    """행 번호 -> LexiconEntry (접근할 때마다 mmap에서 읽어 만듭니다)"""
+
+    def __init__(self, mapped_file):
+        self._file = mapped_file
+
+    def __len__(self):
+        return self._file.entry_count
+
+    def __getitem__(self, row_id):
+        if not 0 <= row_id < self._file.entry_count: raise IndexError(row_id)
+        mapped_file = self._file
+        (uid, level, desc_off, desc_len, meaning_off, meaning_len, pos_off, pos_len,
+         class_off, class_len) = ENTRY.unpack_from(mapped_file._buffer, mapped_file._entries_off + row_id * ENTRY.size)
+        return LexiconEntry(uid, level, mapped_file.string(desc_off, desc_len), mapped_file.string(meaning_off, meaning_len),
+                            raw_pos=mapped_file.string(pos_off, pos_len), grammar_class=mapped_file.string(class_off, class_len))
+
+    def __iter__(self):
+        for row_id in range(len(self)): yield self[row_id]
+
+
+class MappedLexiconMap:
+    """(키, 품사) -> 행 번호 tuple. dict와 같은 방식(get, in, [], items)으로 조회합니다."""
+
+    def __init__(self, mapped_file, n_slots, offset):
+        self._file = mapped_file
+        self._n_slots = n_slots
+        (self._length,) = COUNT.unpack_from(mapped_file._buffer, offset)
+        self._offset = offset + COUNT.size
+
+    @staticmethod
+    def _encode_key(key):
+        return _key_bytes(key)
+
+    @staticmethod
+    def _decode_key(text):
+        word, pos = text.split(_KEY_SEP)
+        return word, pos
+
+    def _slot(self, i):
+        return SLOT.unpack_from(self._file._buffer, self._offset + i * SLOT.size)
+
+    def _find(self, key):
+        key_data = self._encode_key(key)
+        buffer = self._file._buffer
+        heap_off = self._file._heap_off
+        mask = self._n_slots - 1
+        i = zlib.crc32(key_data) & mask
+        while True:
+            key_offset, key_len, start, count = self._slot(i)
+            if key_len == NO_STRING: return None
+            if key_len == len(key_data) and buffer[heap_off + key_offset:heap_off + key_offset + key_len] == key_data:
+                return self._file.codes(start, count)
+            i = (i + 1) & mask
+
+    def get(self, key, default=None):
+        codes = self._find(key)
+        return default if codes is None else codes
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        codes = self._find(key)
+        if codes is None: raise KeyError(key)
+        return codes
+
+    def items(self):
+        for i in range(self._n_slots):
+            key_offset, key_len, start, count = self._slot(i)
+            if key_len == NO_STRING: continue
+            yield self._decode_key(self._file.string(key_offset, key_len)), self._file.codes(start, count)
+
+    def __iter__(self):
+        for key, _ in self.items(): yield key
+
+    def keys(self):
+        return iter(self)
+
+    def __len__(self):
+        return self._length
+
+
+class MappedPostings(MappedLexiconMap):
+    """n-gram(또는 어간) 문자열 -> 정렬된 문서 id tuple (NgramSearchIndex 의 포스팅 dict 대신 사용)"""
+
+    @staticmethod
+    def _encode_key(key):
+        return key.encode('utf-8')
+
+    @staticmethod
+    def _decode_key(text):
+        return text
+
+
+class MappedSequence:
+    """길이와 읽기 함수로 만든 읽기 전용 시퀀스 (인덱싱, len, 반복, bisect 지원)"""
+
+    def __init__(self, length, getter):
+        self._length = length
+        self._getter = getter
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._length: raise IndexError(i)
+        return self._getter(i)
+
+    def __iter__(self):
+        for i in range(self._length): yield self._getter(i)
+
+
+class MappedSearchTable:
+    """
+    /api/search 대상 하나(단어 또는 문법)의 결과 레코드·검색 문자열·n-gram 포스팅·자모 접두 배열.
+    NgramSearchIndex.from_tables / JamoPrefixIndex.from_tables 에 그대로 넘겨 씁니다.
+    """
+
+    def __init__(self, mapped_file, header):
+        (self.doc_count, self.max_n, records_off, texts_off, orders_off,
+         gram_slots, gram_off, stem_slots, stem_off, jamo_count, jamo_off) = header
+        self.end = jamo_off + jamo_count * JAMO.size
+        # 정렬 키(등급 순서)는 정렬할 때마다 읽으므로 프로세스 메모리로 복사해 둡니다. (문서당 2바이트)
+        self.orders = array('H')
+        self.orders.frombytes(mapped_file._buffer[orders_off:orders_off + self.doc_count * 2])
+        # 시퀀스의 읽기 함수는 이 테이블이 아닌 별도 reader 에 묶어 참조 순환을 만들지 않습니다. (_MappedFile 참고)
+        reader = _SearchTableReader(mapped_file, records_off, texts_off, jamo_off)
+        self.records = MappedSequence(self.doc_count, reader.record)
+        self.documents = MappedSequence(self.doc_count, reader.document)
+        self.postings = MappedPostings(mapped_file, gram_slots, gram_off)
+        self.stem_postings = MappedPostings(mapped_file, stem_slots, stem_off)
+        self.jamo_keys = MappedSequence(jamo_count, reader.jamo_key)
+        self.jamo_doc_ids = MappedSequence(jamo_count, reader.jamo_doc_id)
+
+
+class _SearchTableReader:
+    """MappedSearchTable 의 레코드·검색 문자열·자모 배열 읽기 함수"""
+
+    def __init__(self, mapped_file, records_off, texts_off, jamo_off):
+        self._file = mapped_file
+        self._records_off = records_off
+        self._texts_off = texts_off
+        self._jamo_off = jamo_off
+
+    def _record_fields(self, doc_id):
+        return RECORD.unpack_from(self._file._buffer, self._records_off + doc_id * RECORD.size)
+
+    def record(self, doc_id):
+        """검색 결과 dict (단어 레코드에는 related 가 없음)"""
+        fields = self._record_fields(doc_id)
+        record = {}
+        for i, field in enumerate(RECORD_FIELDS):
+            text = self._file.string(fields[1 + i * 2], fields[2 + i * 2])
+            if text is not None: record[field] = text
+        record['uid'] = fields[0]
+        return record
+
+    def document(self, doc_id):
+        """정규화된 검색 대상 문자열 리스트 (대표형 + 관련형)"""
+        fields = self._record_fields(doc_id)
+        start, count = fields[-2], fields[-1]
+        buffer, mapped_file = self._file._buffer, self._file
+        return [mapped_file.string(*TEXT.unpack_from(buffer, self._texts_off + (start + i) * TEXT.size)) for i in range(count)]
+
+    def jamo_key(self, i):
+        offset, length, _ = JAMO.unpack_from(self._file._buffer, self._jamo_off + i * JAMO.size)
+        return self._file.string(offset, length)
+
+    def jamo_doc_id(self, i):
+        return JAMO.unpack_from(self._file._buffer, self._jamo_off + i * JAMO.size)[2]
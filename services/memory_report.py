@@ -0,0 +1,85 @@
+import argparse
+import gc
+import os
+import sys
+import time
+
+
+def current_rss_kb():
+    """현재 프로세스의 상주 메모리(VmRSS, KB). /proc 가 없으면 최대 RSS로 대신합니다."""
+    try:
+        with open(f"/proc/{os.getpid()}/status", encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def deep_sizeof(obj, seen=None):
+    """컨테이너·__slots__ 객체를 따라가며 sys.getsizeof를 합산합니다. (공유 객체는 한 번만)"""
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        cur = stack.pop()
+        if id(cur) in seen: continue
+        seen.add(id(cur))
+        total += sys.getsizeof(cur)
+        if isinstance(cur, dict):
+            stack.extend(cur.keys()); stack.extend(cur.values())
+        elif isinstance(cur, (list, tuple, set, frozenset)):
+            stack.extend(cur)
+        else:
+            for slot in getattr(type(cur), '__slots__', ()):
+                if hasattr(cur, slot): stack.append(getattr(cur, slot))
+            if hasattr(cur, '__dict__') and not isinstance(cur, type):
+                stack.append(cur.__dict__)
+    return total
+
+
+def main(argv=None):
+    """
+    워커 1개가 어휘 데이터를 올렸을 때의 메모리 사용량을 측정합니다.
+    사용법: python -m services.memory_report [--no-snapshot]
+    """
+    parser = argparse.ArgumentParser(description="어휘 데이터 메모리 사용량 측정")
+    parser.add_argument('--no-snapshot', action='store_true', help="스냅샷을 쓰지 않고 CSV에서 새로 빌드")
+    args = parser.parse_args(argv)
+
+    from config import Config
+    if args.no_snapshot:
+        Config.LEXICON_SNAPSHOT_PATH = os.path.join('/nonexistent', 'lexicon.pkl')
+
+    from services.morph_service import MorphService
+    from services.grade_database import GradeDatabase
+
+    morph_service = MorphService()
+    gc.collect()
+    rss_before = current_rss_kb()
+    started = time.time()
+    database = GradeDatabase()
+    database.initialize(morph_service)
+    elapsed = time.time() - started
+    gc.collect()
+    rss_after = current_rss_kb()
+
+    print(f"어휘 로드: {elapsed:.2f}s (출처: {database.lexicon_source})")
+    print(f"RSS: Kiwi 로드 후 {rss_before / 1024:.1f} MB -> 어휘 로드 후 {rss_after / 1024:.1f} MB "
+          f"(+{(rss_after - rss_before) / 1024:.1f} MB)")
+    seen = set()
+    for name in ('word_map', 'grammar_map', 'expression_map', 'lexicon_entries', 'word_search_records', 'word_search_index',
+                 'word_prefix_index', 'grammar_search_records', 'grammar_search_index', 'grammar_prefix_index'):
+        if hasattr(database.state, name):
+            print(f"  {name}: {deep_sizeof(getattr(database.state, name), seen) / 1024 / 1024:.2f} MB")
+    if database.mapped_lexicon:
+        print(f"  mmap 공유 파일: {os.path.getsize(Config.LEXICON_MMAP_PATH) / 1024 / 1024:.2f} MB ({Config.LEXICON_MMAP_PATH})")
+    print(f"  pandas 로드 여부: {'pandas' in sys.modules}")
+    print(f"  gc 추적 객체 수: {len(gc.get_objects())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import threading
+
+
+class Metrics:
+    """
+    프로세스 단위의 간단한 카운터 모음. (/api/metrics 에서 조회)
+    캐시처럼 자체 통계를 가진 객체는 register_gauge로 조회 함수를 등록합니다.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Metrics, cls).__new__(cls)
+            cls._instance._counters = {}
+            cls._instance._gauges = {}
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def get(self, name):
+        return self._counters.get(name, 0)
+
+    def register_gauge(self, name, func):
+        self._gauges[name] = func
+
+    def snapshot(self):
+        with self._lock:
+            result = {'counters': dict(self._counters)}
+        gauges = {}
+        for name, func in list(self._gauges.items()):
+            try: gauges[name] = func()
+            except Exception as e: gauges[name] = {'error': str(e)}
+        result['gauges'] = gauges
+        return result
+
+
+metrics = Metrics()
@@ -1,4 +1,4 @@
-from kiwipiepy import Kiwi
+from config import Config
 
 class MorphService:
     _instance = None
@@ -18,7 +18,9 @@ class MorphService:
 
     def _load_kiwi(self):
         try:
-            self.analyzer = Kiwi()
+            from kiwipiepy import Kiwi
+            # num_workers: 여러 문장을 한 번에 넘기는 반복자 API의 내부 스레드 수 (0이면 Kiwi 기본값 = 가용 코어 수)
+            self.analyzer = Kiwi(num_workers=Config.KIWI_NUM_WORKERS or None)
         except Exception as e:
             print(f"⚠️ Kiwi 로드 실패: {e}")
             self.analyzer = None
@@ -32,3 +34,24 @@ class MorphService:
             # Mock implementation if needed, or just return empty
             return []
         return self.analyzer.analyze(text)
+
+
+    def split_sentences(self, text):
+        """
+        원문을 문단(줄) 단위로 훑으며 Kiwi 문장 분리기로 나눈 문장 구간을
+        원문 기준 (start, end) 오프셋으로 하나씩 돌려줍니다. (제너레이터)
+        """
+        if not text: return
+        pos = 0
+        length = len(text)
+        while pos < length:
+            line_end = text.find('\n', pos)
+            if line_end == -1: line_end = length
+            paragraph = text[pos:line_end]
+            if paragraph.strip():
+                if self.use_mock or not self.analyzer:
+                    yield pos, line_end
+                else:
+                    for sent in self.analyzer.split_into_sents(paragraph, return_sub_sents=False):
+                        yield pos + sent.start, pos + sent.end
+            pos = line_end + 1
@@ -0,0 +1,92 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config import Config
+
+# 워커 프로세스마다 하나씩 유지되는 분석 서비스 (initializer에서 생성)
+_worker_analysis_service = None
+
+
+def _init_worker():
+    """
+    워커 프로세스 초기화: Kiwi와 어휘 데이터를 한 번만 올려 둡니다.
+    fork 방식이면 부모 프로세스의 초기화된 싱글턴을 그대로 물려받고,
+    spawn 방식이면 어휘 스냅샷에서 빠르게 다시 불러옵니다.
+    """
+    global _worker_analysis_service
+    from services.container import container
+    _worker_analysis_service = container.analysis
+
+
+def _grade_document(text):
+    return _worker_analysis_service.get_document_grade(text)
+
+
+def _warm_up():
+    return _worker_analysis_service is not None
+
+
+class ParallelGradingService:
+    """
+    여러 업로드 파일의 분석을 프로세스 풀에 나누어 동시에 수행합니다.
+    결과는 입력 순서대로 반환되며, 풀을 쓸 수 없으면 현재 프로세스에서 순차 처리합니다.
+    """
+
+    def __init__(self, pool_size=None):
+        self.pool_size = Config.GRADE_POOL_SIZE if pool_size is None else pool_size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    start_method = Config.GRADE_POOL_START_METHOD or None
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.pool_size,
+                        mp_context=multiprocessing.get_context(start_method),
+                        initializer=_init_worker
+                    )
+        return self._executor
+
+    def warm_up(self):
+        """워커를 미리 띄워 첫 업로드 요청에서 초기화 비용을 치르지 않도록 합니다."""
+        if self.pool_size <= 1: return
+        executor = self._get_executor()
+        for future in [executor.submit(_warm_up) for _ in range(self.pool_size)]:
+            future.result()
+
+    def grade_documents(self, texts, analysis_service):
+        """
+        :param texts: 분석할 문서 텍스트 리스트
+        :param analysis_service: 순차 처리(파일 1개, 풀 비활성화, 풀 오류) 시 사용할 AnalysisService
+        :return: [(grade_stats, analysis_data, debug_log), ...] (입력 순서 유지)
+        """
+        return list(self.iter_grade_documents(texts, analysis_service))
+
+    def iter_grade_documents(self, texts, analysis_service):
+        """
+        grade_documents 와 같지만, 앞 문서부터 결과가 나오는 대로 하나씩 돌려줍니다. (스트리밍 응답용)
+        풀에서는 모든 문서를 한꺼번에 제출하고, 순서대로 완료를 기다립니다.
+        """
+        texts = list(texts)
+        if self.pool_size <= 1 or len(texts) <= 1:
+            for text in texts: yield analysis_service.get_document_grade(text)
+            return
+        done = 0
+        try:
+            for result in self._get_executor().map(_grade_document, texts):
+                done += 1
+                yield result
+        except BrokenProcessPool as e:
+            print(f"⚠️ 병렬 분석 워커 오류, 순차 처리로 전환합니다: {e}")
+            with self._lock:
+                self._executor = None
+            for text in texts[done:]: yield analysis_service.get_document_grade(text)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
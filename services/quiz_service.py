@@ -1,4 +1,3 @@
-from google import genai
 import json
 from config import Config
 
@@ -8,12 +7,9 @@ class QuizService:
         self._init_ai()
 
     def _init_ai(self):
-        api_key = Config.GOOGLE_API_KEY
-        if api_key:
-            try:
-                self.client = genai.Client(api_key=api_key)
-            except Exception as e:
-                print(f"⚠️ QuizService AI Init Failed: {e}")
+        # 프로세스 공용 클라이언트 (google.genai 는 키가 있을 때만 import)
+        from services.container import container
+        self.client = container.genai_client
 
     def generate_quiz_item(self, target, level, quiz_type, context_sentence, user_prompt=""):
         if not self.client: return {"error": "AI 모델 미초기화"}
@@ -0,0 +1,128 @@
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from config import Config
+
+_RESULT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ResultStore:
+    """
+    분석 결과 화면의 하이라이트 원문을 나중에 페이지 단위로 내려주기 위해 파일별 결과를 보관합니다.
+
+    결과 페이지 HTML에는 세그먼트를 싣지 않고 결과 ID만 넣으며, 브라우저가 /api/results/<id>/segments 로
+    run(런 길이 부호화한 세그먼트)과 그 구간의 토큰 열만 받아 그립니다.
+    결과는 RESULT_STORE_DIR 에 pickle로 저장해 다른 워커 프로세스에서도 읽을 수 있고,
+    최근 결과 몇 개는 메모리에 두며, RESULT_TTL 초가 지나면 지웁니다.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ResultStore, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized: return
+        self.store_dir = Config.RESULT_STORE_DIR
+        self.ttl = Config.RESULT_TTL
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._initialized = True
+
+    def save(self, files):
+        """
+        :param files: [{'filename': 파일명, 'table': 파일 하나의 TokenTable, 'runs': encode_segments 결과}, ...]
+        :return: 결과 ID
+        """
+        result_id = uuid.uuid4().hex
+        result = {'created_at': time.time(), 'files': files}
+        path = self._path(result_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 분석 결과 저장 실패: {e}")
+        self._remember(result_id, result)
+        self._purge_expired()
+        return result_id
+
+    def load(self, result_id):
+        """결과 dict (없거나 만료되었으면 None)"""
+        if not _RESULT_ID_PATTERN.match(result_id or ""): return None
+        with self._lock:
+            result = self._cache.get(result_id)
+            if result is not None: self._cache.move_to_end(result_id)
+        if result is None:
+            try:
+                with open(self._path(result_id), 'rb') as f:
+                    result = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return None
+            self._remember(result_id, result)
+        if result['created_at'] + self.ttl < time.time(): return None
+        return result
+
+    def segments_page(self, result_id, file_index=0, start=None, end=None, page=0, per_page=None):
+        """
+        파일 하나의 run을 [start, end) 구간 또는 page 번호로 잘라, 그 run들이 가리키는 토큰 열과 함께 돌려줍니다.
+        :return: dict 또는 None (결과·파일이 없을 때)
+        """
+        result = self.load(result_id)
+        if result is None or not 0 <= file_index < len(result['files']): return None
+        item = result['files'][file_index]
+        runs, table = item['runs'], item['table']
+        # 한 번에 내려주는 run 수는 SEGMENT_PAGE_SIZE 를 넘지 않습니다.
+        per_page = min(per_page or Config.SEGMENT_PAGE_SIZE, Config.SEGMENT_PAGE_SIZE)
+        if start is None: start = page * per_page
+        start = max(0, start)
+        end = min(len(runs), start + per_page if end is None else end, start + Config.SEGMENT_PAGE_SIZE)
+        page_runs = runs[start:end]
+
+        graded = [run for run in page_runs if isinstance(run, list)]
+        token_start = min((run[1] for run in graded), default=0)
+        token_end = max((run[1] + run[2] for run in graded), default=0)
+        tokens = table.slice(token_start, token_end).to_columns()
+        tokens['base'] = token_start
+        return {
+            'file': file_index, 'filename': item['filename'], 'start': start, 'end': end, 'total': len(runs),
+            'next': end if end < len(runs) else None, 'runs': page_runs, 'tokens': tokens,
+        }
+
+    def _remember(self, result_id, result):
+        with self._lock:
+            self._cache[result_id] = result
+            self._cache.move_to_end(result_id)
+            while len(self._cache) > Config.RESULT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _path(self, result_id):
+        return os.path.join(self.store_dir, result_id + '.pkl')
+
+    def _purge_expired(self):
+        """만료된 결과 파일을 지웁니다. (최대 1분에 한 번, 파일 수정 시각 기준)"""
+        now = time.time()
+        if now - self._last_purge < 60: return
+        self._last_purge = now
+        try:
+            names = os.listdir(self.store_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.store_dir, name)
+            try:
+                if os.path.getmtime(path) + self.ttl < now: os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            for result_id in [key for key, result in self._cache.items() if result['created_at'] + self.ttl < now]:
+                del self._cache[result_id]
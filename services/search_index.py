@@ -0,0 +1,263 @@
+import bisect
+import heapq
+import re
+from array import array
+
+from services.hangul import decompose_jamo
+
+_SEARCH_STRIP_RE = re.compile(r'[\s\-\~\(\)\[\]\.\?\/ㆍ]')
+
+# 순위 (작을수록 상위)
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+RANK_STEM_IN_QUERY = 3
+
+
+def normalize_search_text(text):
+    """검색용 정규화: 공백, 기호(-, ~, 괄호, 마침표 등)를 제거합니다."""
+    if not isinstance(text, str): return ""
+    return _SEARCH_STRIP_RE.sub('', text)
+
+
+class NgramSearchIndex:
+    """
+    정규화된 표제어/관련형에 대한 문자 n-gram(1~3) 역색인.
+
+    문서(doc)는 DataFrame의 행 하나이며, 한 문서는 여러 개의 검색 대상 문자열
+    (대표형 + 관련형 등)을 가질 수 있습니다. 질의 시에는 전체 행을 훑지 않고
+    n-gram 포스팅 리스트의 교집합으로 후보를 좁힌 뒤, 후보만 실제 부분 문자열 검사를 합니다.
+    """
+
+    def __init__(self, documents, sort_keys=None, max_n=3):
+        """
+        :param documents: 문서별 정규화된 문자열 리스트의 리스트
+        :param sort_keys: 문서별 2차 정렬 키 (예: 등급 숫자). 없으면 문서 순서만 사용
+        :param max_n: 색인할 최대 n-gram 길이
+        """
+        self.documents = documents
+        self.sort_keys = sort_keys if sort_keys is not None else [0] * len(documents)
+        self.max_n = max_n
+        self.postings = {}
+        # 어간('다' 제거형, 2자 이상) -> 문서 (질의 안에 표제어가 포함되는 역방향 매칭용)
+        self.stem_postings = {}
+
+        for doc_id, texts in enumerate(documents):
+            for text in texts:
+                for gram in self._ngrams(text):
+                    self.postings.setdefault(gram, set()).add(doc_id)
+                stem = text[:-1] if text.endswith('다') else text
+                if len(stem) >= 2:
+                    self.stem_postings.setdefault(stem, set()).add(doc_id)
+
+        # 빌드가 끝나면 포스팅을 정렬된 array('I')로 굳힙니다. (int set 보다 훨씬 작음, 교집합은 질의 시점에만 계산)
+        self.postings = {gram: self._freeze(docs) for gram, docs in self.postings.items()}
+        self.stem_postings = {stem: self._freeze(docs) for stem, docs in self.stem_postings.items()}
+
+    @classmethod
+    def from_tables(cls, documents, sort_keys, postings, stem_postings, max_n=3):
+        """이미 만든 문서·포스팅(예: MappedSearchTable 의 읽기 전용 뷰)으로 색인을 엽니다."""
+        index = cls.__new__(cls)
+        index.documents = documents
+        index.sort_keys = sort_keys
+        index.max_n = max_n
+        index.postings = postings
+        index.stem_postings = stem_postings
+        return index
+
+    @staticmethod
+    def _freeze(doc_ids):
+        return array('I', sorted(doc_ids))
+
+    @staticmethod
+    def _contains(posting, doc_id):
+        i = bisect.bisect_left(posting, doc_id)
+        return i < len(posting) and posting[i] == doc_id
+
+    def _ngrams(self, text):
+        grams = set()
+        for n in range(1, self.max_n + 1):
+            for i in range(len(text) - n + 1):
+                grams.add(text[i:i + n])
+        return grams
+
+    def _substring_candidates(self, query):
+        """query를 부분 문자열로 포함할 수 있는 문서 집합 (max_n 초과 길이는 검증 필요)."""
+        if len(query) <= self.max_n:
+            return self.postings.get(query, ())
+        result = None
+        # 희소한 포스팅부터 교집합을 구해 중간 집합 크기를 줄입니다. (이후 포스팅은 이분 탐색으로 확인)
+        grams = sorted({query[i:i + self.max_n] for i in range(len(query) - self.max_n + 1)},
+                       key=lambda g: len(self.postings.get(g, ())))
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if not posting: return set()
+            if result is None: result = set(posting)
+            else: result = {doc_id for doc_id in result if self._contains(posting, doc_id)}
+            if not result: return set()
+        return result
+
+    def _rank(self, doc_id, query):
+        best = None
+        for text in self.documents[doc_id]:
+            if text == query: return RANK_EXACT
+            if text.startswith(query): rank = RANK_PREFIX
+            elif query in text: rank = RANK_SUBSTRING
+            else: continue
+            if best is None or rank < best: best = rank
+        return best
+
+    def search(self, queries, limit=10, match_stem_within_query=False):
+        """
+        :param queries: 정규화된 질의 후보들 (예: 원형 + 어미를 뗀 어간)
+        :param match_stem_within_query: True이면 표제어 어간이 질의 안에 포함되는 경우도 매칭
+        :return: (정확 일치 > 접두 > 부분 > 역방향) 순위, 정렬 키, 문서 순서로 정렬된 문서 id 리스트
+        """
+        ranks = {}
+        for query in queries:
+            if not query: continue
+            for doc_id in self._substring_candidates(query):
+                rank = self._rank(doc_id, query)
+                if rank is not None and (doc_id not in ranks or rank < ranks[doc_id]):
+                    ranks[doc_id] = rank
+
+            if match_stem_within_query:
+                for i in range(len(query)):
+                    for j in range(i + 2, len(query) + 1):
+                        for doc_id in self.stem_postings.get(query[i:j], ()):
+                            if doc_id not in ranks: ranks[doc_id] = RANK_STEM_IN_QUERY
+
+        ordered = sorted(ranks, key=lambda d: (ranks[d], self.sort_keys[d], d))
+        return ordered[:limit] if limit else ordered
+
+
+class JamoPrefixIndex:
+    """
+    자모 단위 접두 검색용 정렬 배열.
+
+    입력 중인 음절('가ㅂ', 'ㄱ' 등)도 자모로 풀면 완성형 표제어의 접두가 되므로,
+    (자모열, 문서 id) 정렬 배열에서 이분 탐색으로 범위를 찾고 등급 순 상위 k개를 반환합니다.
+    짧은 접두(자모 2개 이하)는 결과 범위가 넓으므로 결과를 메모해 둡니다.
+    """
+
+    _MEMO_MAX_PREFIX = 2
+
+    def __init__(self, documents, sort_keys=None):
+        self.sort_keys = sort_keys if sort_keys is not None else [0] * len(documents)
+        entries = set()
+        for doc_id, texts in enumerate(documents):
+            for text in texts:
+                jamo = decompose_jamo(text)
+                if jamo: entries.add((jamo, doc_id))
+        entries = sorted(entries)
+        self.keys = [k for k, _ in entries]
+        self.doc_ids = [d for _, d in entries]
+        self._memo = {}
+
+    @classmethod
+    def from_tables(cls, keys, doc_ids, sort_keys):
+        """이미 정렬된 (자모열, 문서 id) 배열(예: MappedSearchTable 의 읽기 전용 뷰)로 색인을 엽니다."""
+        index = cls.__new__(cls)
+        index.sort_keys = sort_keys
+        index.keys = keys
+        index.doc_ids = doc_ids
+        index._memo = {}
+        return index
+
+    def search(self, query, limit=10):
+        prefix = decompose_jamo(query)
+        if not prefix: return []
+        memo_key = (prefix, limit)
+        if memo_key in self._memo: return self._memo[memo_key]
+
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + '\uffff', lo)
+        docs = {self.doc_ids[i] for i in range(lo, hi)}
+        rank_key = lambda d: (self.sort_keys[d], d)
+        ordered = heapq.nsmallest(limit, docs, key=rank_key) if limit else sorted(docs, key=rank_key)
+
+        if len(prefix) <= self._MEMO_MAX_PREFIX: self._memo[memo_key] = ordered
+        return ordered
+
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    인접 전치를 포함한 편집 거리(OSA). max_distance를 넘으면 max_distance + 1을 반환합니다.
+    """
+    if a == b: return 0
+    if abs(len(a) - len(b)) > max_distance: return max_distance + 1
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev_prev is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_distance: return max_distance + 1
+        prev_prev, prev = prev, cur
+    return prev[-1] if prev[-1] <= max_distance else max_distance + 1
+
+
+class FuzzyIndex:
+    """
+    오타 허용 검색용 자모 단위 대칭 삭제(symmetric deletion) 색인.
+
+    색인 시 각 표제어 자모열(앞 prefix_length 자모)에서 최대 max_distance개를 지운 변형을 모두
+    등록해 두고, 질의도 같은 방식으로 지운 변형만 조회합니다. 조회된 후보에 대해서만
+    실제 편집 거리를 계산하므로 전체 행을 채점하지 않고도 제한된 시간 안에 답합니다.
+    """
+
+    def __init__(self, terms, max_distance=2, prefix_length=7):
+        """
+        :param terms: {정규화된 표제어: [문서 id, ...]}
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms = list(terms.keys())
+        self.term_docs = [tuple(terms[t]) for t in self.terms]
+        self.term_jamo = [decompose_jamo(t) for t in self.terms]
+        self.deletes = {}
+        for term_id, jamo in enumerate(self.term_jamo):
+            for variant in self._delete_variants(jamo):
+                bucket = self.deletes.get(variant)
+                if bucket is None: self.deletes[variant] = [term_id]
+                elif bucket[-1] != term_id: bucket.append(term_id)
+
+    def _delete_variants(self, jamo):
+        jamo = jamo[:self.prefix_length]
+        variants = {jamo}
+        frontier = {jamo}
+        for _ in range(self.max_distance):
+            next_frontier = set()
+            for word in frontier:
+                if len(word) <= 1: continue
+                for i in range(len(word)):
+                    next_frontier.add(word[:i] + word[i + 1:])
+            variants |= next_frontier
+            frontier = next_frontier
+        return variants
+
+    def lookup(self, query, max_distance=None, limit=10):
+        """
+        :return: [(표제어, 거리, 문서 id 튜플), ...] 거리 오름차순
+        """
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        query_jamo = decompose_jamo(query)
+        if not query_jamo: return []
+
+        seen = set()
+        matches = []
+        for variant in self._delete_variants(query_jamo):
+            for term_id in self.deletes.get(variant, ()):
+                if term_id in seen: continue
+                seen.add(term_id)
+                distance = bounded_edit_distance(query_jamo, self.term_jamo[term_id], max_distance)
+                if distance <= max_distance:
+                    matches.append((distance, term_id))
+
+        matches.sort()
+        return [(self.terms[t], d, self.term_docs[t]) for d, t in matches[:limit]]
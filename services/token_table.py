@@ -0,0 +1,242 @@
+import bisect
+import sys
+from array import array
+from collections.abc import Mapping
+from services.levels import LEVEL_NONE
+
+# id 접두어 코드 (0 = id 없음, 화면에는 '-')
+ID_KINDS = ('', '단어', '문법', '표현')
+_ID_KIND_CODES = {kind: code for code, kind in enumerate(ID_KINDS)}
+
+# 토큰 하나를 dict로 볼 때의 기본 키 순서 (기존 analysis_data 항목과 동일)
+FIELDS = ('form', 'tag_code', 'tag_name', 'level', 'id', 'desc', 'offset_start', 'offset_len')
+
+
+def split_id(id_str):
+    """'단어#272' -> (1, '272'), '-' 또는 빈 값 -> (0, None)"""
+    if not id_str or id_str == '-' or '#' not in str(id_str): return 0, None
+    kind, uid = str(id_str).split('#', 1)
+    return _ID_KIND_CODES.get(kind, 0), uid
+
+
+class TokenTable:
+    """
+    프로파일링 결과를 토큰별 dict 대신 열(column) 배열로 보관합니다.
+
+    오프셋·등급·id 종류는 array에, 형태·품사·설명은 사전 항목의 문자열을 참조만 하는 리스트에 담고,
+    품사 코드는 intern 합니다. 템플릿/JSON에서는 table[i] 또는 순회로 얻는 TokenView가
+    기존 항목 dict처럼 동작하며, 필요한 값만 그때그때 열에서 읽습니다.
+    """
+    __slots__ = ('forms', 'tag_codes', 'tag_names', 'levels', 'id_kinds', 'uids', 'descs',
+                 'offset_starts', 'offset_lens', 'extras', 'filename_runs', 'lexicon_version')
+
+    def __init__(self, lexicon_version=""):
+        self.forms = []
+        self.tag_codes = []
+        self.tag_names = []
+        self.levels = array('b')
+        self.id_kinds = array('b')
+        self.uids = []
+        self.descs = []
+        self.offset_starts = array('q')
+        self.offset_lens = array('q')
+        # 일부 토큰에만 있는 값 (예: suggestions) -> {index: {key: value}}
+        self.extras = {}
+        # 파일별 구간 [(시작 index, 파일명), ...] (업로드 결과를 합칠 때 사용)
+        self.filename_runs = []
+        # 이 결과를 계산한 어휘 버전 (어휘를 다시 불러와도 어느 버전 결과인지 알 수 있도록)
+        self.lexicon_version = lexicon_version
+
+    def append(self, form, tag_code, tag_name, level, id_kind, uid, desc, offset_start, offset_len, **extras):
+        index = len(self.forms)
+        self.forms.append(form)
+        self.tag_codes.append(sys.intern(tag_code))
+        self.tag_names.append(tag_name)
+        self.levels.append(level or LEVEL_NONE)
+        self.id_kinds.append(_ID_KIND_CODES[id_kind] if uid not in (None, '') else 0)
+        self.uids.append(uid)
+        self.descs.append(desc)
+        self.offset_starts.append(offset_start or 0)
+        self.offset_lens.append(offset_len or 0)
+        if extras: self.extras[index] = extras
+        return index
+
+    def set(self, index, **fields):
+        """토큰 하나의 값을 바꿉니다. (AI/로컬 판별 결과 반영 등)"""
+        for key, value in fields.items():
+            if key == 'level': self.levels[index] = value or LEVEL_NONE
+            elif key == 'id': self.id_kinds[index], self.uids[index] = split_id(value)
+            elif key == 'desc': self.descs[index] = value
+            elif key == 'form': self.forms[index] = value
+            elif key == 'tag_code': self.tag_codes[index] = sys.intern(value)
+            elif key == 'tag_name': self.tag_names[index] = value
+            elif key == 'offset_start': self.offset_starts[index] = value
+            elif key == 'offset_len': self.offset_lens[index] = value
+            else: self.extras.setdefault(index, {})[key] = value
+
+    def get_id(self, index):
+        kind = self.id_kinds[index]
+        return f"{ID_KINDS[kind]}#{self.uids[index]}" if kind else "-"
+
+    def get_value(self, index, key):
+        if key == 'form': return self.forms[index]
+        if key == 'tag_code': return self.tag_codes[index]
+        if key == 'tag_name': return self.tag_names[index]
+        if key == 'level': return self.levels[index]
+        if key == 'id': return self.get_id(index)
+        if key == 'desc': return self.descs[index]
+        if key == 'offset_start': return self.offset_starts[index]
+        if key == 'offset_len': return self.offset_lens[index]
+        if key == 'filename' and self.filename_runs: return self.filename_at(index)
+        extra = self.extras.get(index)
+        if extra and key in extra: return extra[key]
+        raise KeyError(key)
+
+    def keys_at(self, index):
+        keys = list(FIELDS)
+        if index in self.extras: keys.extend(self.extras[index])
+        if self.filename_runs: keys.append('filename')
+        return keys
+
+    def shift_offsets(self, delta):
+        """문서 조각 단위로 분석한 결과의 오프셋을 원문 기준으로 옮깁니다."""
+        if not delta: return
+        for i in range(len(self.offset_starts)):
+            self.offset_starts[i] += delta
+
+    def set_filename(self, filename):
+        self.filename_runs = [(0, filename)]
+
+    def filename_at(self, index):
+        starts = [start for start, _ in self.filename_runs]
+        return self.filename_runs[bisect.bisect_right(starts, index) - 1][1]
+
+    def local_index(self, index):
+        """파일별 구간 안에서의 순번 (시각화 _ui_id 용)"""
+        if not self.filename_runs: return index
+        starts = [start for start, _ in self.filename_runs]
+        return index - starts[bisect.bisect_right(starts, index) - 1]
+
+    def extend(self, other):
+        base = len(self)
+        if not self.lexicon_version: self.lexicon_version = other.lexicon_version
+        self.forms.extend(other.forms)
+        self.tag_codes.extend(other.tag_codes)
+        self.tag_names.extend(other.tag_names)
+        self.levels.extend(other.levels)
+        self.id_kinds.extend(other.id_kinds)
+        self.uids.extend(other.uids)
+        self.descs.extend(other.descs)
+        self.offset_starts.extend(other.offset_starts)
+        self.offset_lens.extend(other.offset_lens)
+        for index, extra in other.extras.items():
+            self.extras[base + index] = extra
+        for start, filename in other.filename_runs:
+            self.filename_runs.append((base + start, filename))
+
+    def slice(self, start, stop):
+        """[start, stop) 구간의 토큰만 담은 새 TokenTable (파일명 구간은 싣지 않음)"""
+        part = TokenTable(self.lexicon_version)
+        part.forms = self.forms[start:stop]
+        part.tag_codes = self.tag_codes[start:stop]
+        part.tag_names = self.tag_names[start:stop]
+        part.levels = self.levels[start:stop]
+        part.id_kinds = self.id_kinds[start:stop]
+        part.uids = self.uids[start:stop]
+        part.descs = self.descs[start:stop]
+        part.offset_starts = self.offset_starts[start:stop]
+        part.offset_lens = self.offset_lens[start:stop]
+        part.extras = {index - start: extra for index, extra in self.extras.items() if start <= index < stop}
+        return part
+
+    @classmethod
+    def concat(cls, tables):
+        result = cls()
+        for table in tables: result.extend(table)
+        return result
+
+    def __len__(self):
+        return len(self.forms)
+
+    def __getitem__(self, index):
+        if index < 0: index += len(self)
+        if not 0 <= index < len(self): raise IndexError(index)
+        return TokenView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.forms)):
+            yield TokenView(self, index)
+
+    def to_records(self):
+        """JSON 응답용: 토큰별 dict 리스트"""
+        return [dict(view) for view in self]
+
+    def to_columns(self):
+        """
+        JSON 응답용: 열 단위 dict.
+        같은 사전 항목·품사가 여러 번 나와도 한 번만 싣도록 (id, 길잡이말)은 entries, (품사 코드, 이름)은 tags 목록에 모으고
+        토큰 열에는 그 목록의 번호(entry, tag)만 담습니다.
+        """
+        entries, entry_codes = [], {}
+        tags, tag_codes = [], {}
+        entry_column, tag_column = [], []
+        for i in range(len(self)):
+            entry = (self.get_id(i), self.descs[i])
+            code = entry_codes.get(entry)
+            if code is None:
+                code = entry_codes[entry] = len(entries)
+                entries.append(list(entry))
+            entry_column.append(code)
+            tag = (self.tag_codes[i], self.tag_names[i])
+            code = tag_codes.get(tag)
+            if code is None:
+                code = tag_codes[tag] = len(tags)
+                tags.append(list(tag))
+            tag_column.append(code)
+        columns = {
+            'form': list(self.forms), 'tag': tag_column, 'level': self.levels.tolist(), 'entry': entry_column,
+            'offset_start': self.offset_starts.tolist(), 'offset_len': self.offset_lens.tolist(),
+            'entries': entries, 'tags': tags,
+        }
+        if self.extras: columns['extras'] = {str(i): extra for i, extra in self.extras.items()}
+        if self.filename_runs: columns['filename_runs'] = [list(run) for run in self.filename_runs]
+        if self.lexicon_version: columns['lexicon_version'] = self.lexicon_version
+        return columns
+
+
+class TokenView(Mapping):
+    """TokenTable의 한 행을 dict처럼 읽고 쓰는 가벼운 뷰 (템플릿에서는 row.level 형태로도 접근)"""
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        if key == '_ui_id': return self._ui_id
+        return self._table.get_value(self._index, key)
+
+    def __setitem__(self, key, value):
+        self._table.set(self._index, **{key: value})
+
+    def __iter__(self):
+        return iter(self._table.keys_at(self._index))
+
+    def __len__(self):
+        return len(self._table.keys_at(self._index))
+
+    def __getattr__(self, key):
+        try: return self._table.get_value(self._index, key)
+        except KeyError: raise AttributeError(key)
+
+    @property
+    def index(self):
+        """TokenTable 안에서의 행 번호"""
+        return self._index
+
+    @property
+    def _ui_id(self):
+        return f"seg-{self._table.local_index(self._index)}-{self._table.offset_starts[self._index]}"
+
+    def __repr__(self):
+        return f"TokenView({dict(self)!r})"
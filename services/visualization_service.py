@@ -1,49 +1,34 @@
-import re
+from services.levels import LEVEL_CODES, level_counts, level_label
 
 class VisualizationService:
-    def get_visualization_data(self, analysis_result, sentence):
+    def get_visualization_data(self, analysis_result, sentence, offset=0):
         """
         분석 결과와 원본 문장을 받아 시각화에 필요한 데이터 구조를 생성합니다.
         
         Args:
-            analysis_result (list): 형태소 분석 및 등급 분석 결과 리스트
+            analysis_result (TokenTable): 형태소 분석 및 등급 분석 결과
             sentence (str): 원본 문장
+            offset (int): sentence가 분석 결과 오프셋 기준 원문에서 시작하는 위치 (긴 문서를 조각별로 그릴 때)
             
         Returns:
             tuple: (visualization_data, text_segments)
                 - visualization_data (dict): 차트용 데이터 (labels, data)
                 - text_segments (list): 텍스트 하이라이팅용 세그먼트 리스트
         """
-        grade_counts = {f"{i}급": 0 for i in range(1, 7)}
         text_segments = []
         
-        # 차트 데이터 집계
-        for item in analysis_result:
-            lvl = item.get('level', '')
-            if '급' in lvl:
-                full_lvl_str = re.sub(r'[^0-9]', '', lvl)
-                if full_lvl_str and f"{full_lvl_str}급" in grade_counts:
-                    grade_counts[f"{full_lvl_str}급"] += 1
-
-        visualization_data = {
-            "labels": [k for k, v in grade_counts.items() if v > 0],
-            "data": [v for v in grade_counts.values() if v > 0]
-        }
+        visualization_data = self.get_chart_data(analysis_result)
         
         # 텍스트 세그먼트 생성 (하이라이팅용)
-        # UI 효율성을 위해 유니크 ID 부여
-        for i, item in enumerate(analysis_result):
-            item['_ui_id'] = f"seg-{i}-{item.get('offset_start', 0)}"
-        
-        # 오프셋 기준 정렬
-        sorted_analysis = sorted(analysis_result, key=lambda x: x.get('offset_start', -1))
+        # UI용 유니크 ID(_ui_id)와 info는 TokenTable 행 뷰에서 필요할 때 계산됩니다.
+        starts = analysis_result.offset_starts
+        lens = analysis_result.offset_lens
         current_cursor = 0
         
-        for item in sorted_analysis:
-            start = item.get('offset_start')
-            length = item.get('offset_len')
-            
-            if start is None or length is None: continue
+        # 오프셋 기준 정렬
+        for i in sorted(range(len(analysis_result)), key=starts.__getitem__):
+            start = starts[i] - offset
+            length = lens[i]
             
             # 분석되지 않은 앞부분 텍스트 처리 (일반 텍스트)
             if start > current_cursor:
@@ -52,17 +37,14 @@ class VisualizationService:
                     "type": "plain"
                 })
             
-            grade_class = "text-grade-none"
-            lvl = item.get('level', '')
-            if '급' in lvl:
-                num = re.sub(r'[^0-9]', '', lvl)
-                if num: grade_class = f"text-grade-{num}"
+            lvl = analysis_result.levels[i]
+            grade_class = f"text-grade-{lvl}" if lvl else "text-grade-none"
             
             text_segments.append({
-                "text": item['form'],
+                "text": analysis_result.forms[i],
                 "type": "graded",
                 "class": grade_class,
-                "info": item 
+                "info": analysis_result[i]
             })
             
             current_cursor = max(current_cursor, start + length)
@@ -76,6 +58,42 @@ class VisualizationService:
             
         return visualization_data, text_segments
 
+    def get_chart_data(self, analysis_result):
+        """분석 결과의 등급별 토큰 수 -> 차트용 데이터 (labels, data)"""
+        # 등급 코드 열의 빈도 -> 표시용 라벨
+        counts = level_counts(analysis_result.levels)
+        grade_counts = {level_label(code): int(counts[code]) for code in LEVEL_CODES}
+        return {
+            "labels": [k for k, v in grade_counts.items() if v > 0],
+            "data": [v for v in grade_counts.values() if v > 0]
+        }
+
+    def encode_segments(self, text_segments, runs=None, index_base=0):
+        """
+        get_visualization_data의 세그먼트 리스트를 런 길이 부호화한 run 리스트로 압축합니다. (JSON 전송용)
+
+        - 일반 텍스트: 문자열 (이어지는 일반 텍스트는 하나로 합침)
+        - 분석된 토큰: [등급 코드, 첫 토큰 번호, 개수] (등급이 같고 토큰 번호가 이어지는 토큰은 하나로 합침)
+          토큰의 형태·오프셋·길잡이말은 TokenTable.to_columns()의 같은 번호 행에서 읽습니다.
+
+        runs 를 넘기면 그 뒤에 이어 붙입니다. (문서를 묶음별로 그릴 때, index_base 는 묶음 첫 토큰의 문서 내 번호)
+        """
+        runs = [] if runs is None else runs
+        for seg in text_segments:
+            last = runs[-1] if runs else None
+            if seg['type'] != 'graded':
+                if isinstance(last, str): runs[-1] = last + seg['text']
+                else: runs.append(seg['text'])
+                continue
+            info = seg['info']
+            level = info['level']
+            index = index_base + info.index
+            if isinstance(last, list) and last[0] == level and last[1] + last[2] == index:
+                last[2] += 1
+            else:
+                runs.append([level, index, 1])
+        return runs
+
     def create_chart_data_from_stats(self, grade_stats):
         """
         등급 통계(grade_stats) 딕셔너리를 받아 Chart.js용 visualization_data로 변환합니다.
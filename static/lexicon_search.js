@@ -0,0 +1,178 @@
+/**
+ * 어휘 검색 모듈: /api/search-index 색인을 한 번 내려받아 /api/search 와 같은 결과를 브라우저에서 바로 계산합니다.
+ * (services/search_index.py 의 부분 일치·어간 역방향·자모 접두 검색과 같은 순위 규칙)
+ *
+ * 색인을 받지 못했거나 오타 허용 검색(mode='fuzzy')을 요청한 경우에만 /api/search 로 넘깁니다.
+ * 부분 일치·접두 검색 결과가 없으면 빈 배열을 돌려주며, 오타 허용 검색은 화면에서 따로 요청합니다.
+ * 색인 URL은 이 스크립트 태그의 data-index-url (어휘 버전 포함) 을 사용합니다.
+ */
+const LexiconSearch = (function () {
+    const INDEX_URL = (document.currentScript && document.currentScript.dataset.indexUrl) || '/api/search-index';
+    const LIMIT = 10;
+
+    // 순위 (작을수록 상위)
+    const RANK_EXACT = 0, RANK_PREFIX = 1, RANK_SUBSTRING = 2, RANK_STEM_IN_QUERY = 3;
+    const GRAMMAR_ENDINGS = ['다', '는', '은', 'ㄴ', '을', 'ㄹ', '요', '죠', '니', '면'];
+    const STRIP_RE = /[\s\-\~\(\)\[\]\.\?\/ㆍ]/g;
+
+    // 한글 음절 -> 자모 (services/hangul.py decompose_jamo 와 동일)
+    const CHO = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ';
+    const JUNG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ';
+    const JONG = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+        'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ'];
+    const COMPOUND = {
+        'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+        'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+        'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ'
+    };
+
+    let indexPromise = null;
+
+    function normalize(text) {
+        return typeof text === 'string' ? text.replace(STRIP_RE, '') : '';
+    }
+
+    function decomposeJamo(text) {
+        if (!text) return '';
+        let out = '';
+        for (const ch of text.normalize('NFC')) {
+            const code = ch.charCodeAt(0);
+            if (code >= 0xAC00 && code <= 0xD7A3) {
+                const offset = code - 0xAC00;
+                const cho = Math.floor(offset / (21 * 28));
+                const jung = Math.floor((offset % (21 * 28)) / 28);
+                const jong = offset % 28;
+                out += CHO[cho] + (COMPOUND[JUNG[jung]] || JUNG[jung]);
+                if (jong) out += COMPOUND[JONG[jong]] || JONG[jong];
+            } else {
+                out += COMPOUND[ch] || ch;
+            }
+        }
+        return out;
+    }
+
+    // 색인 열 -> 문서별 검색 대상 문자열, 자모열, 어간(역방향 매칭용)
+    function prepare(columns) {
+        columns.docs = columns.docs.map((doc, i) => doc || [columns.text[i]]);
+        columns.jamo = columns.docs.map(doc => doc.map(decomposeJamo));
+        columns.stems = columns.docs.map(doc => doc.map(text => text.endsWith('다') ? text.slice(0, -1) : text));
+        return columns;
+    }
+
+    function loadIndex() {
+        if (!indexPromise) {
+            indexPromise = fetch(INDEX_URL)
+                .then(res => {
+                    if (!res.ok) throw new Error(res.status);
+                    return res.json();
+                })
+                .then(index => {
+                    prepare(index.word);
+                    prepare(index.grammar);
+                    return index;
+                })
+                .catch(err => {
+                    console.warn('검색 색인을 불러오지 못했습니다. 서버 검색을 사용합니다.', err);
+                    indexPromise = null;
+                    return null;
+                });
+        }
+        return indexPromise;
+    }
+
+    function rank(texts, query) {
+        let best = null;
+        for (const text of texts) {
+            if (text === query) return RANK_EXACT;
+            let r;
+            if (text.startsWith(query)) r = RANK_PREFIX;
+            else if (text.includes(query)) r = RANK_SUBSTRING;
+            else continue;
+            if (best === null || r < best) best = r;
+        }
+        return best;
+    }
+
+    function byRank(columns, ranks) {
+        return [...ranks.keys()]
+            .sort((a, b) => (ranks.get(a) - ranks.get(b)) || (columns.order[a] - columns.order[b]) || (a - b))
+            .slice(0, LIMIT);
+    }
+
+    function containsSearch(columns, queries, matchStemWithinQuery) {
+        const ranks = new Map();
+        for (const query of queries) {
+            if (!query) continue;
+            columns.docs.forEach((texts, docId) => {
+                const r = rank(texts, query);
+                if (r !== null && (!ranks.has(docId) || r < ranks.get(docId))) ranks.set(docId, r);
+            });
+            if (matchStemWithinQuery) {
+                columns.stems.forEach((stems, docId) => {
+                    if (!ranks.has(docId) && stems.some(stem => stem.length >= 2 && query.includes(stem))) {
+                        ranks.set(docId, RANK_STEM_IN_QUERY);
+                    }
+                });
+            }
+        }
+        return byRank(columns, ranks);
+    }
+
+    function prefixSearch(columns, query) {
+        const prefix = decomposeJamo(query);
+        if (!prefix) return [];
+        const ranks = new Map();
+        columns.jamo.forEach((jamo, docId) => {
+            if (jamo.some(j => j && j.startsWith(prefix))) ranks.set(docId, 0);
+        });
+        return byRank(columns, ranks);
+    }
+
+    function toRecord(columns, docId, type) {
+        const record = {
+            text: columns.text[docId], grade: columns.grade[docId], desc: columns.desc[docId], pos: columns.pos[docId]
+        };
+        if (type === 'word') {
+            record.meaning = '';
+        } else {
+            record.related = columns.related[docId];
+            record.meaning = columns.meaning[docId];
+        }
+        record.uid = columns.uid[docId];
+        return record;
+    }
+
+    function searchRemote(query, type, mode) {
+        return fetch(`/api/search?q=${encodeURIComponent(query)}&type=${type}&mode=${mode}`).then(res => res.json());
+    }
+
+    /**
+     * @param {string} query 검색어
+     * @param {string} type 'word' | 'grammar'
+     * @param {string} mode 'contains' | 'prefix' | 'fuzzy' (/api/search 와 동일, fuzzy 는 항상 서버 검색)
+     * @returns {Promise<Array>} /api/search 와 같은 형식의 결과 (fuzzy 결과에는 distance 포함)
+     */
+    async function search(query, type = 'word', mode = 'contains') {
+        query = (query || '').trim();
+        if (!query) return [];
+        const index = mode === 'fuzzy' ? null : await loadIndex();
+        if (!index) return searchRemote(query, type, mode);
+
+        const columns = type === 'word' ? index.word : index.grammar;
+        const normQuery = normalize(query);
+        let docIds = [];
+        if (mode !== 'prefix') {
+            const candidates = [normQuery];
+            if (type !== 'word' && normQuery.length >= 2) {
+                const ending = GRAMMAR_ENDINGS.find(end => normQuery.endsWith(end));
+                if (ending && normQuery.length > ending.length) candidates.push(normQuery.slice(0, -ending.length));
+            }
+            docIds = containsSearch(columns, candidates, type !== 'word');
+        }
+        // 조합 중인 음절('가ㅂ', 'ㄱ')은 부분 일치로는 찾을 수 없으므로 자모 접두 검색을 사용합니다.
+        if (!docIds.length) docIds = prefixSearch(columns, normQuery);
+        return docIds.map(docId => toRecord(columns, docId, type));
+    }
+
+    return { search, preload: loadIndex };
+})();
@@ -19,6 +19,95 @@ function initSearchModule(onItemClick) {
         }
     });
 
+    // 검색창을 처음 누를 때 검색 색인을 미리 받아 둡니다.
+    searchInput.addEventListener('focus', () => LexiconSearch.preload(), { once: true });
+
+    // 검색 결과 한 줄
+    function renderItem(item) {
+        const div = document.createElement('div');
+        div.className = 'search-result-item';
+
+        // 1. 힌트(길잡이말) 처리
+        const hintText = (item.desc && item.desc !== 'nan')
+            ? `<span style="color:#aaa; font-size:0.85em; margin-left:6px;">${item.desc}</span>`
+            : '';
+
+        // 2. 품사(POS) 처리
+        const posText = item.pos
+            ? `<span style="color:#a855f7; font-weight:600; font-size:0.85em; margin-left:4px;">[${item.pos}]</span>`
+            : '';
+
+        // 3. [NEW] 관련형 매칭 정보 처리 (예: "가" 검색 시 -> "관련형: 가")
+        let relatedText = '';
+        if (item.related) {
+            relatedText = `<span style="color:#ff9f43; font-size:0.8em; margin-left:6px;">(관련형: ${item.related})</span>`;
+        }
+
+        // 4. 렌더링 (대표색 불투명 적용)
+        const gradeNum = item.grade.replace(/[^0-9]/g, '');
+
+        // 색상 매핑 (Solid Colors)
+        // 1: #10b981 (Green), 2: #3b82f6 (Blue), 3: #8b5cf6 (Purple)
+        // 4: #f59e0b (Yellow), 5: #ef4444 (Red), 6: #64748b (Slate)
+        const colorMap = {
+            '1': '#10b981',
+            '2': '#3b82f6',
+            '3': '#8b5cf6',
+            '4': '#f59e0b',
+            '5': '#ef4444',
+            '6': '#64748b'
+        };
+        const bgColor = colorMap[gradeNum] || '#94a3b8';
+
+        div.innerHTML = `
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <div style="text-align: left; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;">
+                    <strong>${item.text}</strong>
+                    ${posText}
+                    ${relatedText}
+                    ${hintText}
+                </div>
+                <span style="font-size:0.75em; color:#fff; background:${bgColor}; padding: 2px 6px; border-radius:4px; white-space: nowrap; margin-left: 10px;">
+                    ${item.grade}
+                </span>
+            </div>
+        `;
+
+        div.addEventListener('click', function () {
+            onItemClick(item);
+        });
+        return div;
+    }
+
+    // "오타 허용 검색" 버튼: 누르면 서버 오타 허용 검색 결과를 "혹시 이것을 찾으셨나요?" 아래에 보여 줍니다.
+    function renderFuzzyButton(query, type) {
+        const button = document.createElement('div');
+        button.className = 'search-result-item';
+        button.style.cssText = 'color:#3b82f6; text-align:center; cursor:pointer;';
+        button.textContent = '오타 허용 검색';
+        button.addEventListener('click', function (e) {
+            e.stopPropagation(); // 결과창 바깥 클릭으로 보고 닫지 않도록
+            button.textContent = '검색 중...';
+            LexiconSearch.search(query, type, 'fuzzy')
+                .then(data => {
+                    // 그 사이 검색어가 바뀌었으면 무시
+                    if (searchInput.value.trim() !== query) return;
+                    resultsArea.innerHTML = '';
+                    const label = document.createElement('div');
+                    label.className = 'search-result-item';
+                    label.style.cssText = 'color:#888; font-size:0.85em;';
+                    label.textContent = data.length ? `혹시 이것을 찾으셨나요? ('${query}' 와 비슷한 표제어)` : '비슷한 표제어도 없습니다.';
+                    resultsArea.appendChild(label);
+                    data.forEach(item => resultsArea.appendChild(renderItem(item)));
+                })
+                .catch(err => {
+                    console.error('오타 허용 검색 실패:', err);
+                    button.textContent = '오타 허용 검색';
+                });
+        });
+        return button;
+    }
+
     let debounceTimer; // 디바운싱 타이머 변수
 
     searchInput.addEventListener('input', function () {
@@ -36,75 +125,24 @@ function initSearchModule(onItemClick) {
         // 이전 타이머 취소 (연속 입력 시 API 요청 지연)
         clearTimeout(debounceTimer);
 
-        // 300ms 후에 API 요청 실행
+        // 조합 중인 자모(예: '가ㅂ', 'ㄱ')로 끝나면 자모 접두 검색 사용
+        const mode = /[\u3131-\u318E]$/.test(query) ? 'prefix' : 'contains';
+
+        // 300ms 후에 검색 실행 (브라우저 색인, 필요하면 서버 검색)
         debounceTimer = setTimeout(() => {
-            fetch(`/api/search?q=${encodeURIComponent(query)}&type=${type}`)
-                .then(res => res.json())
+            LexiconSearch.search(query, type, mode)
                 .then(data => {
                     resultsArea.innerHTML = '';
 
                     if (data.length > 0) {
                         resultsArea.style.display = 'block';
 
-                        data.forEach(item => {
-                            const div = document.createElement('div');
-                            div.className = 'search-result-item';
-
-                            // 1. 힌트(길잡이말) 처리
-                            const hintText = (item.desc && item.desc !== 'nan')
-                                ? `<span style="color:#aaa; font-size:0.85em; margin-left:6px;">${item.desc}</span>`
-                                : '';
-
-                            // 2. 품사(POS) 처리
-                            const posText = item.pos
-                                ? `<span style="color:#a855f7; font-weight:600; font-size:0.85em; margin-left:4px;">[${item.pos}]</span>`
-                                : '';
-
-                            // 3. [NEW] 관련형 매칭 정보 처리 (예: "가" 검색 시 -> "관련형: 가")
-                            let relatedText = '';
-                            if (item.related) {
-                                relatedText = `<span style="color:#ff9f43; font-size:0.8em; margin-left:6px;">(관련형: ${item.related})</span>`;
-                            }
-
-                            // 4. 렌더링 (대표색 불투명 적용)
-                            const gradeNum = item.grade.replace(/[^0-9]/g, '');
-
-                            // 색상 매핑 (Solid Colors)
-                            // 1: #10b981 (Green), 2: #3b82f6 (Blue), 3: #8b5cf6 (Purple)
-                            // 4: #f59e0b (Yellow), 5: #ef4444 (Red), 6: #64748b (Slate)
-                            const colorMap = {
-                                '1': '#10b981',
-                                '2': '#3b82f6',
-                                '3': '#8b5cf6',
-                                '4': '#f59e0b',
-                                '5': '#ef4444',
-                                '6': '#64748b'
-                            };
-                            const bgColor = colorMap[gradeNum] || '#94a3b8';
-
-                            div.innerHTML = `
-                                <div style="display: flex; justify-content: space-between; align-items: center;">
-                                    <div style="text-align: left; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;">
-                                        <strong>${item.text}</strong>
-                                        ${posText}
-                                        ${relatedText}
-                                        ${hintText}
-                                    </div>
-                                    <span style="font-size:0.75em; color:#fff; background:${bgColor}; padding: 2px 6px; border-radius:4px; white-space: nowrap; margin-left: 10px;">
-                                        ${item.grade}
-                                    </span>
-                                </div>
-                            `;
-
-                            div.addEventListener('click', function () {
-                                onItemClick(item);
-                            });
-
-                            resultsArea.appendChild(div);
-                        });
+                        data.forEach(item => resultsArea.appendChild(renderItem(item)));
                     } else {
+                        // 결과가 없을 때만, 사용자가 누르면 오타 허용 검색(서버)을 합니다.
                         resultsArea.style.display = 'block';
                         resultsArea.innerHTML = '<div class="search-result-item" style="color:#888; text-align:center;">검색 결과가 없습니다.</div>';
+                        resultsArea.appendChild(renderFuzzyButton(query, type));
                     }
                 })
                 .catch(err => console.error('검색 실패:', err));